@@ -1,6 +1,37 @@
-"""Import essential autoscaling methods and classes for convenience."""
+"""Import essential autoscaling methods and classes for convenience.
 
-from autoscaling.core.autoscale import autoscale
-from autoscaling.core.autoscaler import AutoScaler
-from autoscaling.autoscalers.isoscaler import IsoScaler
-from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+Names are imported lazily, on first access, so that importing this module is cheap. In
+particular, OpenMDAO and Dymos are only imported once autoscale() is called.
+"""
+
+import importlib
+
+# Maps each public name to the module defining it...
+_LAZY_NAMES = {
+    'autoscale': 'autoscaling.core.autoscale',
+    'AutoScaler': 'autoscaling.core.autoscaler',
+    'ScalingBatch': 'autoscaling.core.batch',
+    'phase_grids': 'autoscaling.core.transfer',
+    'transfer_refs': 'autoscaling.core.transfer',
+    'IsoScaler': 'autoscaling.autoscalers.isoscaler',
+    'PJRNScaler': 'autoscaling.autoscalers.pjrnscaler',
+    'MatrixFreePJRNScaler': 'autoscaling.autoscalers.matrixfreepjrnscaler',
+    'SketchPJRNScaler': 'autoscaling.autoscalers.sketchpjrnscaler',
+    'RuizScaler': 'autoscaling.autoscalers.ruizscaler',
+    'CurtisReidScaler': 'autoscaling.autoscalers.curtisreidscaler',
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_LAZY_NAMES[name]), name)
+    # Cache it, so that __getattr__ is not called for it again...
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,136 @@
+"""Define CurtisReidScaler class."""
+
+import numpy as np
+
+from autoscaling.core.autoscaler import INFINITE_BOUND, AutoScaler
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.names import CONTROL, DEFECT, PATH, STATE, KeyIndex
+from autoscaling.utils.rownorms import row_log_stats_matrices
+
+# Default magnitude, relative to the largest in its row, up to which an entry is round-off...
+DROP_TOL = np.sqrt(np.finfo(float).eps)
+
+
+class CurtisReidScaler(AutoScaler):
+    """
+    Helper class for automatic scaling of dynamically-constrained optimization problems via Curtis-Reid geometric-mean scaling.
+
+    The jacobian of the collocation defect and path constraints with respect to the states and
+    controls is scaled as diag(exp(rho)) J diag(exp(gamma)), with rho and gamma minimizing the
+    spread of the scaled entries in log space,
+
+        sum over nonzero a_ik of (log|a_ik| + rho_i + gamma_k)^2,
+
+    so that the scaled entries are as close to one as possible in the geometric-mean sense. Since
+    Dymos applies a single ref to all nodes of a state or control, gamma is uniform within each
+    variable. The sum over the nonzero entries of row i of jac[of, v] then only depends on their
+    count n_iv and the sum s_iv of their log|a|, and the problem reduces to the weighted linear
+    least-squares problem
+
+        sqrt(n_iv) (rho_i + gamma_v) = -s_iv / sqrt(n_iv),
+
+    with one equation per nonzero (row, variable) pair, which is solved with the sparse
+    iterative LSMR method of scipy.sparse.linalg.
+
+    Entries no larger than drop_tol times the largest magnitude in their row are left out of the
+    sums, so that round-off where a derivative vanishes (e.g. 1e-20) does not pull the fit
+    towards it.
+
+    The defect_refs and path constraint refs are exp(-rho). The variable ref0s are the lower
+    bounds (zero where there are none), and the refs are ref0s + exp(gamma). Variables that no
+    defect or path constraint depends on are scaled by their range instead, if their bounds are
+    finite.
+
+    Attributes
+    ----------
+    refs : RefStore
+        Maps a variable's global name to its ref value.
+    ref0s : RefStore
+        Maps a variable's global name to its ref0 value.
+    defect_refs : RefStore
+        Maps a variable's defect's global name to its defect_ref value.
+    num_iterations : int
+        Number of LSMR iterations performed.
+    converged : bool
+        True if LSMR met its tolerance within the iteration limit.
+    """
+
+    # Part of the cache key; bump whenever the computed reference values change...
+    algorithm_version = 2
+
+    def initialize(self, jac, lbs, ubs, tol=1e-8, max_iter=None, drop_tol=DROP_TOL):
+        """
+        Initialize, using the given variable bounds and jacobian information.
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information from which global variable, constraint names are parsed. Must be compatible with the Dymos problem at hand. Sub-blocks may be dense arrays or scipy.sparse matrices (CSR, CSC, COO).
+        lbs : dict
+            Maps a global variable (not a constraint) name to its lower bound.
+        ubs : dict
+            Maps a global variable (not a constraint) name to its upper bound.
+        tol : float
+            Relative tolerance of the LSMR solve (passed as its atol and btol).
+        max_iter : int or None
+            Maximum number of LSMR iterations. If None, LSMR's default is used.
+        drop_tol : float
+            Entries no larger than drop_tol times the largest magnitude in their row are treated
+            as zero (round-off). Set to 0 to keep every nonzero entry.
+        """
+        import scipy.sparse
+        from scipy.sparse.linalg import lsmr
+
+        with stage('parse_names'):
+            keys = KeyIndex.from_jac(jac)
+            vnames = sorted(keys.names(STATE, CONTROL))
+            fnames = sorted(keys.names(DEFECT))
+            gnames = sorted(keys.names(PATH))
+
+        with stage('row_norms'):
+            counts, log_sums, row_slices = row_log_stats_matrices(jac, fnames + gnames, vnames,
+                                                                  rtol=drop_tol)
+        num_rows, num_vars = counts.shape
+
+        with stage('least_squares'):
+            # One equation per nonzero (row, variable) pair, in the unknowns [rho, gamma]...
+            rows, cols = np.nonzero(counts)
+            n = counts[rows, cols]
+            weights = np.sqrt(n)
+            eq = np.arange(rows.size)
+            A = scipy.sparse.csr_matrix(
+                (np.concatenate([weights, weights]),
+                 (np.concatenate([eq, eq]), np.concatenate([rows, num_rows + cols]))),
+                shape=(rows.size, num_rows + num_vars))
+            b = -log_sums[rows, cols] / weights
+
+            # The minimum-norm solution fixes the free shift between rho and gamma, and leaves
+            # rows and variables without nonzero entries at zero...
+            kwargs = {} if max_iter is None else {'maxiter': max_iter}
+            x, istop, itn = lsmr(A, b, atol=tol, btol=tol, **kwargs)[:3]
+            self.num_iterations = int(itn)
+            self.converged = istop in (0, 1, 2, 4, 5)
+
+        rho = x[:num_rows]
+        gamma = x[num_rows:]
+
+        # Set refs, ref0s, defect_refs...
+        lb = np.array([lbs[v] for v in vnames], dtype=float)
+        ub = np.array([ubs[v] for v in vnames], dtype=float)
+        lb_finite = np.abs(lb) < INFINITE_BOUND
+        ub_finite = np.abs(ub) < INFINITE_BOUND
+        span = ub - lb
+        scale = np.exp(gamma)
+        unused = ~counts.any(axis=0)
+        scale[unused] = np.where(lb_finite & ub_finite & (span > 0), span, 1.0)[unused]
+
+        ref0 = np.where(lb_finite, lb, 0.0)
+        K_inv = np.exp(-rho)
+        for j, nm in enumerate(vnames):
+            self.refs[nm] = ref0[j] + scale[j]
+            self.ref0s[nm] = ref0[j]
+        for nm in fnames:
+            self.defect_refs[nm] = K_inv[row_slices[nm]]
+        for nm in gnames:
+            self.refs[nm] = K_inv[row_slices[nm]]
+            self.ref0s[nm] = 0
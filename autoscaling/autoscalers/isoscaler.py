@@ -1,6 +1,10 @@
 """Define IsoScaler class."""
 
-from autoscaling.core.autoscaler import AutoScaler
+from autoscaling.core.autoscaler import (VARIABLE_SCALINGS, AutoScaler, bounded_variables,
+                                         jacobian_variable_refs)
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.names import CONTROL, PATH, STATE, KeyIndex, parse_name
+from autoscaling.utils.rownorms import column_counts, squared_row_norm_matrix
 
 
 class IsoScaler(AutoScaler):
@@ -9,54 +13,87 @@ class IsoScaler(AutoScaler):
 
     Attributes
     ----------
-    refs : dict
+    refs : RefStore
         Maps a variable's global name to its ref value.
-    ref0s : dict
+    ref0s : RefStore
         Maps a variable's global name to its ref0 value.
-    defect_refs : dict
+    defect_refs : RefStore
         Maps a variable's defect's global name to its defect_ref value.
+    variable_scaling : str
+        How the refs and ref0s of states and controls are derived ('bounds' or 'jacobian').
     """
 
-    def initialize(self, jac, lbs, ubs):
+    # Part of the cache key; bump whenever the computed reference values change...
+    algorithm_version = 2
+
+    def initialize(self, jac, lbs, ubs, variable_scaling='bounds'):
         """
         Initialize, using the given variable bounds and jacobian information.
 
         Parameters
         ----------
         jac : dict
-            Jacobian information from which global variable, constraint names are parsed. Assumed to be compatible with the Dymos problem at hand.
+            Jacobian information from which global variable, constraint names are parsed. Assumed to be compatible with the Dymos problem at hand. Sub-blocks may be dense arrays or scipy.sparse matrices (CSR, CSC, COO).
         lbs : dict
             Maps a global variable (not a constraint) name to its lower bound.
         ubs : dict
             Maps a global variable (not a constraint) name to its upper bound.
+        variable_scaling : str
+            If 'bounds', the refs and ref0s of states and controls are their upper and lower
+            bounds wherever these are finite and distinct, and are derived from the jacobian as
+            below for the others. If 'jacobian', their ranges (ref - ref0) are the inverse root
+            mean square column norms of the jacobian of the defect and path constraints with
+            respect to them, so they do not depend on loose or missing bounds (see
+            jacobian_variable_refs()).
         """
+        assert(variable_scaling in VARIABLE_SCALINGS), \
+            'variable_scaling must be one of {0}.'.format(VARIABLE_SCALINGS)
+        self.variable_scaling = variable_scaling
+
         # Parse global names of states, (dynamic) controls,
         # and collocation defect constraints from total
         # jacobian dict keys...
-        vnames = self._parse_vnames_from(jac)
-        fnames = self._parse_fnames_from(jac)
+        with stage('parse_names'):
+            vnames = self._parse_vnames_from(jac)
+            fnames = self._parse_fnames_from(jac)
+
+        # Bounds are used wherever they are finite and distinct; unbounded states and controls
+        # (whose bounds OpenMDAO reports as +/-INF_BOUND) fall back to the column norms...
+        sorted_vnames = sorted(vnames)
+        if variable_scaling == 'jacobian' or not bounded_variables(sorted_vnames, lbs, ubs).all():
+            with stage('row_norms'):
+                ofs = sorted(fnames) + sorted(KeyIndex.from_jac(jac).names(PATH))
+                row_sq_norms, _ = squared_row_norm_matrix(jac, ofs, sorted_vnames)
+                ref0s, refs = jacobian_variable_refs(row_sq_norms.sum(axis=0),
+                                                     column_counts(jac, ofs, sorted_vnames),
+                                                     sorted_vnames, lbs, ubs,
+                                                     prefer_bounds=variable_scaling == 'bounds')
+            vref0s = dict(zip(sorted_vnames, ref0s))
+            vrefs = dict(zip(sorted_vnames, refs))
+        else:
+            vref0s = lbs
+            vrefs = ubs
 
         # Calculate diagonals of scaling matrix inverses for
         # variables and defect constraints, according to PJRN
         # defining formulae...
-        Kv_inv = {v: ubs[v] - lbs[v] for v in vnames}
+        Kv_inv = {v: vrefs[v] - vref0s[v] for v in vnames}
 
+        # Match each defect to the state of the same phase and local name...
+        keys = KeyIndex(sorted(vnames))
         Kf_inv = {}
         for f in fnames:
-            key = None
-            loc_f = self.local_defect_name(f)
-            for v in vnames:
-                loc_v = self.local_var_name(v)
-                if loc_v == loc_f:
-                    key = v
-                    break
+            rec = parse_name(f)
+            key = keys.find(STATE, rec.local, rec.phase)
+            if key is None:
+                key = keys.find(STATE, rec.local) or keys.find(CONTROL, rec.local)
             assert(key is not None)
             Kf_inv[f] = Kv_inv[key]
 
         # Set refs, ref0s, defect_refs...
         for nm in vnames:
-            self.refs[nm] = ubs[nm]
-            self.ref0s[nm] = lbs[nm]
+            self.refs[nm] = vrefs[nm]
+            self.ref0s[nm] = vref0s[nm]
         for nm in fnames:
             self.defect_refs[nm] = Kf_inv[nm]
 
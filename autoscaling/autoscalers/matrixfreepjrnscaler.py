@@ -0,0 +1,166 @@
+"""Define MatrixFreePJRNScaler class."""
+
+import numpy as np
+
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.core.autoscaler import VARIABLE_SCALINGS
+from autoscaling.core.instrumentation import count
+from autoscaling.core.names import CONTROL, STATE, parse_name
+
+# Maps the kind of a design variable to the grid node subset its columns live on...
+_NODE_SUBSETS = {
+    STATE: 'state_input',
+    CONTROL: 'control_input',
+}
+
+
+class MatrixFreePJRNScaler(PJRNScaler):
+    """
+    Helper class for PJRN automatic scaling that never materializes the total jacobian.
+
+    The squared row norms of each jac[of, v] block are accumulated from forward-mode
+    jacobian-vector products on the live Problem: the product with the (sum of) unit seed(s) of
+    one or more columns of v gives those columns of every constraint, whose squares are summed
+    into the row norms and then discarded. Memory is therefore proportional to the number of
+    constraint rows (times the number of states and controls), not to the size of the jacobian.
+
+    Columns can be pushed through the model together when no constraint row depends on more than
+    one of them. Dymos collocation defects and path constraints only couple nodes within a
+    segment, but continuity constraints couple two neighbouring segments (a control rate
+    continuity row depends on every control node of both), so columns of the same variable that
+    are at least two segments' worth of nodes apart are structurally orthogonal; see the
+    column_stride option.
+
+    Attributes
+    ----------
+    refs : RefStore
+        Maps a variable's global name to its ref value.
+    ref0s : RefStore
+        Maps a variable's global name to its ref0 value.
+    defect_refs : RefStore
+        Maps a variable's defect's global name to its defect_ref value.
+    row_sq_norms : ndarray
+        Rows x variables matrix whose (i, j) entry is the squared norm of row i of the jacobian of the defect, path, boundary and continuity constraints and the objective with respect to the j-th scaled variable. Does not depend on the bounds.
+    num_products : int
+        Number of jacobian-vector products computed.
+    """
+
+    def initialize(self, prob, lbs=None, ubs=None, column_stride=None, column_groups=None,
+                   run_model=True, variable_scaling='bounds', scale_times_and_parameters=False):
+        """
+        Initialize, using the given variable bounds and jacobian-vector products of the given problem.
+
+        Parameters
+        ----------
+        prob : Problem
+            Problem that has already been set up.
+        lbs : dict or None
+            Maps a global variable (not a constraint) name to its lower bound. Defaults to the bounds in the driver's design variable metadata.
+        ubs : dict or None
+            Maps a global variable (not a constraint) name to its upper bound. Defaults to the bounds in the driver's design variable metadata.
+        column_stride : int, str or None
+            If given, columns c, c + column_stride, c + 2 * column_stride, ... of each variable are pushed through the model together. This is exact as long as no constraint row depends on two columns of the same variable that are column_stride or more apart (for Dymos phases with continuity constraints, a stride of twice the largest number of input nodes per segment of the variable is safe; one segment's worth of nodes plus one is not). If 'auto', that stride is derived for each state and control from the grid of its phase. Otherwise each column is pushed through on its own.
+        column_groups : dict or None
+            Maps a global variable name to a list of lists of its (design variable) column indices that are structurally orthogonal and may be pushed through together. Overrides column_stride for the variables it contains.
+        run_model : bool
+            If True, run the model first so that the products are evaluated at the current point.
+        variable_scaling : str
+            How the refs and ref0s of states and controls are derived ('bounds' or 'jacobian'; see PJRNScaler.initialize()).
+        scale_times_and_parameters : bool
+            If True, the phase times and design parameters are scaled too (see PJRNScaler.initialize()).
+        """
+        assert(variable_scaling in VARIABLE_SCALINGS), \
+            'variable_scaling must be one of {0}.'.format(VARIABLE_SCALINGS)
+        self.variable_scaling = variable_scaling
+        from autoscaling.utils.utils import design_var_bounds, meta_indices, scaling_names
+
+        if run_model:
+            prob.run_model()
+        else:
+            prob.final_setup()
+
+        onames, vnames = scaling_names(prob)
+        if lbs is None or ubs is None:
+            dv_lbs, dv_ubs = design_var_bounds(prob)
+            lbs = dv_lbs if lbs is None else lbs
+            ubs = dv_ubs if ubs is None else ubs
+
+        if not scale_times_and_parameters:
+            vnames = [nm for nm in vnames if self.is_state_name(nm) or self.is_control_name(nm)]
+        self._vnames = sorted(vnames)
+        self._fnames = sorted(nm for nm in onames if self.is_defect_name(nm))
+        self._gnames = sorted(nm for nm in onames if self.is_path_constraint_name(nm))
+        self._bnames = sorted(nm for nm in onames if self.is_boundary_constraint_name(nm))
+        self._cnames = sorted(nm for nm in onames if self.is_continuity_constraint_name(nm))
+        self._onames = sorted(nm for nm in onames if nm in prob.driver._objs)
+        onames = self._fnames + self._gnames + self._bnames + self._cnames + self._onames
+
+        # Row indices of each constraint (or objective) within its full output...
+        responses = prob.driver._responses
+        row_indices = {of: meta_indices(responses[of], np.size(prob.get_val(of)))
+                       for of in onames}
+        self._row_slices = {}
+        start = 0
+        for of in onames:
+            size = row_indices[of].size
+            self._row_slices[of] = slice(start, start + size)
+            start += size
+
+        self.row_sq_norms = np.zeros((start, len(self._vnames)))
+        self._num_cols = np.zeros(len(self._vnames))
+        self.num_products = 0
+
+        dvs = prob.driver._designvars
+        column_groups = column_groups or {}
+        strides = _segment_strides(prob, self._vnames) if column_stride == 'auto' else {}
+        for j, wrt in enumerate(self._vnames):
+            full_size = np.size(prob.get_val(wrt))
+            col_indices = meta_indices(dvs[wrt], full_size)
+            self._num_cols[j] = col_indices.size
+            groups = column_groups.get(wrt)
+            if groups is None:
+                stride = strides.get(wrt) if column_stride == 'auto' else column_stride
+                groups = _stride_groups(col_indices.size, stride)
+
+            seed = np.zeros(full_size)
+            for group in groups:
+                seed[:] = 0.0
+                seed[col_indices[group]] = 1.0
+                cols = prob.compute_jacvec_product(of=onames, wrt=[wrt], mode='fwd',
+                                                   seed={wrt: seed})
+                self.num_products += 1
+                count('jacvec_products')
+                for of in onames:
+                    col = np.asarray(cols[of]).ravel()[row_indices[of]]
+                    self.row_sq_norms[self._row_slices[of], j] += col * col
+
+        self._col_sq_sums = self.row_sq_norms.sum(axis=0)
+        self.update_bounds(lbs, ubs)
+
+
+def _segment_strides(prob, vnames):
+    """
+    Derive a safe column stride for each state and control from the grid of its phase.
+
+    Rows couple at most two neighbouring segments, so columns twice the largest number of input
+    nodes per segment apart never share a row.
+    """
+    from autoscaling.core.transfer import phase_grids
+
+    grids = phase_grids(prob)
+    strides = {}
+    for v in vnames:
+        rec = parse_name(v)
+        subset = _NODE_SUBSETS.get(rec.kind)
+        if subset is not None and rec.phase in grids:
+            strides[v] = 2 * max(grids[rec.phase].subset_num_nodes_per_segment[subset])
+    return strides
+
+
+def _stride_groups(num_cols, stride):
+    """
+    Group column positions c, c + stride, c + 2 * stride, ... together (or one per group).
+    """
+    if stride is None or stride >= num_cols:
+        return [[c] for c in range(num_cols)]
+    return [list(range(c, num_cols, stride)) for c in range(stride)]
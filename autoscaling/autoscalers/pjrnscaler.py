@@ -1,89 +1,189 @@
 """Define PJRNScaler class."""
 
-from autoscaling.core.autoscaler import AutoScaler
+import numpy as np
+
+from autoscaling.core.autoscaler import VARIABLE_SCALINGS, AutoScaler, jacobian_variable_refs
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.refstore import RefStore
+from autoscaling.utils.rownorms import column_counts, squared_row_norm_matrix
 
 
 class PJRNScaler(AutoScaler):
     """
     Helper class for automatic scaling of dynamically-constrained optimization problems via the projected jacobian rows normalization (PJRN) method.
 
+    The scaled variables are the states and controls, and optionally the phase times and
+    (opt=True) design parameters. The scaled constraints are the collocation defects, path,
+    boundary and (state, control and control rate) continuity constraints, along with the
+    objectives given explicitly, all of whose rows are normalized according to the PJRN formula.
+
+    Times and design parameters are only scaled if scale_times_and_parameters is True. Their
+    columns then enter the row norms too, which changes the reference values of the constraints
+    on problems whose jacobian includes them (e.g. the defect_refs of the brachistochrone's v
+    defects grow from about [7.7, 11.9, 13.5] to about [72.9, 67.2, 55.7] once the t_duration
+    column is included), so by default only the states and controls are taken into account.
+
     Attributes
     ----------
-    refs : dict
+    refs : RefStore
         Maps a variable's global name to its ref value.
-    ref0s : dict
+    ref0s : RefStore
         Maps a variable's global name to its ref0 value.
-    defect_refs : dict
+    defect_refs : RefStore
         Maps a variable's defect's global name to its defect_ref value.
+    row_sq_norms : ndarray
+        Rows x variables matrix whose (i, j) entry is the squared norm of row i of the jacobian of the defect, path, boundary and continuity constraints and the objective with respect to the j-th scaled variable. Does not depend on the bounds.
+    variable_scaling : str
+        How the refs and ref0s of states and controls are derived ('bounds' or 'jacobian').
     """
 
-    def initialize(self, jac, lbs, ubs):
+    # Part of the cache key; bump whenever the computed reference values change...
+    algorithm_version = 4
+
+    def initialize(self, jac, lbs, ubs, variable_scaling='bounds', objectives=None,
+                   scale_times_and_parameters=False):
         """
         Initialize, using the given variable bounds and jacobian information.
 
         Parameters
         ----------
         jac : dict
-            Jacobian information from which global variable, constraint names are parsed. Must be compatible with the Dymos problem at hand.
+            Jacobian information from which global variable, constraint names are parsed. Must be compatible with the Dymos problem at hand. Sub-blocks may be dense arrays or scipy.sparse matrices (CSR, CSC, COO).
+        lbs : dict
+            Maps a global variable (not a constraint) name to its lower bound.
+        ubs : dict
+            Maps a global variable (not a constraint) name to its upper bound.
+        variable_scaling : str
+            If 'bounds', the refs and ref0s of the variables are their upper and lower bounds
+            wherever these are finite and distinct, and are derived from the jacobian as below
+            for the others (e.g. unbounded states, fixed initial times). If 'jacobian', their
+            ranges (ref - ref0) are the inverse root mean square column norms of the jacobian
+            with respect to them, so they do not depend on loose or missing bounds (see
+            jacobian_variable_refs()).
+        objectives : iterable of str or None
+            Global names of the objectives whose rows are scaled, e.g. objective_names(prob).
+            Objectives cannot be told apart from other responses by name, so if None, no
+            objective is scaled.
+        scale_times_and_parameters : bool
+            If True, the phase times and design parameters are scaled too, and their columns
+            enter the row norms of the constraints. If False, they are left as they are and the
+            reference values are those computed from the states and controls alone.
+        """
+        assert(variable_scaling in VARIABLE_SCALINGS), \
+            'variable_scaling must be one of {0}.'.format(VARIABLE_SCALINGS)
+        self.variable_scaling = variable_scaling
+
+        self._prepare(jac, objectives, scale_times_and_parameters)
+        self.update_bounds(lbs, ubs)
+
+    def _prepare(self, jac, objectives=None, scale_times_and_parameters=False):
+        """
+        Parse the names from the given jacobian and compute its squared row norms and column statistics.
+        """
+        # Parse global names of states, (dynamic) controls, optionally
+        # times and design parameters, collocation defect constraints,
+        # path, boundary and continuity constraints, and objectives from
+        # total jacobian dict keys...
+        with stage('parse_names'):
+            self._vnames = sorted(self._parse_vnames_from(jac, scale_times_and_parameters))
+            self._fnames = sorted(self._parse_fnames_from(jac))
+            self._gnames = sorted(self._parse_gnames_from(jac))
+            self._bnames = sorted(self._parse_bnames_from(jac))
+            self._cnames = sorted(self._parse_cnames_from(jac))
+            self._onames = sorted(self._parse_objective_names_from(jac, objectives))
+        ofs = self._fnames + self._gnames + self._bnames + self._cnames + self._onames
+
+        # The squared norms of the rows of each jac[of, v] block do not
+        # depend on the bounds, so compute them once and keep them...
+        with stage('row_norms'):
+            self.row_sq_norms, self._row_slices = squared_row_norm_matrix(jac, ofs, self._vnames)
+            self._col_sq_sums = self.row_sq_norms.sum(axis=0)
+            self._num_cols = column_counts(jac, ofs, self._vnames)
+
+    def update_bounds(self, lbs, ubs):
+        """
+        Recompute all reference values for new variable bounds, reusing the stored jacobian row norms.
+
+        Only a single matrix-vector product is needed, so sweeping over bounds is cheap. The
+        refs, ref0s and defect_refs stores are replaced rather than overwritten, so values read
+        from them before the update are left as they were. A RuntimeError is raised if the
+        row norms are not available, i.e. if the scaler was loaded from a cache.
+
+        Parameters
+        ----------
         lbs : dict
             Maps a global variable (not a constraint) name to its lower bound.
         ubs : dict
             Maps a global variable (not a constraint) name to its upper bound.
         """
-        # Parse global names of states, (dynamic) controls,
-        # collocation defect constraints, and path constraints
-        # from total jacobian dict keys...
-        vnames = self._parse_vnames_from(jac)
-        fnames = self._parse_fnames_from(jac)
-        gnames = self._parse_gnames_from(jac)
+        if not hasattr(self, 'row_sq_norms'):
+            raise RuntimeError('update_bounds() needs the jacobian row norms computed by '
+                               'initialize(), but this {0} was loaded from a cache or created '
+                               'with from_refs(), which only restore the reference values. '
+                               'Create it without a cache to update its bounds.'.format(
+                                   type(self).__name__))
+
+        with stage('update_bounds'):
+            vref0s, vrefs = self._variable_refs(lbs, ubs)
+            K_inv = self._row_refs(vrefs - vref0s)
+
+            # Set refs, ref0s, defect_refs. The refs and defect_refs share one
+            # array holding K_inv followed by the variable refs...
+            refs_slices, ref0s_slices, defect_slices = self._layout()
+            data = np.concatenate((K_inv, vrefs))
+            self.refs = RefStore.from_array(data, refs_slices)
+            self.ref0s = RefStore.from_array(
+                np.concatenate((vref0s, np.zeros(len(ref0s_slices) - len(vref0s)))),
+                ref0s_slices)
+            self.defect_refs = RefStore.from_array(data, defect_slices)
+
+    def _variable_refs(self, lbs, ubs):
+        """
+        Compute the ref0s and refs of the variables, in _vnames order, for the given bounds.
+        """
+        if self.variable_scaling == 'jacobian':
+            return jacobian_variable_refs(self._col_sq_sums, self._num_cols, self._vnames,
+                                          lbs, ubs)
+
+        # Bounds are used wherever they are finite and distinct. Times, design
+        # parameters and unbounded states and controls (whose bounds OpenMDAO
+        # reports as +/-INF_BOUND) fall back to the column norms...
+        return jacobian_variable_refs(self._col_sq_sums, self._num_cols, self._vnames, lbs, ubs,
+                                      prefer_bounds=True)
+
+    def _row_refs(self, Kv_inv):
+        """
+        Compute the PJRN reference value of every constraint and objective row for the given variable ranges.
 
+        Kv_inv may also be a 2-D array holding the variable ranges of several variants, one per
+        row, in which case one row of reference values is returned per variant.
+        """
         # Calculate diagonals of scaling matrix inverses for
-        # variables, defect constraints, and path constraints,
-        # according to the PJRN defining formulae...
-        Kv_inv = {v: ubs[v] - lbs[v] for v in vnames}
-
-        Kf_inv = {}
-        for f in fnames:
-            Kf_inv[f] = []
-            nn = len(jac[f, list(vnames)[0]])
-            for nd in range(nn):
-                norm = 0
-                for v in vnames:
-                    subrow = jac[f, v][nd]
-                    sum = 0
-                    for el in subrow:
-                        sum += el * el
-                    norm += sum * Kv_inv[v]**2
-                norm = norm ** 0.5
-                Kf_inv[f].append(norm)
-
-        Kg_inv = {}
-        for g in gnames:
-            Kg_inv[g] = []
-            nn = len(jac[g, list(vnames)[0]])
-            for nd in range(nn):
-                norm = 0
-                for v in vnames:
-                    subrow = jac[g, v][nd]
-                    sum = 0
-                    for el in subrow:
-                        sum += el * el
-                    norm += sum * Kv_inv[v]**2
-                norm = norm ** 0.5
-                Kg_inv[g].append(norm)
-
-        # Set refs, ref0s, defect_refs...
-        for nm in vnames:
-            self.refs[nm] = ubs[nm]
-            self.ref0s[nm] = lbs[nm]
-        for nm in fnames:
-            self.defect_refs[nm] = Kf_inv[nm]
-        for nm in gnames:
-            self.refs[nm] = Kg_inv[nm]
-            self.ref0s[nm] = 0
+        # constraints, according to the PJRN defining formulae...
+        K_inv = np.sqrt(np.dot(Kv_inv**2, self.row_sq_norms.T))
+
+        # Rows that depend on none of the variables cannot be normalized...
+        K_inv[K_inv == 0.0] = 1.0
+        return K_inv
+
+    def _layout(self):
+        """
+        Get the slices of the refs, ref0s and defect_refs stores into their backing arrays.
+
+        The refs and defect_refs share one array holding the row reference values followed by
+        the variable refs; the ref0s array holds the variable ref0s followed by one zero per
+        non-defect row name.
+        """
+        num_rows = self.row_sq_norms.shape[0]
+        rnames = self._gnames + self._bnames + self._cnames + self._onames
+        refs_slices = {nm: num_rows + j for j, nm in enumerate(self._vnames)}
+        refs_slices.update((nm, self._row_slices[nm]) for nm in rnames)
+        ref0s_slices = {nm: j for j, nm in enumerate(self._vnames + rnames)}
+        defect_slices = {nm: self._row_slices[nm] for nm in self._fnames}
+        return refs_slices, ref0s_slices, defect_slices
 
     @staticmethod
-    def _parse_vnames_from(jac):
+    def _parse_vnames_from(jac, times_and_parameters=False):
         """
         Parse global variable names from given jacobian information.
 
@@ -91,6 +191,9 @@ class PJRNScaler(AutoScaler):
         ----------
         jac : dict
             Jacobian information.
+        times_and_parameters : bool
+            If True, the phase times and design parameters are parsed along with the states
+            and controls.
         """
         vnames = set()
         for of, wrt in jac:
@@ -98,6 +201,10 @@ class PJRNScaler(AutoScaler):
                 vnames.add(wrt)
             elif PJRNScaler.is_control_name(wrt):
                 vnames.add(wrt)
+            elif times_and_parameters and PJRNScaler.is_time_name(wrt):
+                vnames.add(wrt)
+            elif times_and_parameters and PJRNScaler.is_design_parameter_name(wrt):
+                vnames.add(wrt)
         return vnames
 
     @staticmethod
@@ -131,3 +238,35 @@ class PJRNScaler(AutoScaler):
             if PJRNScaler.is_path_constraint_name(of):
                 gnames.add(of)
         return gnames
+
+    @staticmethod
+    def _parse_bnames_from(jac):
+        """
+        Parse global initial and final boundary constraint names from given jacobian information.
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information.
+        """
+        bnames = set()
+        for of, wrt in jac:
+            if PJRNScaler.is_boundary_constraint_name(of):
+                bnames.add(of)
+        return bnames
+
+    @staticmethod
+    def _parse_cnames_from(jac):
+        """
+        Parse global state, control and control rate continuity constraint names from given jacobian information.
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information.
+        """
+        cnames = set()
+        for of, wrt in jac:
+            if PJRNScaler.is_continuity_constraint_name(of):
+                cnames.add(of)
+        return cnames
@@ -0,0 +1,104 @@
+"""Define RuizScaler class."""
+
+import numpy as np
+
+from autoscaling.core.autoscaler import INFINITE_BOUND, AutoScaler
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.names import CONTROL, DEFECT, PATH, STATE, KeyIndex
+from autoscaling.utils.rownorms import row_max_abs_matrix
+
+
+class RuizScaler(AutoScaler):
+    """
+    Helper class for automatic scaling of dynamically-constrained optimization problems via Ruiz equilibration.
+
+    The jacobian of the collocation defect and path constraints with respect to the states and
+    controls is scaled as diag(r) J diag(c), and the row scaling r and column scaling c are
+    repeatedly divided by the square roots of the row and column infinity norms of the scaled
+    jacobian, until all of them are within tol of one. Since Dymos applies a single ref to all
+    nodes of a state or control, column scaling is uniform within each variable, so only the
+    largest entry of every row of every jac[of, v] block is needed, and the iteration runs on a
+    small rows x variables matrix. Column scaling starts from the variable ranges (where bounds
+    are finite), as in PJRN.
+
+    The defect_refs and path constraint refs are 1 / r. The variable ref0s are the lower bounds
+    (zero where there are none), and the refs are ref0s + c.
+
+    Attributes
+    ----------
+    refs : RefStore
+        Maps a variable's global name to its ref value.
+    ref0s : RefStore
+        Maps a variable's global name to its ref0 value.
+    defect_refs : RefStore
+        Maps a variable's defect's global name to its defect_ref value.
+    num_iterations : int
+        Number of equilibration sweeps performed.
+    converged : bool
+        True if all row and column infinity norms are within tol of one.
+    """
+
+    def initialize(self, jac, lbs, ubs, max_iter=100, tol=1e-2):
+        """
+        Initialize, using the given variable bounds and jacobian information.
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information from which global variable, constraint names are parsed. Must be compatible with the Dymos problem at hand. Sub-blocks may be dense arrays or scipy.sparse matrices (CSR, CSC, COO).
+        lbs : dict
+            Maps a global variable (not a constraint) name to its lower bound.
+        ubs : dict
+            Maps a global variable (not a constraint) name to its upper bound.
+        max_iter : int
+            Maximum number of equilibration sweeps.
+        tol : float
+            Convergence tolerance on the deviation of the row and column infinity norms from one.
+        """
+        with stage('parse_names'):
+            keys = KeyIndex.from_jac(jac)
+            vnames = sorted(keys.names(STATE, CONTROL))
+            fnames = sorted(keys.names(DEFECT))
+            gnames = sorted(keys.names(PATH))
+
+        with stage('row_norms'):
+            M, row_slices = row_max_abs_matrix(jac, fnames + gnames, vnames)
+
+        lb = np.array([lbs[v] for v in vnames], dtype=float)
+        ub = np.array([ubs[v] for v in vnames], dtype=float)
+        lb_finite = np.abs(lb) < INFINITE_BOUND
+        ub_finite = np.abs(ub) < INFINITE_BOUND
+        span = ub - lb
+        c = np.where(lb_finite & ub_finite & (span > 0), span, 1.0)
+        r = np.ones(M.shape[0])
+
+        # Rows and columns that are entirely zero cannot be equilibrated...
+        live_rows = M.max(axis=1, initial=0.0) > 0
+        live_cols = M.max(axis=0, initial=0.0) > 0
+
+        with stage('equilibrate'):
+            self.converged = False
+            self.num_iterations = 0
+            for _ in range(max_iter):
+                S = M * r[:, np.newaxis] * c
+                row_norms = S.max(axis=1, initial=0.0)[live_rows]
+                col_norms = S.max(axis=0, initial=0.0)[live_cols]
+                if (np.all(np.abs(row_norms - 1.0) <= tol) and
+                        np.all(np.abs(col_norms - 1.0) <= tol)):
+                    self.converged = True
+                    break
+                r[live_rows] /= np.sqrt(row_norms)
+                c[live_cols] /= np.sqrt(col_norms)
+                self.num_iterations += 1
+
+        # Set refs, ref0s, defect_refs...
+        ref0 = np.where(lb_finite, lb, 0.0)
+        K_inv = 1.0 / r
+        for j, nm in enumerate(vnames):
+            self.refs[nm] = ref0[j] + c[j]
+            self.ref0s[nm] = ref0[j]
+        for nm in fnames:
+            self.defect_refs[nm] = K_inv[row_slices[nm]]
+        for nm in gnames:
+            self.refs[nm] = K_inv[row_slices[nm]]
+            self.ref0s[nm] = 0
@@ -0,0 +1,184 @@
+"""Define SketchPJRNScaler class."""
+
+from statistics import NormalDist
+
+import numpy as np
+
+from autoscaling.core.autoscaler import AutoScaler, bounded_variables
+from autoscaling.core.instrumentation import count
+
+
+class SketchPJRNScaler(AutoScaler):
+    """
+    Helper class for approximate PJRN automatic scaling from a randomized sketch of the jacobian.
+
+    The PJRN reference value of constraint row i is sigma_i = ||row_i(J W)||, where W is the
+    diagonal matrix of variable ranges. For a Gaussian probe z, the i-th entry of J W z is
+    normally distributed with variance sigma_i^2, so sigma_i is estimated from the root mean
+    square of that entry over num_probes independent probes. Each probe costs a single
+    forward-mode jacobian-vector product on the live Problem, regardless of the problem size.
+
+    Since the sum of squares of num_probes such entries is exactly sigma_i^2 times a chi-squared
+    variable with num_probes degrees of freedom, the relative error of each estimate is bounded
+    by error_bound with probability confidence, independently of the jacobian. This holds for
+    each row on its own (marginally): over many rows, some are expected to fall outside the
+    bound. With simultaneous=True, the bound is widened by a union bound over all rows, so that
+    every estimate is within it at once with probability at least confidence.
+
+    Attributes
+    ----------
+    refs : RefStore
+        Maps a variable's global name to its ref value.
+    ref0s : RefStore
+        Maps a variable's global name to its ref0 value.
+    defect_refs : RefStore
+        Maps a variable's defect's global name to its defect_ref value.
+    num_probes : int
+        Number of random probes used.
+    num_products : int
+        Number of jacobian-vector products computed (one per probe).
+    confidence : float
+        Probability with which each estimated reference value (or, if simultaneous, all of them
+        at once) is within error_bound of exact.
+    error_bound : float
+        Relative error bound of the estimated defect_refs and path or continuity constraint refs at the given confidence.
+    simultaneous : bool
+        True if error_bound holds for all estimates at once rather than for each on its own.
+    """
+
+    def initialize(self, prob, lbs=None, ubs=None, num_probes=16, seed=None, confidence=0.95,
+                   run_model=True, simultaneous=False):
+        """
+        Initialize, using the given variable bounds and random jacobian-vector products of the given problem.
+
+        Parameters
+        ----------
+        prob : Problem
+            Problem that has already been set up.
+        lbs : dict or None
+            Maps a global variable (not a constraint) name to its lower bound. Defaults to the bounds in the driver's design variable metadata. Every state and control must have finite, distinct bounds, or a ValueError is raised.
+        ubs : dict or None
+            Maps a global variable (not a constraint) name to its upper bound. Defaults to the bounds in the driver's design variable metadata.
+        num_probes : int
+            Number of random probe vectors. The error bound shrinks roughly as 1 / sqrt(num_probes).
+        seed : int or None
+            Seed of the random number generator, for reproducible estimates.
+        confidence : float
+            Confidence level (between 0 and 1) of the reported error_bound.
+        run_model : bool
+            If True, run the model first so that the products are evaluated at the current point.
+        simultaneous : bool
+            If True, error_bound holds for all rows at once (via a union bound over the rows)
+            rather than for each row on its own.
+        """
+        from autoscaling.utils.utils import design_var_bounds, meta_indices, scaling_names
+
+        assert(num_probes >= 1)
+        assert(0.0 < confidence < 1.0)
+
+        if run_model:
+            prob.run_model()
+        else:
+            prob.final_setup()
+
+        onames, vnames = scaling_names(prob)
+        if lbs is None or ubs is None:
+            dv_lbs, dv_ubs = design_var_bounds(prob)
+            lbs = dv_lbs if lbs is None else lbs
+            ubs = dv_ubs if ubs is None else ubs
+
+        # Only the states and controls are sketched, since times and design parameters
+        # often have missing bounds...
+        vnames = [nm for nm in vnames if self.is_state_name(nm) or self.is_control_name(nm)]
+        fnames = [nm for nm in onames if self.is_defect_name(nm)]
+        gnames = [nm for nm in onames
+                  if self.is_path_constraint_name(nm) or self.is_continuity_constraint_name(nm)]
+        onames = fnames + gnames
+
+        # The probes are weighted by the variable ranges before any jacobian information is
+        # known, so there is nothing to fall back to for variables without usable bounds...
+        unbounded = [v for v, ok in zip(vnames, bounded_variables(vnames, lbs, ubs)) if not ok]
+        if unbounded:
+            raise ValueError('SketchPJRNScaler needs finite, distinct bounds for every state and '
+                             'control, but {0} have none. Pass lbs and ubs explicitly, or use '
+                             'PJRNScaler or MatrixFreePJRNScaler, which fall back to the jacobian '
+                             'column norms.'.format(', '.join(unbounded)))
+
+        cons = prob.driver._cons
+        dvs = prob.driver._designvars
+        row_indices = {of: meta_indices(cons[of], np.size(prob.get_val(of))) for of in onames}
+        col_indices = {}
+        full_sizes = {}
+        for v in vnames:
+            full_sizes[v] = np.size(prob.get_val(v))
+            col_indices[v] = meta_indices(dvs[v], full_sizes[v])
+        Kv_inv = {v: ubs[v] - lbs[v] for v in vnames}
+
+        # Accumulate the squares of the entries of J W z over all probes...
+        rng = np.random.RandomState(seed)
+        sq_sums = {of: np.zeros(row_indices[of].size) for of in onames}
+        self.num_products = 0
+        for _ in range(num_probes):
+            seeds = {}
+            for v in vnames:
+                seeds[v] = np.zeros(full_sizes[v])
+                seeds[v][col_indices[v]] = Kv_inv[v] * rng.standard_normal(col_indices[v].size)
+            prods = prob.compute_jacvec_product(of=onames, wrt=vnames, mode='fwd', seed=seeds)
+            self.num_products += 1
+            count('jacvec_products')
+            for of in onames:
+                prod = np.asarray(prods[of]).ravel()[row_indices[of]]
+                sq_sums[of] += prod * prod
+
+        self.num_probes = num_probes
+        self.confidence = confidence
+        self.simultaneous = simultaneous
+        num_rows = sum(row_indices[of].size for of in onames)
+        self.error_bound = sketch_error_bound(num_probes, confidence,
+                                              num_rows=num_rows if simultaneous else 1)
+
+        # Set refs, ref0s, defect_refs...
+        for nm in vnames:
+            self.refs[nm] = ubs[nm]
+            self.ref0s[nm] = lbs[nm]
+        for nm in fnames:
+            self.defect_refs[nm] = np.sqrt(sq_sums[nm] / num_probes)
+        for nm in gnames:
+            self.refs[nm] = np.sqrt(sq_sums[nm] / num_probes)
+            self.ref0s[nm] = 0
+
+
+def sketch_error_bound(num_probes, confidence=0.95, num_rows=1):
+    """
+    Compute the relative error bound of Gaussian sketch estimates of row norms.
+
+    With k probes, estimate / exact is distributed as sqrt(chi2_k / k). The returned bound is the
+    largest deviation from 1 over the central interval holding the given probability. For more
+    than one row, the probability that any estimate falls outside is split evenly among them
+    (a union bound), so the bound holds for all of them at once. Quantiles of chi2_k are
+    computed with the Wilson-Hilferty approximation, so scipy is not needed.
+
+    Parameters
+    ----------
+    num_probes : int
+        Number of probes.
+    confidence : float
+        Probability (between 0 and 1) covered by the bound.
+    num_rows : int
+        Number of estimates the bound must hold for simultaneously.
+
+    Returns
+    -------
+    float
+        Relative error bound.
+    """
+    k = float(num_probes)
+    alpha = 0.5 * (1.0 - confidence) / max(num_rows, 1)
+
+    def chi2_ppf_over_k(p):
+        z = NormalDist().inv_cdf(p)
+        return max(1.0 - 2.0 / (9.0 * k) + z * (2.0 / (9.0 * k))**0.5, 0.0)**3
+
+    lo = chi2_ppf_over_k(alpha)**0.5
+    hi = chi2_ppf_over_k(1.0 - alpha)**0.5
+    return max(1.0 - lo, hi - 1.0)
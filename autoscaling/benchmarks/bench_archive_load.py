@@ -0,0 +1,103 @@
+"""Benchmark load time and peak RSS of pickled versus memory-mapped archived scaling information."""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from synthetic import make_jac_info
+from autoscaling.utils.archive import save_archive
+
+# Each measurement runs in a fresh interpreter so that peak RSS is not
+# polluted by the other format (or by building the synthetic jacobian).
+# ru_maxrss survives exec() on Linux, so the high-water mark is read from
+# /proc instead where available...
+PEAK_RSS = """
+import resource
+def peak_rss():
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+"""
+
+LOAD_PICKLE = """
+import pickle, time
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+t0 = time.perf_counter()
+with open({path!r}, 'rb') as file:
+    jac, lbs, ubs = pickle.load(file)
+t_load = time.perf_counter() - t0
+rss_load = peak_rss()
+PJRNScaler(jac, lbs, ubs)
+t_total = time.perf_counter() - t0
+print(t_load, t_total, rss_load, peak_rss())
+"""
+
+LOAD_ARCHIVE = """
+import time
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.utils.archive import load_archive
+t0 = time.perf_counter()
+jac, lbs, ubs = load_archive({path!r})
+t_load = time.perf_counter() - t0
+rss_load = peak_rss()
+PJRNScaler(jac, lbs, ubs)
+t_total = time.perf_counter() - t0
+print(t_load, t_total, rss_load, peak_rss())
+"""
+
+BASELINE = """
+import autoscaling.autoscalers.pjrnscaler
+import autoscaling.utils.archive
+print(0, 0, peak_rss(), peak_rss())
+"""
+
+
+def _measure(script, **kwargs):
+    out = subprocess.check_output([sys.executable, '-c', PEAK_RSS + script.format(**kwargs)])
+    t_load, t_total, rss_load, rss_total = out.split()
+    return float(t_load), float(t_total), int(rss_load) / 1024.0, int(rss_total) / 1024.0
+
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        _, _, _, base_rss = _measure(BASELINE)
+        print('{0:>9} {1:>7} {2:>7} {3:>10} {4:>9} {5:>9} {6:>15} {7:>15}'.format(
+            'segments', 'format', 'blocks', 'file [MB]', 'load [s]', 'PJRN [s]',
+            'RSS load [MB]', 'RSS total [MB]'))
+        for num_seg in (100, 200, 400):
+            for sparse in (None, 'csr'):
+                jac, lbs, ubs = make_jac_info(num_segments=num_seg, sparse=sparse)
+                pkl = os.path.join(tmp, 'info.pickle')
+                arc = os.path.join(tmp, 'info.asarc')
+                with open(pkl, 'wb') as file:
+                    pickle.dump((jac, lbs, ubs), file, protocol=pickle.HIGHEST_PROTOCOL)
+                save_archive(arc, jac, lbs, ubs)
+                del jac
+
+                for fmt, path, script in (('pickle', pkl, LOAD_PICKLE),
+                                          ('archive', arc, LOAD_ARCHIVE)):
+                    t_load, t_total, rss_load, rss = _measure(script, path=path)
+                    size = os.path.getsize(path) / 1e6
+                    print('{0:>9d} {1:>7} {2:>7} {3:>10.2f} {4:>9.4f} {5:>9.4f} {6:>15.1f} '
+                          '{7:>15.1f}'.format(num_seg, fmt, sparse or 'dense', size, t_load,
+                                              t_total - t_load, rss_load - base_rss,
+                                              rss - base_rss))
+                    results.append({'num_segments': num_seg, 'format': fmt,
+                                    'blocks': sparse or 'dense', 'file_mb': size,
+                                    'load_s': t_load, 'pjrn_s': t_total - t_load,
+                                    'peak_rss_load_mb': rss_load - base_rss,
+                                    'peak_rss_mb': rss - base_rss})
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(main(), indent=1))
@@ -0,0 +1,96 @@
+"""Benchmark ScalingBatch against independent PJRNScaler instances over a sweep of problem variants.
+
+Computing the reference values is timed on synthetic jacobians. Applying them to the variants is
+timed on brachistochrone problems, in place (the default) and with a setup() per variant.
+"""
+
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.core.batch import ScalingBatch
+
+
+def _check(batch, scalers):
+    for sc, ref in zip(batch, scalers):
+        for refs, ref_refs in ((sc.refs, ref.refs), (sc.ref0s, ref.ref0s),
+                               (sc.defect_refs, ref.defect_refs)):
+            assert(set(refs) == set(ref_refs))
+            for nm in refs:
+                assert(np.allclose(refs[nm], ref_refs[nm], rtol=1e-13))
+
+
+def main(num_segments=100, num_variants=100):
+    jac, lbs, ubs = make_jac_info(num_segments=num_segments, sparse='csr')
+    rng = np.random.RandomState(1)
+
+    # Bounds-only variants share one jacobian; parameter variants (e.g. a different payload
+    # mass) change its values too...
+    bounds = [{nm: ub * rng.uniform(0.5, 2.0) for nm, ub in ubs.items()}
+              for _ in range(num_variants)]
+    jacs = []
+    for _ in range(num_variants):
+        factor = rng.uniform(0.5, 2.0)
+        jacs.append({key: block * factor for key, block in jac.items()})
+
+    print('{0} variants, {1} segments'.format(num_variants, num_segments))
+    print('{0:>12} {1:>16} {2:>16}'.format('variants', 'independent [s]', 'batch [s]'))
+    for label, args in (('bounds', (jac, lbs, bounds)), ('parameters', (jacs, lbs, ubs))):
+        t0 = time.perf_counter()
+        scalers = [PJRNScaler(j, lb, ub) for j, lb, ub in zip(
+            *[a if isinstance(a, list) else [a] * num_variants for a in args])]
+        t_independent = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = ScalingBatch(*args)
+        list(batch)
+        t_batch = time.perf_counter() - t0
+
+        _check(batch, scalers)
+        print('{0:>12} {1:>16.4f} {2:>16.4f}'.format(label, t_independent, t_batch))
+
+    bench_apply()
+
+
+def bench_apply(num_segments=20, num_variants=10):
+    """
+    Time ScalingBatch.apply() on brachistochrone variants with different control bounds.
+
+    Parameters
+    ----------
+    num_segments : int
+        Number of segments of each problem.
+    num_variants : int
+        Number of variants.
+    """
+    from bench_inplace_autoscale import make_problem, set_initial_guess
+    from autoscaling.utils.utils import capture_scaling_info
+
+    probs = []
+    for _ in range(num_variants):
+        prob, phase = make_problem(num_segments)
+        prob.setup()
+        set_initial_guess(prob, phase)
+        probs.append(prob)
+    jac, lbs, ubs = capture_scaling_info(probs[0])
+    bounds = [{nm: ub * (1.0 + n / num_variants) for nm, ub in ubs.items()}
+              for n in range(num_variants)]
+
+    t0 = time.perf_counter()
+    batch = ScalingBatch(jac, lbs, bounds)
+    t_batch = time.perf_counter() - t0
+
+    print('{0} brachistochrone variants, {1} segments'.format(num_variants, num_segments))
+    print('{0:>22} {1:>12} {2:>16}'.format('stage', 'time [s]', 'per variant [s]'))
+    print('{0:>22} {1:>12.4f} {2:>16.6f}'.format('stacked computation', t_batch,
+                                                  t_batch / num_variants))
+    for label, setup in (('apply, in place', False), ('apply, setup', True)):
+        t0 = time.perf_counter()
+        batch.apply(probs, setup=setup)
+        elapsed = time.perf_counter() - t0
+        print('{0:>22} {1:>12.4f} {2:>16.6f}'.format(label, elapsed, elapsed / num_variants))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark a sweep over variable bounds: full PJRNScaler reinitialization versus update_bounds()."""
+
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+
+
+def main(num_segments=100, num_variants=100):
+    jac, lbs, ubs = make_jac_info(num_segments=num_segments)
+    rng = np.random.RandomState(1)
+    variants = [{nm: ub * rng.uniform(0.5, 2.0) for nm, ub in ubs.items()}
+                for _ in range(num_variants)]
+
+    t0 = time.perf_counter()
+    full = [PJRNScaler(jac, lbs, variant) for variant in variants]
+    t_full = time.perf_counter() - t0
+
+    sc = PJRNScaler(jac, lbs, ubs)
+    updated = []
+    t0 = time.perf_counter()
+    for variant in variants:
+        sc.update_bounds(lbs, variant)
+        updated.append(dict(sc.defect_refs))
+    t_update = time.perf_counter() - t0
+
+    for defect_refs, ref in zip(updated, full):
+        for nm in ref.defect_refs:
+            assert(np.allclose(defect_refs[nm], ref.defect_refs[nm], rtol=1e-14))
+
+    print('{0} bound variants, {1} segments'.format(num_variants, num_segments))
+    print('reinitialize:  {0:.4f} s ({1:.2e} s per variant)'.format(t_full, t_full / num_variants))
+    print('update_bounds: {0:.4f} s ({1:.2e} s per variant)'.format(t_update,
+                                                                   t_update / num_variants))
+
+
+if __name__ == '__main__':
+    main()
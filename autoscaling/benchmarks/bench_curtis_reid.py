@@ -0,0 +1,106 @@
+"""Benchmark the Curtis-Reid scaler: log-space spread of the scaled jacobian entries, and LSMR cost versus mesh size.
+
+The synthetic problems show the cost versus mesh size. The brachistochrone, captured from Dymos
+with each transcription, checks the scaling of a real jacobian, whose round-off entries (e.g.
+1e-20 where a derivative vanishes) must not pull the fit towards them.
+"""
+
+import time
+
+import numpy as np
+import scipy.sparse
+from bench_ruiz import make_badly_scaled, norm_spread
+from autoscaling.autoscalers.curtisreidscaler import CurtisReidScaler
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.autoscalers.ruizscaler import RuizScaler
+from autoscaling.core.names import CONTROL, DEFECT, PATH, STATE, KeyIndex
+
+SCALERS = (('none', None), ('pjrn', PJRNScaler), ('ruiz', RuizScaler),
+           ('curtis-reid', CurtisReidScaler))
+
+
+def log_spread(jac, sc):
+    """
+    Compute the root mean square of log10|a| over the nonzero entries a of the jacobian scaled by sc.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information. Blocks may be dense or scipy.sparse.
+    sc : AutoScaler or None
+        Autoscaler, or None for the unscaled jacobian.
+
+    Returns
+    -------
+    float
+        Root mean square of the log10 magnitudes of the scaled entries (0 if they are all one).
+    """
+    keys = KeyIndex.from_jac(jac)
+    total = 0.0
+    count = 0
+    for of in keys.names(DEFECT, PATH):
+        for wrt in keys.names(STATE, CONTROL):
+            block = scipy.sparse.coo_matrix(jac[of, wrt])
+            logs = np.log10(np.abs(block.data[block.data != 0]))
+            rows = block.row[block.data != 0]
+            if sc is not None:
+                row_refs = sc.defect_refs[of] if of in sc.defect_refs else sc.refs[of]
+                logs = logs - np.log10(row_refs)[rows] + np.log10(sc.refs[wrt] - sc.ref0s[wrt])
+            total += np.sum(logs**2)
+            count += logs.size
+    return np.sqrt(total / count)
+
+
+def bench_brach(num_segments=20, transcriptions=('gauss-lobatto', 'radau')):
+    """
+    Compare the scalers on the jacobian of the brachistochrone captured from Dymos.
+
+    Parameters
+    ----------
+    num_segments : int
+        Number of segments.
+    transcriptions : tuple of str
+        Transcriptions to capture the jacobian with ('gauss-lobatto' or 'radau').
+    """
+    import dymos as dm
+    from bench_inplace_autoscale import make_problem, set_initial_guess
+    from autoscaling.utils.utils import capture_scaling_info
+
+    print('{0:>14} {1:>12} {2:>12} {3:>12} {4:>12} {5:>12}'.format(
+        'transcription', 'scaler', 'rms log10', 'row spread', 'col spread', 'th ref'))
+    for transcription in transcriptions:
+        tx_class = dm.GaussLobatto if transcription == 'gauss-lobatto' else dm.Radau
+        prob, phase = make_problem(num_segments, transcription=tx_class(num_segments=num_segments))
+        prob.setup()
+        set_initial_guess(prob, phase)
+        jac, lbs, ubs = capture_scaling_info(prob)
+        th = KeyIndex.from_jac(jac).find(CONTROL, 'th')
+        for name, cls in SCALERS:
+            sc = cls(jac, lbs, ubs) if cls is not None else None
+            row_spread, col_spread = norm_spread(jac, sc)
+            th_ref = sc.refs[th] if sc is not None else float('nan')
+            print('{0:>14} {1:>12} {2:12.3f} {3:12.3e} {4:12.3e} {5:12.4g}'.format(
+                transcription, name, log_spread(jac, sc), row_spread, col_spread, th_ref))
+
+
+def main(segments=(100, 1000, 3000)):
+    print('{0:>9} {1:>12} {2:>12} {3:>12} {4:>12} {5:>10}'.format(
+        'segments', 'scaler', 'rms log10', 'row spread', 'col spread', 'time (s)'))
+    for num_seg in segments:
+        jac, lbs, ubs = make_badly_scaled(num_segments=num_seg, sparse='csr')
+        for name, cls in SCALERS:
+            t0 = time.perf_counter()
+            sc = cls(jac, lbs, ubs) if cls is not None else None
+            elapsed = time.perf_counter() - t0
+            row_spread, col_spread = norm_spread(jac, sc)
+            print('{0:>9} {1:>12} {2:12.3f} {3:12.3e} {4:12.3e} {5:10.4f}'.format(
+                num_seg, name, log_spread(jac, sc), row_spread, col_spread, elapsed))
+            if cls is CurtisReidScaler:
+                print('{0:>9} {1:>12} {2} LSMR iterations, converged: {3}'.format(
+                    '', '', sc.num_iterations, sc.converged))
+
+    bench_brach()
+
+
+if __name__ == '__main__':
+    main()
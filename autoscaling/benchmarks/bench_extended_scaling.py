@@ -0,0 +1,76 @@
+"""Benchmark PJRN scaling of times, design parameters, boundary and continuity constraints and the objective.
+
+The scaled jacobian of a synthetic problem including phase times, an unbounded design parameter,
+final boundary constraints, continuity constraints and an objective is compared with the one
+obtained when, as before, only the states, controls, defects and path constraints are scaled. The spread (largest over
+smallest) of the row and column infinity norms is reported for each.
+"""
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.utils.rownorms import row_max_abs_matrix
+
+
+def scaled_spreads(jac, refs, ref0s, defect_refs):
+    """
+    Compute the spread of the row and column infinity norms of the jacobian, scaled with the given reference values.
+
+    Rows and columns without reference values are left unscaled.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information.
+    refs : Mapping
+        Maps a global name to its ref value.
+    ref0s : Mapping
+        Maps a global name to its ref0 value.
+    defect_refs : Mapping
+        Maps a defect's global name to its defect_ref value.
+
+    Returns
+    -------
+    float
+        Ratio of the largest to the smallest nonzero row norm.
+    float
+        Ratio of the largest to the smallest nonzero column norm.
+    """
+    ofs = sorted({of for of, _ in jac})
+    wrts = sorted({wrt for _, wrt in jac})
+    M, row_slices = row_max_abs_matrix(jac, ofs, wrts)
+
+    row_refs = np.ones(M.shape[0])
+    for of in ofs:
+        if of in defect_refs:
+            row_refs[row_slices[of]] = defect_refs[of]
+        elif of in refs:
+            row_refs[row_slices[of]] = refs[of]
+    col_refs = np.array([refs[wrt] - ref0s[wrt] if wrt in refs else 1.0 for wrt in wrts])
+    M = M / row_refs[:, np.newaxis] * col_refs
+
+    rows = M.max(axis=1)
+    cols = M.max(axis=0)
+    rows = rows[rows > 0]
+    cols = cols[cols > 0]
+    return rows.max() / rows.min(), cols.max() / cols.min()
+
+
+def main(num_segments=100):
+    jac, lbs, ubs = make_jac_info(num_segments=num_segments, extended=True)
+
+    # Scaling only states, controls, defects and path constraints...
+    basic_keys = [(of, wrt) for of, wrt in jac
+                  if ('defects:' in of or 'path:' in of) and ('states:' in wrt or 'controls:' in wrt)]
+    basic = PJRNScaler({key: jac[key] for key in basic_keys}, lbs, ubs)
+    objectives = sorted({of for of, _ in jac if '.timeseries.' in of})
+    full = PJRNScaler(jac, lbs, ubs, objectives=objectives, scale_times_and_parameters=True)
+
+    print('{0:>22} {1:>12} {2:>12}'.format('scaled', 'row spread', 'col spread'))
+    for label, sc in (('states/controls only', basic), ('all rows and columns', full)):
+        row_spread, col_spread = scaled_spreads(jac, sc.refs, sc.ref0s, sc.defect_refs)
+        print('{0:>22} {1:12.3e} {2:12.3e}'.format(label, row_spread, col_spread))
+
+
+if __name__ == '__main__':
+    main()
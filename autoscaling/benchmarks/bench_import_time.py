@@ -0,0 +1,81 @@
+"""Measure import times of autoscaling entry points, and check which heavy packages they pull in.
+
+Each import runs in a fresh interpreter. Scale factor computations must not import OpenMDAO or
+Dymos; this script exits with an error if they do.
+"""
+
+import json
+import subprocess
+import sys
+
+IMPORT = """
+import json, sys, time
+t0 = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': [m for m in ('numpy', 'scipy', 'openmdao', 'dymos') if m in sys.modules]}}))
+"""
+
+# (statement, whether OpenMDAO and Dymos may be loaded by it)...
+CASES = [
+    ('import numpy', False),
+    ('import autoscaling.api', False),
+    ('from autoscaling.api import IsoScaler, PJRNScaler', False),
+    ('from autoscaling.api import autoscale', False),
+    ('from autoscaling.utils.archive import load_archive', False),
+    ('from autoscaling.core.parallel import parallel_scale', False),
+    ('from autoscaling.utils.utils import capture_scaling_info', False),
+    ('import openmdao.api, dymos', True),
+]
+
+
+def measure(statement, repeat=5):
+    """
+    Measure the best import time of the given statement over several fresh interpreters.
+
+    Parameters
+    ----------
+    statement : str
+        Import statement.
+    repeat : int
+        Number of interpreters to run.
+
+    Returns
+    -------
+    dict
+        Holds the best time in 'seconds' and the heavy packages 'loaded' by the statement, or
+        an 'error' entry if the statement failed.
+    """
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', IMPORT.format(statement=statement)],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            return {'error': proc.stderr.decode('utf-8').strip().splitlines()[-1]}
+        result = json.loads(proc.stdout.decode('utf-8'))
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def main():
+    failures = []
+    results = {}
+    for statement, heavy_allowed in CASES:
+        result = results[statement] = measure(statement)
+        if 'error' in result:
+            print('{0:<60} {1}'.format(statement, result['error']))
+            continue
+        print('{0:<60} {1:>8.1f} ms  {2}'.format(statement, 1e3 * result['seconds'],
+                                                ', '.join(result['loaded'])))
+        if not heavy_allowed and {'openmdao', 'dymos'} & set(result['loaded']):
+            failures.append(statement)
+
+    if failures:
+        sys.exit('OpenMDAO or Dymos imported by: {0}'.format('; '.join(failures)))
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Compare autoscale() with a trailing prob.setup() against applying the scaling in place."""
+
+import os
+import pickle
+import sys
+import time
+
+import dymos as dm
+import openmdao.api as om
+
+BRACH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'brach')
+sys.path.insert(0, BRACH_DIR)
+
+from brach_ode import BrachODE
+from autoscaling.api import autoscale, PJRNScaler
+
+
+def make_problem(num_seg, transcription=None):
+    prob = om.Problem()
+    model = prob.model
+
+    # Gauss-Lobatto unless another (Dymos) transcription is given...
+    if transcription is None:
+        transcription = dm.GaussLobatto(num_segments=num_seg)
+
+    traj = model.add_subsystem('traj', dm.Trajectory())
+    phase = dm.Phase(ode_class=BrachODE, transcription=transcription)
+    traj.add_phase('phase0', phase)
+
+    prob.driver = om.ScipyOptimizeDriver()
+
+    phase.set_time_options(fix_initial=True)
+    phase.set_state_options('x', fix_initial=True, fix_final=True)
+    phase.set_state_options('y', fix_initial=True, fix_final=True)
+    phase.set_state_options('v', fix_initial=True)
+    phase.add_control('th', lower=0.01, upper=179.9, units='deg')
+    phase.add_design_parameter('g', opt=False, val=9.80665, units='m/s**2')
+
+    phase.add_objective('time', loc='final')
+
+    return prob, phase
+
+
+def set_initial_guess(prob, phase):
+    prob['traj.phase0.t_initial'] = 0.0
+    prob['traj.phase0.t_duration'] = 1.0
+    prob['traj.phase0.states:x'] = phase.interpolate(ys=[0, 100], nodes='state_input')
+    prob['traj.phase0.states:y'] = phase.interpolate(ys=[0, 1], nodes='state_input')
+    prob['traj.phase0.states:v'] = phase.interpolate(ys=[0, 10], nodes='state_input')
+    prob['traj.phase0.controls:th'] = phase.interpolate(ys=[5, 100.5], nodes='control_input')
+
+
+def make_scaled_ready_problem(num_seg):
+    prob, phase = make_problem(num_seg)
+    prob.setup()
+    set_initial_guess(prob, phase)
+    prob.run_model()
+    jac = prob.compute_totals()
+    with open(os.path.join(BRACH_DIR, 'lower_bounds_info.pickle'), 'rb') as file:
+        lbs = pickle.load(file)
+    with open(os.path.join(BRACH_DIR, 'upper_bounds_info.pickle'), 'rb') as file:
+        ubs = pickle.load(file)
+    return prob, phase, PJRNScaler(jac, lbs, ubs)
+
+
+def main():
+    print('{0:>9} {1:>14} {2:>14}'.format('segments', 're-setup [s]', 'in place [s]'))
+    for num_seg in (10, 40, 100):
+        # Re-setup path: setup() discards the values already set, so they must
+        # be set again before the problem can be run...
+        prob, phase, sc = make_scaled_ready_problem(num_seg)
+        t0 = time.perf_counter()
+        autoscale(prob, sc)
+        set_initial_guess(prob, phase)
+        prob.final_setup()
+        t_setup = time.perf_counter() - t0
+
+        prob, phase, sc = make_scaled_ready_problem(num_seg)
+        t0 = time.perf_counter()
+        autoscale(prob, sc, setup=False)
+        prob.final_setup()
+        t_in_place = time.perf_counter() - t0
+
+        print('{0:>9d} {1:>14.4f} {2:>14.4f}'.format(num_seg, t_setup, t_in_place))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the scaling of trajectory linkage constraints derived from the scaling of the linked variables.
+
+A synthetic two-phase problem, whose second phase has states a few orders of magnitude larger
+than the first, is given a state linkage constraint x_final(phase0) - x_initial(phase1) = 0 per
+state. The spread (largest over smallest) of the row infinity norms of the PJRN-scaled jacobian
+is reported with the linkage rows left unscaled, as before, and with the linkage reference
+values set by autoscale().
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+from bench_extended_scaling import scaled_spreads
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.core.autoscale import _index_by_phase, _linked_range
+
+
+def make_linked(num_segments=100, states=('x', 'y', 'v'), factor=1e4):
+    """
+    Build synthetic two-phase jacobian and bounds information, with linkage constraints on the states.
+
+    Parameters
+    ----------
+    num_segments : int
+        Number of segments per phase.
+    states : tuple of str
+        Local state names.
+    factor : float
+        Magnitude of the states of the second phase relative to those of the first.
+
+    Returns
+    -------
+    dict
+        Total jacobian information, without the linkage rows.
+    dict
+        Maps the global name of each linkage constraint to its jacobian blocks.
+    dict
+        Maps a global variable name to its lower bound.
+    dict
+        Maps a global variable name to its upper bound.
+    """
+    jac, lbs, ubs = make_jac_info(num_phases=2, num_segments=num_segments, states=states)
+    for nm in ubs:
+        if nm.startswith('traj.phases.phase1.'):
+            lbs[nm] = lbs[nm] * factor
+            ubs[nm] = ubs[nm] * factor
+            for key in jac:
+                if key[1] == nm:
+                    jac[key] = jac[key] / factor
+
+    linkages = {}
+    for st in states:
+        nm = 'traj.linkages.phase0:{0}_final|phase1:{0}_initial'.format(st)
+        blocks = {}
+        for wrt in ubs:
+            num_cols = jac[next(of for of, w in jac if w == wrt), wrt].shape[1]
+            blocks[wrt] = np.zeros((1, num_cols))
+        blocks['traj.phases.phase0.indep_states.states:{0}'.format(st)][0, -1] = 1.0
+        blocks['traj.phases.phase1.indep_states.states:{0}'.format(st)][0, 0] = -1.0
+        linkages[nm] = blocks
+    return jac, linkages, lbs, ubs
+
+
+def main(num_segments=100, states=('x', 'y', 'v')):
+    jac, linkages, lbs, ubs = make_linked(num_segments=num_segments, states=states)
+    sc = PJRNScaler(jac, lbs, ubs)
+
+    full = dict(jac)
+    for nm, blocks in linkages.items():
+        for wrt, block in blocks.items():
+            full[nm, wrt] = block
+
+    phases = [SimpleNamespace(pathname='traj.phases.phase{0}'.format(p)) for p in range(2)]
+    index = _index_by_phase(phases, sc)
+    linkage_refs = {}
+    for st in states:
+        nm = 'traj.linkages.phase0:{0}_final|phase1:{0}_initial'.format(st)
+        kv_a = _linked_range(index['traj.phases.phase0'], st, 'final')
+        kv_b = _linked_range(index['traj.phases.phase1'], st, 'initial')
+        linkage_refs[nm] = float(np.sqrt(kv_a**2 + kv_b**2))
+
+    refs = dict(sc.refs)
+    print('{0:>20} {1:>12} {2:>12}'.format('linkages', 'row spread', 'col spread'))
+    for label in ('unscaled', 'scaled'):
+        if label == 'scaled':
+            refs.update(linkage_refs)
+        row_spread, col_spread = scaled_spreads(full, refs, sc.ref0s, sc.defect_refs)
+        print('{0:>20} {1:12.3e} {2:12.3e}'.format(label, row_spread, col_spread))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Compare PJRNScaler on a captured total jacobian with MatrixFreePJRNScaler on the live problem."""
+
+import time
+import tracemalloc
+
+import numpy as np
+from bench_inplace_autoscale import make_problem, set_initial_guess
+from autoscaling.api import MatrixFreePJRNScaler, PJRNScaler
+from autoscaling.utils.utils import capture_scaling_info, objective_names
+
+
+def _measure(func):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    print('{0:>9} {1:>22} {2:>10} {3:>10} {4:>10}'.format('segments', 'method', 'time [s]',
+                                                         'peak [MB]', 'products'))
+    for num_seg in (10, 40, 100):
+        prob, phase = make_problem(num_seg)
+        prob.setup()
+        set_initial_guess(prob, phase)
+        prob.run_model()
+
+        ref, elapsed, peak = _measure(lambda: PJRNScaler(*capture_scaling_info(prob),
+                                                         objectives=objective_names(prob)))
+        print('{0:>9d} {1:>22} {2:>10.4f} {3:>10.2f} {4:>10}'.format(
+            num_seg, 'capture + PJRN', elapsed, peak, '-'))
+
+        # GaussLobatto segments of order 3 span 3 control nodes, and control rate continuity
+        # rows couple two neighbouring segments, so columns 6 apart never share a row...
+        for label, kwargs in (('matrix-free', {}),
+                              ('matrix-free, stride 6', {'column_stride': 6}),
+                              ('matrix-free, auto stride', {'column_stride': 'auto'})):
+            sc, elapsed, peak = _measure(lambda: MatrixFreePJRNScaler(prob, **kwargs))
+            for refs, sc_refs in ((ref.refs, sc.refs), (ref.ref0s, sc.ref0s),
+                                  (ref.defect_refs, sc.defect_refs)):
+                assert(set(sc_refs) == set(refs))
+                for nm in refs:
+                    assert(np.allclose(sc_refs[nm], refs[nm], rtol=1e-8)), nm
+            print('{0:>9d} {1:>22} {2:>10.4f} {3:>10.2f} {4:>10d}'.format(
+                num_seg, label, elapsed, peak, sc.num_products))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare transferring PJRN scale factors to a refined brachistochrone grid against recomputing them.
+
+The true error factor is the largest ratio (or its inverse) of a transferred per-node reference
+value to the recomputed one. Whenever it exceeds the tolerance, the transfer must have been
+flagged for recomputation.
+"""
+
+import time
+
+import numpy as np
+from bench_inplace_autoscale import make_problem, set_initial_guess
+from autoscaling.api import PJRNScaler
+from autoscaling.core.names import parse_name
+from autoscaling.core.transfer import NODE_SUBSETS, phase_grids, transfer_refs
+from autoscaling.utils.utils import capture_scaling_info
+
+
+def _scaled_problem(num_seg):
+    prob, phase = make_problem(num_seg)
+    prob.setup()
+    set_initial_guess(prob, phase)
+    prob.run_model()
+    return prob
+
+
+def true_error(sc, exact):
+    """
+    Get the largest error factor of the per-node reference values of sc with respect to exact.
+    """
+    error = 0.0
+    for values, exact_values in ((sc.refs, exact.refs), (sc.defect_refs, exact.defect_refs)):
+        for nm in exact_values:
+            if parse_name(nm).kind not in NODE_SUBSETS or nm not in values:
+                continue
+            error = max(error, np.max(np.abs(np.log(np.asarray(values[nm]) /
+                                                    np.asarray(exact_values[nm])))))
+    return np.exp(error)
+
+
+def main(tolerance=2.0):
+    print('{0:>13} {1:>14} {2:>14} {3:>14} {4:>12}'.format(
+        'segments', 'recompute [s]', 'transfer [s]', 'true error', 'flagged'))
+    for old_seg, new_seg in ((10, 20), (20, 40), (40, 100)):
+        old_prob = _scaled_problem(old_seg)
+        old_sc = PJRNScaler(*capture_scaling_info(old_prob))
+        new_prob = _scaled_problem(new_seg)
+
+        t0 = time.perf_counter()
+        exact = PJRNScaler(*capture_scaling_info(new_prob))
+        t_recompute = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sc = transfer_refs(old_sc, phase_grids(old_prob), phase_grids(new_prob),
+                           tolerance=tolerance)
+        t_transfer = time.perf_counter() - t0
+
+        error = true_error(sc, exact)
+        print('{0:>6d} -> {1:<4d} {2:>14.4f} {3:>14.4f} {4:>14.3f} {5:>12}'.format(
+            old_seg, new_seg, t_recompute, t_transfer, error, sc.needs_recompute))
+        assert(sc.needs_recompute or error <= tolerance), \
+            'Transfer error {0:.3f} exceeds the tolerance but was not flagged.'.format(error)
+
+
+if __name__ == '__main__':
+    main()
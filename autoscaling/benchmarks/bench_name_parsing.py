@@ -0,0 +1,63 @@
+"""Compare IsoScaler defect-to-variable matching by repeated string parsing against the interned KeyIndex."""
+
+import time
+
+from synthetic import make_jac_info
+from autoscaling.core.names import STATE, KeyIndex, parse_name
+
+
+def loop_match(fnames, vnames):
+    """
+    Match each defect to the variable of the same phase and local name with an O(defects x variables) string loop.
+    """
+    matches = {}
+    for f in fnames:
+        loc_f = f.split(':')[-1]
+        phase = f.split('.collocation_constraint.')[0] + '.'
+        for v in vnames:
+            if v.split(':')[-1].split('.')[-1] == loc_f and v.startswith(phase):
+                matches[f] = v
+                break
+    return matches
+
+
+def index_match(fnames, vnames):
+    """
+    Match each defect to the state of the same phase and local name with a KeyIndex.
+    """
+    keys = KeyIndex(vnames)
+    matches = {}
+    for f in fnames:
+        rec = parse_name(f)
+        matches[f] = keys.find(STATE, rec.local, rec.phase)
+    return matches
+
+
+def main():
+    states = tuple('s{0}'.format(i) for i in range(10))
+    print('{0:>7} {1:>9} {2:>10} {3:>16} {4:>16}'.format('phases', 'defects', 'loop [s]',
+                                                         'index, cold [s]', 'index, warm [s]'))
+    for num_phases in (1, 10, 100):
+        jac, _, _ = make_jac_info(num_phases=num_phases, num_segments=1, states=states)
+        fnames = sorted({of for of, _ in jac if '.defects:' in of})
+        vnames = sorted({wrt for _, wrt in jac})
+        parse_name.cache_clear()
+
+        t0 = time.perf_counter()
+        loop_match(fnames, vnames)
+        t_loop = time.perf_counter() - t0
+
+        # Cold: every name is parsed; warm: the parsed records are cached...
+        timings = []
+        for _ in range(2):
+            t0 = time.perf_counter()
+            matches = index_match(fnames, vnames)
+            timings.append(time.perf_counter() - t0)
+        assert(matches == loop_match(fnames, vnames))
+
+        print('{0:>7d} {1:>9d} {2:>10.5f} {3:>16.5f} {4:>16.5f}'.format(
+            num_phases, len(fnames), t_loop, *timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark per-phase parallel scaling of a multi-phase trajectory against the serial scaler."""
+
+import os
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.core.parallel import parallel_scale
+
+
+def main(num_phases=16, num_segments=100):
+    jac, lbs, ubs = make_jac_info(num_phases=num_phases, num_segments=num_segments, sparse='csr')
+
+    t0 = time.perf_counter()
+    serial = PJRNScaler(jac, lbs, ubs)
+    t_serial = time.perf_counter() - t0
+
+    print('{0} phases x {1} segments, {2} CPUs'.format(num_phases, num_segments, os.cpu_count()))
+    print('{0:>8} {1:>10} {2:>9}'.format('workers', 'time [s]', 'speedup'))
+    print('{0:>8} {1:>10.4f} {2:>8.2f}x'.format('serial', t_serial, 1.0))
+
+    workers = 1
+    while workers <= max(os.cpu_count(), 2):
+        t0 = time.perf_counter()
+        sc = parallel_scale(PJRNScaler, jac, lbs, ubs, max_workers=workers)
+        elapsed = time.perf_counter() - t0
+
+        for serial_refs, refs in ((serial.refs, sc.refs), (serial.ref0s, sc.ref0s),
+                                  (serial.defect_refs, sc.defect_refs)):
+            assert(set(serial_refs) == set(refs))
+            for nm in refs:
+                assert(np.array_equal(serial_refs[nm], refs[nm]))
+
+        print('{0:>8d} {1:>10.4f} {2:>8.2f}x'.format(workers, elapsed, t_serial / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
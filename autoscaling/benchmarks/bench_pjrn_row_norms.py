@@ -0,0 +1,61 @@
+"""Benchmark the vectorized PJRN row norm engine against the original pure-Python loop."""
+
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+
+
+def loop_row_norms(jac, of, vnames, Kv_inv):
+    """
+    Compute the PJRN row norms of a constraint with the original nested-loop implementation.
+    """
+    norms = []
+    nn = len(jac[of, list(vnames)[0]])
+    for nd in range(nn):
+        norm = 0
+        for v in vnames:
+            subrow = jac[of, v][nd]
+            sum = 0
+            for el in subrow:
+                sum += el * el
+            norm += sum * Kv_inv[v]**2
+        norm = norm ** 0.5
+        norms.append(norm)
+    return norms
+
+
+def loop_refs(jac, lbs, ubs):
+    """
+    Compute PJRN defect_refs and path constraint refs with the original nested-loop implementation.
+    """
+    vnames = PJRNScaler._parse_vnames_from(jac)
+    onames = PJRNScaler._parse_fnames_from(jac) | PJRNScaler._parse_gnames_from(jac)
+    Kv_inv = {v: ubs[v] - lbs[v] for v in vnames}
+    return {of: loop_row_norms(jac, of, vnames, Kv_inv) for of in onames}
+
+
+def main():
+    print('{0:>9} {1:>12} {2:>12} {3:>9}'.format('segments', 'loop [s]', 'numpy [s]', 'speedup'))
+    for num_seg in (10, 50, 100, 200):
+        jac, lbs, ubs = make_jac_info(num_segments=num_seg)
+
+        t0 = time.perf_counter()
+        ref = loop_refs(jac, lbs, ubs)
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sc = PJRNScaler(jac, lbs, ubs)
+        t_vec = time.perf_counter() - t0
+
+        for of, norms in ref.items():
+            val = sc.defect_refs[of] if of in sc.defect_refs else sc.refs[of]
+            assert(np.allclose(val, norms, rtol=1e-12, atol=0))
+
+        print('{0:>9d} {1:>12.4f} {2:>12.4f} {3:>8.1f}x'.format(num_seg, t_loop, t_vec,
+                                                                t_loop / t_vec))
+
+
+if __name__ == '__main__':
+    main()
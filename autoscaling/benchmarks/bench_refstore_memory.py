@@ -0,0 +1,39 @@
+"""Compare the memory held by PJRN reference values stored as dicts of lists against RefStores."""
+
+import tracemalloc
+
+import numpy as np
+
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+
+
+def _traced(func):
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6
+
+
+def main():
+    print('{0:>9} {1:>8} {2:>16} {3:>14}'.format('segments', 'rows', 'dict/list [MB]',
+                                                  'RefStore [MB]'))
+    for num_seg in (100, 1000, 5000):
+        jac, lbs, ubs = make_jac_info(num_segments=num_seg, sparse='csr')
+        sc = PJRNScaler(jac, lbs, ubs)
+        del jac
+
+        # The original implementation appended one boxed float per node...
+        _, legacy = _traced(lambda: [{nm: [float(x) for x in refs[nm]] if np.ndim(refs[nm])
+                                      else refs[nm] for nm in refs}
+                                     for refs in (sc.refs, sc.ref0s, sc.defect_refs)])
+        _, compact = _traced(lambda: [refs.copy()
+                                      for refs in (sc.refs, sc.ref0s, sc.defect_refs)])
+
+        print('{0:>9d} {1:>8d} {2:>16.3f} {3:>14.3f}'.format(
+            num_seg, sc.row_sq_norms.shape[0], legacy, compact))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark Ruiz equilibration against PJRN: conditioning of the scaled jacobian and optimizer iterations.
+
+The first part runs on synthetic jacobians of badly scaled variables, and reports the spread
+(largest over smallest) of the row and column infinity norms of the scaled jacobian. The second
+part optimizes the steady flight problem with each scaler through the benchmark suite, and
+reports the number of major iterations against no scaling, IS and PJRN, e.g.
+
+    python bench_ruiz.py --segments 10 20 --transcriptions radau-uncompressed --output ruiz.json
+
+The suite's example problems are written against the Dymos ODE decorator API (declare_time,
+declare_state), so the second part needs a Dymos version that still provides it.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.autoscalers.ruizscaler import RuizScaler
+from autoscaling.core.names import CONTROL, DEFECT, PATH, STATE, KeyIndex
+from autoscaling.utils.rownorms import row_max_abs_matrix
+
+
+def norm_spread(jac, sc):
+    """
+    Compute the spread of the row and column infinity norms of the jacobian scaled by sc.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information.
+    sc : AutoScaler or None
+        Autoscaler, or None for the unscaled jacobian.
+
+    Returns
+    -------
+    float
+        Ratio of the largest to the smallest nonzero row norm.
+    float
+        Ratio of the largest to the smallest nonzero column norm.
+    """
+    keys = KeyIndex.from_jac(jac)
+    vnames = sorted(keys.names(STATE, CONTROL))
+    fnames = sorted(keys.names(DEFECT))
+    gnames = sorted(keys.names(PATH))
+    M, row_slices = row_max_abs_matrix(jac, fnames + gnames, vnames)
+
+    if sc is not None:
+        row_refs = np.ones(M.shape[0])
+        for nm in fnames:
+            row_refs[row_slices[nm]] = sc.defect_refs[nm]
+        for nm in gnames:
+            row_refs[row_slices[nm]] = sc.refs[nm]
+        col_refs = np.array([sc.refs[v] - sc.ref0s[v] for v in vnames])
+        M = M / row_refs[:, np.newaxis] * col_refs
+
+    rows = M.max(axis=1)
+    cols = M.max(axis=0)
+    rows = rows[rows > 0]
+    cols = cols[cols > 0]
+    return rows.max() / rows.min(), cols.max() / cols.min()
+
+
+def make_badly_scaled(num_segments=100, sparse='csr', seed=2):
+    """
+    Build synthetic jacobian and bounds information whose variables span many orders of magnitude.
+
+    Parameters
+    ----------
+    num_segments : int
+        Number of segments.
+    sparse : str or None
+        Passed on to make_jac_info().
+    seed : int
+        Random seed of the variable magnitudes.
+
+    Returns
+    -------
+    dict
+        Total jacobian information.
+    dict
+        Maps a global variable name to its lower bound.
+    dict
+        Maps a global variable name to its upper bound.
+    """
+    jac, lbs, ubs = make_jac_info(num_segments=num_segments, sparse=sparse)
+    rng = np.random.RandomState(seed)
+    for nm in sorted(ubs):
+        factor = 10.0**rng.uniform(-4, 4)
+        lbs[nm] = lbs[nm] * factor
+        ubs[nm] = ubs[nm] * factor
+        for key in jac:
+            if key[1] == nm:
+                jac[key] = jac[key] / factor
+    return jac, lbs, ubs
+
+
+def bench_conditioning(num_segments=100, sparse='csr'):
+    jac, lbs, ubs = make_badly_scaled(num_segments=num_segments, sparse=sparse)
+
+    print('{0:>6} {1:>12} {2:>12} {3:>10}'.format('scaler', 'row spread', 'col spread', 'time (s)'))
+    for name, cls in (('none', None), ('pjrn', PJRNScaler), ('ruiz', RuizScaler)):
+        t0 = time.perf_counter()
+        sc = cls(jac, lbs, ubs) if cls is not None else None
+        elapsed = time.perf_counter() - t0
+        row_spread, col_spread = norm_spread(jac, sc)
+        print('{0:>6} {1:12.3e} {2:12.3e} {3:10.4f}'.format(name, row_spread, col_spread,
+                                                           elapsed))
+        if cls is RuizScaler:
+            print('ruiz: {0} sweeps, converged: {1}'.format(sc.num_iterations, sc.converged))
+
+
+def bench_iterations(segments, transcriptions, maxiter, output=None):
+    # Import here, since the suite needs Dymos and OpenMDAO...
+    from suite import run_suite
+
+    results = run_suite(['steady_flight'], segments, transcriptions,
+                        ['none', 'iso', 'pjrn', 'ruiz'], maxiter=maxiter)
+
+    print('{0:>20} {1:>9} {2:>6} {3:>10} {4:>9}'.format('transcription', 'segments', 'scaler',
+                                                        'iterations', 'converged'))
+    for record in results:
+        print('{0:>20} {1:>9} {2:>6} {3:>10} {4:>9}'.format(
+            record['transcription'], record['num_segments'], record['scaler'],
+            record.get('iterations', '-'), str(record.get('converged', record.get('error')))))
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, nargs='+', default=[10, 20])
+    parser.add_argument('--transcriptions', nargs='+', default=['radau-uncompressed'])
+    parser.add_argument('--maxiter', type=int, default=500)
+    parser.add_argument('--output', default=None,
+                        help='JSON file to which the optimizer iteration records are written.')
+    parser.add_argument('--no-optimize', action='store_true',
+                        help='Only run the synthetic conditioning benchmark.')
+    args = parser.parse_args(argv)
+
+    bench_conditioning()
+    if not args.no_optimize:
+        bench_iterations(args.segments, args.transcriptions, args.maxiter, output=args.output)
+
+
+if __name__ == '__main__':
+    main()
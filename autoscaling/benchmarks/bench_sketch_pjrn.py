@@ -0,0 +1,44 @@
+"""Compare SketchPJRNScaler estimates and cost with exact PJRN scaling of the brachistochrone problem."""
+
+import time
+
+import numpy as np
+from bench_inplace_autoscale import make_problem, set_initial_guess
+from autoscaling.api import PJRNScaler, SketchPJRNScaler
+from autoscaling.utils.utils import capture_scaling_info
+
+
+def _relative_errors(sc, ref):
+    errs = [np.abs(sc.defect_refs[nm] / ref.defect_refs[nm] - 1.0) for nm in ref.defect_refs]
+    errs += [np.abs(sc.refs[nm] / ref.refs[nm] - 1.0) for nm in ref.refs
+             if ref.is_path_constraint_name(nm)]
+    return np.concatenate([np.ravel(err) for err in errs])
+
+
+def main():
+    print('{0:>9} {1:>14} {2:>10} {3:>10} {4:>12} {5:>10}'.format(
+        'segments', 'method', 'time [s]', 'products', 'error bound', 'covered'))
+    for num_seg in (10, 40, 100):
+        prob, phase = make_problem(num_seg)
+        prob.setup()
+        set_initial_guess(prob, phase)
+        prob.run_model()
+
+        t0 = time.perf_counter()
+        ref = PJRNScaler(*capture_scaling_info(prob))
+        elapsed = time.perf_counter() - t0
+        print('{0:>9d} {1:>14} {2:>10.4f} {3:>10} {4:>12} {5:>10}'.format(
+            num_seg, 'exact', elapsed, '-', '-', '-'))
+
+        for num_probes in (4, 16, 64):
+            t0 = time.perf_counter()
+            sc = SketchPJRNScaler(prob, num_probes=num_probes, seed=0)
+            elapsed = time.perf_counter() - t0
+            covered = np.mean(_relative_errors(sc, ref) <= sc.error_bound)
+            print('{0:>9d} {1:>14} {2:>10.4f} {3:>10d} {4:>12.3f} {5:>10.3f}'.format(
+                num_seg, 'sketch k={0}'.format(num_probes), elapsed, sc.num_products,
+                sc.error_bound, covered))
+
+
+if __name__ == '__main__':
+    main()
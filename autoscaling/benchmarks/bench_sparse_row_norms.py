@@ -0,0 +1,44 @@
+"""Benchmark PJRNScaler on dense versus scipy.sparse total jacobian blocks."""
+
+import time
+
+import numpy as np
+from synthetic import make_jac_info
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+
+
+def _nbytes(jac):
+    total = 0
+    for block in jac.values():
+        if isinstance(block, np.ndarray):
+            total += block.nbytes
+        elif block.format == 'coo':
+            total += block.data.nbytes + block.row.nbytes + block.col.nbytes
+        else:
+            total += block.data.nbytes + block.indices.nbytes + block.indptr.nbytes
+    return total
+
+
+def main():
+    print('{0:>9} {1:>7} {2:>12} {3:>12}'.format('segments', 'format', 'jac [MB]', 'PJRN [s]'))
+    for num_seg in (100, 200, 400):
+        ref = None
+        for fmt in (None, 'csr', 'csc', 'coo'):
+            jac, lbs, ubs = make_jac_info(num_segments=num_seg, sparse=fmt)
+
+            t0 = time.perf_counter()
+            sc = PJRNScaler(jac, lbs, ubs)
+            elapsed = time.perf_counter() - t0
+
+            if ref is None:
+                ref = sc
+            else:
+                for nm in ref.defect_refs:
+                    assert(np.allclose(sc.defect_refs[nm], ref.defect_refs[nm], rtol=1e-12))
+
+            print('{0:>9d} {1:>7} {2:>12.2f} {3:>12.4f}'.format(num_seg, fmt or 'dense',
+                                                                _nbytes(jac) / 1e6, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark jacobian-based against bounds-based variable scaling on problems with loose or missing bounds.
+
+The first part runs on synthetic jacobians of badly scaled variables, some of whose bounds are
+made loose or infinite, and reports the spread of the row and column infinity norms of the
+scaled jacobian. The second part optimizes the steady flight problem (whose range state has a
+loose upper bound) through the benchmark suite, and reports the number of major iterations.
+"""
+
+import argparse
+
+import numpy as np
+from bench_ruiz import make_badly_scaled, norm_spread
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+
+
+def bench_conditioning(num_segments=100, seed=3):
+    jac, lbs, ubs = make_badly_scaled(num_segments=num_segments)
+
+    # Loosen some bounds by orders of magnitude, and drop others...
+    rng = np.random.RandomState(seed)
+    for nm in sorted(ubs):
+        choice = rng.randint(3)
+        if choice == 1:
+            ubs[nm] = lbs[nm] + (ubs[nm] - lbs[nm]) * 1e4
+        elif choice == 2:
+            lbs[nm], ubs[nm] = -1e30, 1e30
+
+    print('{0:>10} {1:>12} {2:>12}'.format('variables', 'row spread', 'col spread'))
+    for mode in ('bounds', 'jacobian'):
+        sc = PJRNScaler(jac, lbs, ubs, variable_scaling=mode)
+        row_spread, col_spread = norm_spread(jac, sc)
+        print('{0:>10} {1:12.3e} {2:12.3e}'.format(mode, row_spread, col_spread))
+
+
+def bench_iterations(segments, transcriptions, maxiter):
+    # Import here, since the suite needs Dymos and OpenMDAO...
+    from suite import run_suite
+
+    results = run_suite(['steady_flight'], segments, transcriptions,
+                        ['pjrn', 'pjrn-jacobian'], maxiter=maxiter)
+
+    print('{0:>20} {1:>9} {2:>14} {3:>10} {4:>9}'.format('transcription', 'segments', 'scaler',
+                                                         'iterations', 'converged'))
+    for record in results:
+        print('{0:>20} {1:>9} {2:>14} {3:>10} {4:>9}'.format(
+            record['transcription'], record['num_segments'], record['scaler'],
+            record.get('iterations', '-'), str(record.get('converged', record.get('error')))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, nargs='+', default=[10, 20])
+    parser.add_argument('--transcriptions', nargs='+', default=['radau-uncompressed'])
+    parser.add_argument('--maxiter', type=int, default=500)
+    parser.add_argument('--no-optimize', action='store_true',
+                        help='Only run the synthetic conditioning benchmark.')
+    args = parser.parse_args(argv)
+
+    bench_conditioning()
+    if not args.no_optimize:
+        bench_iterations(args.segments, args.transcriptions, args.maxiter)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""Benchmark suite sweeping problem, mesh size, transcription and scaler.
+
+Every case runs in a fresh interpreter so that its peak RSS is not polluted by earlier cases.
+Results are written as a JSON list with one record per case, e.g.
+
+    python suite.py --problems brach --segments 10 20 40 --output results.json
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import dymos as dm
+import openmdao.api as om
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples')
+sys.path.insert(0, os.path.join(EXAMPLES_DIR, 'brach'))
+sys.path.insert(0, os.path.join(EXAMPLES_DIR, 'steady_flight'))
+
+from aircraft_ode import AircraftODE
+from bench_inplace_autoscale import make_problem as make_brach_base
+from bench_inplace_autoscale import set_initial_guess as set_brach_guess
+from dymos.utils.lgl import lgl
+from autoscaling.api import autoscale, CurtisReidScaler, IsoScaler, PJRNScaler, RuizScaler
+from autoscaling.utils.utils import capture_scaling_info, objective_names
+
+TRANSCRIPTIONS = {
+    'gauss-lobatto': lambda **kwargs: dm.GaussLobatto(**kwargs),
+    'radau': lambda **kwargs: dm.Radau(compressed=True, **kwargs),
+    'radau-uncompressed': lambda **kwargs: dm.Radau(compressed=False, **kwargs),
+}
+
+# Maps a scaler name (as given on the command line) to a callable creating the AutoScaler...
+SCALERS = {
+    'none': None,
+    'iso': IsoScaler,
+    'pjrn': PJRNScaler,
+    'pjrn-jacobian': functools.partial(PJRNScaler, variable_scaling='jacobian'),
+    'ruiz': RuizScaler,
+    'curtis-reid': CurtisReidScaler,
+}
+
+
+def peak_rss_mb():
+    """
+    Get the peak resident set size of this process, in MB.
+
+    Returns
+    -------
+    float
+        Peak RSS, in MB.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _make_driver(prob, maxiter):
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options['optimizer'] = 'SLSQP'
+    prob.driver.options['maxiter'] = maxiter
+    prob.driver.options['disp'] = False
+
+
+def make_brach_problem(transcription, num_seg, maxiter=500):
+    """
+    Build the brachistochrone problem with the given transcription, driven by SLSQP.
+
+    The problem is the one built by bench_inplace_autoscale.make_problem(). None of its states
+    are bounded, so the iso and pjrn cases derive their refs from the jacobian (see PROBLEMS).
+
+    Parameters
+    ----------
+    transcription : str
+        Key of TRANSCRIPTIONS.
+    num_seg : int
+        Number of segments.
+    maxiter : int
+        Maximum number of optimizer iterations.
+
+    Returns
+    -------
+    Problem
+        The problem (not set up).
+    Phase
+        Its only phase.
+    """
+    prob, phase = make_brach_base(num_seg, TRANSCRIPTIONS[transcription](num_segments=num_seg))
+    _make_driver(prob, maxiter)
+    return prob, phase
+
+
+def make_steady_flight_problem(transcription, num_seg, maxiter=500):
+    """
+    Build the (badly conditioned) steady flight problem with the given transcription, driven by SLSQP.
+
+    Parameters
+    ----------
+    transcription : str
+        Key of TRANSCRIPTIONS.
+    num_seg : int
+        Number of segments.
+    maxiter : int
+        Maximum number of optimizer iterations.
+
+    Returns
+    -------
+    Problem
+        The problem (not set up).
+    Phase
+        Its only phase.
+    """
+    prob = om.Problem()
+    model = prob.model
+
+    seg_ends, _ = lgl(num_seg + 1)
+    traj = model.add_subsystem('traj', dm.Trajectory())
+    phase = traj.add_phase('phase0',
+                           dm.Phase(ode_class=AircraftODE,
+                                    transcription=TRANSCRIPTIONS[transcription](
+                                        num_segments=num_seg, segment_ends=seg_ends, order=3)))
+
+    assumptions = model.add_subsystem('assumptions', om.IndepVarComp())
+    assumptions.add_output('S', val=427.8, units='m**2')
+    assumptions.add_output('mass_empty', val=1.0, units='kg')
+    assumptions.add_output('mass_payload', val=1.0, units='kg')
+
+    _make_driver(prob, maxiter)
+
+    phase.set_time_options(initial_bounds=(0, 0), duration_bounds=(300, 10000))
+
+    phase.set_state_options('range', units='NM', fix_initial=True,
+                            fix_final=False, lower=0, upper=2000)
+    phase.set_state_options('mass_fuel', units='lbm', fix_initial=True, fix_final=True,
+                            upper=1.5E5, lower=0.0)
+    phase.set_state_options('alt', units='kft', fix_initial=True, fix_final=True,
+                            lower=0.0, upper=60)
+
+    phase.add_control('climb_rate', units='ft/min', opt=True, lower=-3000, upper=3000,
+                      rate_continuity=True, rate2_continuity=False)
+
+    phase.add_control('mach', units=None, opt=False)
+
+    phase.add_input_parameter('S', units='m**2')
+    phase.add_input_parameter('mass_empty', units='kg')
+    phase.add_input_parameter('mass_payload', units='kg')
+
+    phase.add_path_constraint('propulsion.tau', lower=0.01, upper=2.0, shape=(1,))
+
+    model.connect('assumptions.S', 'traj.phase0.input_parameters:S')
+    model.connect('assumptions.mass_empty', 'traj.phase0.input_parameters:mass_empty')
+    model.connect('assumptions.mass_payload', 'traj.phase0.input_parameters:mass_payload')
+
+    phase.add_objective('range', loc='final')
+
+    return prob, phase
+
+
+def set_steady_flight_guess(prob, phase):
+    """
+    Set the initial guess of the steady flight problem.
+
+    Parameters
+    ----------
+    prob : Problem
+        The problem, after setup.
+    phase : Phase
+        Its only phase.
+    """
+    prob['traj.phase0.t_initial'] = 0.0
+    prob['traj.phase0.t_duration'] = 3600.0
+    prob['traj.phase0.states:range'][:] = phase.interpolate(ys=(0, 724.0), nodes='state_input')
+    prob['traj.phase0.states:mass_fuel'][:] = phase.interpolate(
+        ys=(30000, 1e-3), nodes='state_input')
+    prob['traj.phase0.states:alt'][:] = 10.0
+
+    prob['traj.phase0.controls:mach'][:] = 0.8
+
+    prob['assumptions.S'] = 427.8
+    prob['assumptions.mass_empty'] = 0.15E6
+    prob['assumptions.mass_payload'] = 84.02869 * 400
+
+
+# Maps a problem name to its builder, initial guess setter, objective output and the
+# variable_scaling of the iso and pjrn scalers. The brach states are unbounded, so their
+# refs can only come from the jacobian...
+PROBLEMS = {
+    'brach': (make_brach_problem, set_brach_guess, 'traj.phase0.timeseries.time', 'jacobian'),
+    'steady_flight': (make_steady_flight_problem, set_steady_flight_guess,
+                      'traj.phase0.timeseries.states:range', 'bounds'),
+}
+
+# Scalers whose variable_scaling follows the problem (see PROBLEMS)...
+_PROBLEM_SCALED = ('iso', 'pjrn')
+
+
+def run_case(problem, transcription, num_segments, scaler, maxiter=500):
+    """
+    Set up, scale and optimize one case, timing every stage.
+
+    Parameters
+    ----------
+    problem : str
+        Key of PROBLEMS.
+    transcription : str
+        Key of TRANSCRIPTIONS.
+    num_segments : int
+        Number of segments.
+    scaler : str
+        Key of SCALERS.
+    maxiter : int
+        Maximum number of optimizer iterations.
+
+    Returns
+    -------
+    dict
+        JSON-serializable record of the case and its measurements. Times are in seconds.
+    """
+    record = {'problem': problem, 'transcription': transcription, 'num_segments': num_segments,
+              'scaler': scaler}
+
+    make_problem, set_initial_guess, objective, variable_scaling = PROBLEMS[problem]
+    prob, phase = make_problem(transcription, num_segments, maxiter=maxiter)
+    t0 = time.perf_counter()
+    prob.setup()
+    record['setup_s'] = time.perf_counter() - t0
+    set_initial_guess(prob, phase)
+
+    scaler_class = SCALERS[scaler]
+    if scaler_class is None:
+        record['capture_s'] = record['scaler_s'] = record['autoscale_s'] = 0.0
+    else:
+        t0 = time.perf_counter()
+        jac, lbs, ubs = capture_scaling_info(prob)
+        record['capture_s'] = time.perf_counter() - t0
+
+        kwargs = {}
+        if scaler in _PROBLEM_SCALED:
+            kwargs['variable_scaling'] = record['variable_scaling'] = variable_scaling
+        if scaler == 'pjrn':
+            kwargs['objectives'] = objective_names(prob)
+        t0 = time.perf_counter()
+        sc = scaler_class(jac, lbs, ubs, **kwargs)
+        record['scaler_s'] = time.perf_counter() - t0
+        del jac
+
+        t0 = time.perf_counter()
+        autoscale(prob, sc)
+        record['autoscale_s'] = time.perf_counter() - t0
+
+        # setup() discards the values already set...
+        set_initial_guess(prob, phase)
+
+    t0 = time.perf_counter()
+    failed = prob.run_driver()
+    record['optimize_s'] = time.perf_counter() - t0
+
+    result = getattr(prob.driver, 'result', None)
+    record['iterations'] = int(getattr(result, 'nit', prob.driver.iter_count))
+    record['converged'] = not failed
+    record['objective'] = float(prob.get_val(objective)[-1, ...])
+    record['peak_rss_mb'] = peak_rss_mb()
+    return record
+
+
+def run_suite(problems, segments, transcriptions, scalers, maxiter=500):
+    """
+    Run every combination of the given cases, each in a fresh interpreter.
+
+    Parameters
+    ----------
+    problems : list of str
+        Keys of PROBLEMS.
+    segments : list of int
+        Numbers of segments.
+    transcriptions : list of str
+        Keys of TRANSCRIPTIONS.
+    scalers : list of str
+        Keys of SCALERS.
+    maxiter : int
+        Maximum number of optimizer iterations.
+
+    Returns
+    -------
+    list of dict
+        One record per case (see run_case()). Cases that fail get an 'error' entry.
+    """
+    results = []
+    cases = itertools.product(problems, transcriptions, segments, scalers)
+    for problem, transcription, num_seg, scaler in cases:
+        case = [problem, transcription, num_seg, scaler, maxiter]
+        try:
+            out = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+                                           '--run-case', json.dumps(case)])
+            record = json.loads(out.decode('utf-8').splitlines()[-1])
+        except subprocess.CalledProcessError as err:
+            record = {'problem': problem, 'transcription': transcription,
+                      'num_segments': num_seg, 'scaler': scaler,
+                      'error': 'exit status {0}'.format(err.returncode)}
+        results.append(record)
+        print('{0:>14} {1:>20} {2:>9} {3:>6} {4}'.format(
+            problem, transcription, num_seg, scaler,
+            record.get('error') or '{0:.3f} s, {1} iterations'.format(
+                record['optimize_s'], record['iterations'])), file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--problems', nargs='+', default=sorted(PROBLEMS),
+                        choices=sorted(PROBLEMS))
+    parser.add_argument('--segments', type=int, nargs='+', default=[10, 20, 40])
+    parser.add_argument('--transcriptions', nargs='+', default=sorted(TRANSCRIPTIONS),
+                        choices=sorted(TRANSCRIPTIONS))
+    parser.add_argument('--scalers', nargs='+', default=sorted(SCALERS), choices=sorted(SCALERS))
+    parser.add_argument('--maxiter', type=int, default=500)
+    parser.add_argument('--output', default='suite_results.json')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        # Child process: run a single case and report it on the last line of stdout...
+        print(json.dumps(run_case(*json.loads(args.run_case))))
+        return
+
+    results = run_suite(args.problems, args.segments, args.transcriptions, args.scalers,
+                        maxiter=args.maxiter)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Generate synthetic Dymos-like total jacobian and bounds information for benchmarking."""
+
+import numpy as np
+
+
+def make_jac_info(num_phases=1, num_segments=100, order=3, states=('x', 'y', 'v'),
+                  controls=('th',), path_constraints=('tau',), sparse=None, seed=0,
+                  extended=False):
+    """
+    Build total jacobian and bounds dicts with the naming and block structure of a Radau phase.
+
+    Each segment contributes order collocation defects per state, which depend on the order + 1
+    state nodes and order control nodes of that segment only, so every defect and path
+    constraint block is block-diagonal (mostly zeros), just like the real thing.
+
+    Parameters
+    ----------
+    num_phases : int
+        Number of phases in the trajectory.
+    num_segments : int
+        Number of segments per phase.
+    order : int
+        Transcription order (collocation nodes per segment).
+    states : tuple of str
+        Local state names.
+    controls : tuple of str
+        Local control names.
+    path_constraints : tuple of str
+        Local path constraint names.
+    sparse : str or None
+        If given, the scipy.sparse format ('csr', 'csc' or 'coo') in which to store the blocks;
+        otherwise blocks are dense ndarrays.
+    seed : int
+        Random seed.
+    extended : bool
+        If True, also include the phase times (t_initial fixed at zero, t_duration bounded
+        loosely), a design parameter 'p' without bounds, a final boundary constraint on each
+        state, an objective (the final value of the first state of the first phase), whose
+        blocks are dense columns or single entries, and state, control and control rate
+        continuity constraints between consecutive segments.
+
+    Returns
+    -------
+    dict
+        Total jacobian information, keyed by (of, wrt) global name pairs.
+    dict
+        Maps a global variable name to its lower bound.
+    dict
+        Maps a global variable name to its upper bound.
+    """
+    rng = np.random.RandomState(seed)
+
+    num_col = num_segments * order
+    num_state_nodes = num_segments * (order + 1)
+    num_nodes = num_state_nodes
+
+    lbs = {}
+    ubs = {}
+    vnames = {}
+    onames = {}
+    for p in range(num_phases):
+        path = 'traj.phases.phase{0}'.format(p)
+        for st in states:
+            vnames['{0}.indep_states.states:{1}'.format(path, st)] = (p, num_state_nodes)
+        for ct in controls:
+            vnames['{0}.control_group.indep_controls.controls:{1}'.format(path, ct)] = (p, num_col)
+        for st in states:
+            onames['{0}.collocation_constraint.defects:{1}'.format(path, st)] = (p, num_col)
+        for g in path_constraints:
+            onames['{0}.path_constraints.path:{1}'.format(path, g)] = (p, num_nodes)
+
+    for nm in vnames:
+        mag = 10.0 ** rng.uniform(-2, 4)
+        lbs[nm] = -mag * rng.uniform(0, 1)
+        ubs[nm] = mag
+
+    # Like compute_totals(), include the (all zero) blocks coupling
+    # constraints of one phase to variables of another...
+    jac = {}
+    for of, (of_phase, num_rows) in onames.items():
+        for wrt, (wrt_phase, num_cols) in vnames.items():
+            if of_phase == wrt_phase:
+                nodes_per_seg = num_cols // num_segments
+                rows_per_seg = num_rows // num_segments
+                seg = np.repeat(np.arange(num_segments), rows_per_seg * nodes_per_seg)
+                loc = np.tile(np.arange(rows_per_seg * nodes_per_seg), num_segments)
+                rows = seg * rows_per_seg + loc // nodes_per_seg
+                cols = seg * nodes_per_seg + loc % nodes_per_seg
+                data = 10.0 ** rng.uniform(-3, 3, size=rows.size)
+            else:
+                rows = cols = np.zeros(0, dtype=int)
+                data = np.zeros(0)
+            if sparse is None:
+                block = np.zeros((num_rows, num_cols))
+                block[rows, cols] = data
+            else:
+                import scipy.sparse
+                block = scipy.sparse.coo_matrix((data, (rows, cols)),
+                                                shape=(num_rows, num_cols)).asformat(sparse)
+            jac[of, wrt] = block
+
+    if extended:
+        _extend(jac, lbs, ubs, onames, vnames, num_phases, num_segments, states, controls,
+                sparse, rng)
+    return jac, lbs, ubs
+
+
+def _extend(jac, lbs, ubs, onames, vnames, num_phases, num_segments, states, controls, sparse,
+            rng):
+    # Dense (or single entry) blocks of the extra rows and columns...
+    def store(block):
+        if sparse is None:
+            return block
+        import scipy.sparse
+        return scipy.sparse.coo_matrix(block).asformat(sparse)
+
+    new_vnames = {}
+    new_onames = {}
+    for p in range(num_phases):
+        path = 'traj.phases.phase{0}'.format(p)
+        t_initial = '{0}.time_extents.t_initial'.format(path)
+        t_duration = '{0}.time_extents.t_duration'.format(path)
+        param = '{0}.design_params.design_parameters:p'.format(path)
+        new_vnames.update({t_initial: p, t_duration: p, param: p})
+        lbs[t_initial], ubs[t_initial] = 0.0, 0.0
+        lbs[t_duration], ubs[t_duration] = 300.0, 10000.0
+        lbs[param], ubs[param] = -1e30, 1e30
+        for st in states:
+            new_onames['{0}.final_boundary_constraints.final_value:{1}'.format(path, st)] = (
+                p, '{0}.indep_states.states:{1}'.format(path, st))
+    new_onames['traj.phases.phase0.timeseries.states:{0}'.format(states[0])] = (
+        0, 'traj.phases.phase0.indep_states.states:{0}'.format(states[0]))
+
+    # Continuity constraints couple the last node of each segment to the first of the next...
+    continuity = {}
+    for p in range(num_phases):
+        path = 'traj.phases.phase{0}'.format(p)
+        for st in states:
+            continuity['{0}.continuity_comp.defect_states:{1}'.format(path, st)] = (
+                p, '{0}.indep_states.states:{1}'.format(path, st), 1.0)
+        for ct in controls:
+            wrt = '{0}.control_group.indep_controls.controls:{1}'.format(path, ct)
+            continuity['{0}.continuity_comp.defect_controls:{1}'.format(path, ct)] = (p, wrt, 1.0)
+            continuity['{0}.continuity_comp.defect_control_rates:{1}_rate'.format(path, ct)] = (
+                p, wrt, 10.0 ** rng.uniform(1, 3))
+
+    for wrt, wrt_phase in new_vnames.items():
+        for of, (of_phase, num_rows) in onames.items():
+            block = np.zeros((num_rows, 1))
+            if of_phase == wrt_phase and not wrt.endswith('t_initial'):
+                block[:, 0] = 10.0 ** rng.uniform(-5, 1, size=num_rows)
+            jac[of, wrt] = store(block)
+    for of, (of_phase, state) in new_onames.items():
+        for wrt, (wrt_phase, num_cols) in vnames.items():
+            block = np.zeros((1, num_cols))
+            if wrt == state:
+                block[0, -1] = 1.0
+            jac[of, wrt] = store(block)
+        for wrt in new_vnames:
+            jac[of, wrt] = store(np.zeros((1, 1)))
+
+    num_rows = num_segments - 1
+    for of, (of_phase, var, scale) in continuity.items():
+        for wrt, (wrt_phase, num_cols) in vnames.items():
+            block = np.zeros((num_rows, num_cols))
+            if wrt == var:
+                nodes_per_seg = num_cols // num_segments
+                seg = np.arange(num_rows)
+                block[seg, (seg + 1) * nodes_per_seg - 1] = -scale
+                block[seg, (seg + 1) * nodes_per_seg] = scale
+            jac[of, wrt] = store(block)
+        for wrt, wrt_phase in new_vnames.items():
+            block = np.zeros((num_rows, 1))
+            if wrt_phase == of_phase and wrt.endswith('t_duration') and 'rates' in of:
+                block[:, 0] = 10.0 ** rng.uniform(-3, -1, size=num_rows)
+            jac[of, wrt] = store(block)
@@ -0,0 +1,241 @@
+"""Define the autoscaling command, which computes scale factors for a directory of archives offline.
+
+Each archive written by save_archive() in the input directory is scaled in a separate worker
+process, and its reference values are written next to it (or to the output directory) as a
+compressed .npz file that load_refs() reads back, e.g.
+
+    autoscaling captured/ --scaler pjrn --output scaled/ --workers 8
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Maps each scaler choice to the name of its class in autoscaling.api. Only scalers that work
+# from jacobian and bounds information alone (not from a live problem) can be used offline...
+SCALERS = {
+    'iso': 'IsoScaler',
+    'pjrn': 'PJRNScaler',
+    'ruiz': 'RuizScaler',
+    'curtis-reid': 'CurtisReidScaler',
+}
+
+# Maps each scaler choice to the optional dependency it needs, and the extra installing it...
+_REQUIREMENTS = {
+    'curtis-reid': ('scipy', 'sparse'),
+}
+
+# Scalers taking the variable_scaling option...
+_VARIABLE_SCALING_SCALERS = ('iso', 'pjrn')
+
+# Scalers taking the objectives option. Archives do not record which responses are
+# objectives, so they must be named on the command line...
+_OBJECTIVE_SCALERS = ('pjrn',)
+
+ARCHIVE_PATTERN = '*.asarc'
+RESULT_SUFFIX = '.refs.npz'
+
+
+def scale_archive(archive_path, result_path, scaler, **kwargs):
+    """
+    Compute the scale factors of one archive and write them to a result file.
+
+    Parameters
+    ----------
+    archive_path : str
+        Path of an archive written by save_archive().
+    result_path : str
+        Path of the result file to write (see save_refs()).
+    scaler : str
+        Key of the scaler in SCALERS.
+    **kwargs : dict
+        Additional keyword arguments passed to the scaler.
+
+    Returns
+    -------
+    dict
+        Summary holding the 'archive' and 'result' paths, the number of 'refs' and the
+        'seconds' taken.
+    """
+    # Import here, so that each worker only pays for what it needs...
+    from autoscaling import api
+    from autoscaling.core.cache import save_refs
+    from autoscaling.utils.archive import load_archive
+
+    t0 = time.perf_counter()
+    scaler_class = getattr(api, SCALERS[scaler])
+    jac, lbs, ubs = load_archive(archive_path)
+    sc = scaler_class(jac, lbs, ubs, **kwargs)
+    save_refs(result_path, sc.refs, sc.ref0s, sc.defect_refs, compress=True)
+    return {'archive': archive_path, 'result': result_path, 'refs': len(sc.refs),
+            'seconds': time.perf_counter() - t0}
+
+
+def result_path_for(archive_path, output=None):
+    """
+    Get the path of the result file of the given archive.
+
+    Parameters
+    ----------
+    archive_path : str
+        Path of an archive.
+    output : str or None
+        Output directory. Defaults to the directory of the archive.
+
+    Returns
+    -------
+    str
+        Path of the result file, named after the archive with RESULT_SUFFIX.
+    """
+    directory, name = os.path.split(archive_path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(output if output is not None else directory, stem + RESULT_SUFFIX)
+
+
+def run(directory, scaler, output=None, pattern=ARCHIVE_PATTERN, workers=None, overwrite=False,
+        **kwargs):
+    """
+    Compute the scale factors of every archive in the given directory in a process pool.
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the archives.
+    scaler : str
+        Key of the scaler in SCALERS.
+    output : str or None
+        Directory to which result files are written. Defaults to the input directory.
+    pattern : str
+        Glob pattern of the archive file names.
+    workers : int or None
+        Maximum number of worker processes. Defaults to the number of CPUs. With 1, the archives
+        are scaled in this process.
+    overwrite : bool
+        If False, archives whose result file already exists are skipped.
+    **kwargs : dict
+        Additional keyword arguments passed to the scaler.
+
+    Returns
+    -------
+    list of dict
+        One summary per archive, in file name order (see scale_archive()). Skipped archives
+        have 'skipped' set, and failed ones have 'error' set to the error message.
+    """
+    assert(scaler in SCALERS), 'scaler must be one of {0}.'.format(sorted(SCALERS))
+    if output is not None and not os.path.isdir(output):
+        os.makedirs(output)
+
+    jobs = []
+    results = {}
+    for archive_path in sorted(glob.glob(os.path.join(directory, pattern))):
+        result_path = result_path_for(archive_path, output)
+        if not overwrite and os.path.exists(result_path):
+            results[archive_path] = {'archive': archive_path, 'result': result_path,
+                                     'skipped': True}
+        else:
+            jobs.append((archive_path, result_path))
+
+    if workers == 1 or len(jobs) <= 1:
+        for archive_path, result_path in jobs:
+            try:
+                results[archive_path] = scale_archive(archive_path, result_path, scaler, **kwargs)
+            except Exception as err:
+                results[archive_path] = _failure(archive_path, result_path, err)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(archive_path, result_path,
+                        pool.submit(scale_archive, archive_path, result_path, scaler, **kwargs))
+                       for archive_path, result_path in jobs]
+            for archive_path, result_path, future in futures:
+                try:
+                    results[archive_path] = future.result()
+                except Exception as err:
+                    results[archive_path] = _failure(archive_path, result_path, err)
+
+    return [results[archive_path] for archive_path in sorted(results)]
+
+
+def _failure(archive_path, result_path, err):
+    return {'archive': archive_path, 'result': result_path,
+            'error': '{0}: {1}'.format(type(err).__name__, err)}
+
+
+def main(argv=None):
+    """
+    Run the autoscaling command.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. Defaults to sys.argv[1:].
+
+    Returns
+    -------
+    int
+        Exit status: 0 if every archive was scaled (or skipped), 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='autoscaling', description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help='Directory holding the archives.')
+    parser.add_argument('--scaler', choices=sorted(SCALERS), default='pjrn',
+                        help='Scaling method (curtis-reid needs scipy, installed by the '
+                             'autoscaling[sparse] extra).')
+    parser.add_argument('--variable-scaling', choices=('bounds', 'jacobian'), default=None,
+                        help='Variable scaling mode of the iso and pjrn scalers.')
+    parser.add_argument('--objective', action='append', default=None, metavar='NAME',
+                        help='Global name of an objective whose row the pjrn scaler scales '
+                             '(may be repeated).')
+    parser.add_argument('--output', default=None,
+                        help='Directory to which result files are written '
+                             '(defaults to the input directory).')
+    parser.add_argument('--pattern', default=ARCHIVE_PATTERN,
+                        help='Glob pattern of the archive file names.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (defaults to the number of CPUs).')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Scale archives whose result file already exists again.')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error('{0} is not a directory.'.format(args.directory))
+    if args.scaler in _REQUIREMENTS:
+        module, extra = _REQUIREMENTS[args.scaler]
+        if importlib.util.find_spec(module) is None:
+            parser.error('The {0} scaler needs {1}, which is not installed. Install it with '
+                         'pip install autoscaling[{2}].'.format(args.scaler, module, extra))
+    kwargs = {}
+    if args.variable_scaling is not None:
+        if args.scaler not in _VARIABLE_SCALING_SCALERS:
+            parser.error('--variable-scaling only applies to the {0} scalers.'.format(
+                ' and '.join(_VARIABLE_SCALING_SCALERS)))
+        kwargs['variable_scaling'] = args.variable_scaling
+    if args.objective is not None:
+        if args.scaler not in _OBJECTIVE_SCALERS:
+            parser.error('--objective only applies to the {0} scaler.'.format(
+                ' and '.join(_OBJECTIVE_SCALERS)))
+        kwargs['objectives'] = args.objective
+
+    results = run(args.directory, args.scaler, output=args.output, pattern=args.pattern,
+                  workers=args.workers, overwrite=args.overwrite, **kwargs)
+
+    failed = 0
+    for record in results:
+        name = os.path.basename(record['archive'])
+        if 'error' in record:
+            failed += 1
+            print('{0}: failed ({1})'.format(name, record['error']), file=sys.stderr)
+        elif record.get('skipped'):
+            print('{0}: skipped, {1} exists'.format(name, record['result']))
+        else:
+            print('{0}: {1} refs in {2:.3f} s -> {3}'.format(name, record['refs'],
+                                                             record['seconds'], record['result']))
+    if not results:
+        print('No archives matching {0} in {1}.'.format(args.pattern, args.directory))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,55 +1,178 @@
-"""Define the autoscale() method."""
+"""Define the autoscale() method.
 
-import dymos as dm
-import openmdao.api as om
+Dymos and OpenMDAO are only imported when autoscale() is first called, so that importing this
+module (and autoscaling.api) stays cheap for processes that only compute scale factors.
+"""
 
-from autoscaling.core.autoscaler import AutoScaler
+from functools import lru_cache
 
+import numpy as np
 
-def autoscale(prob, autoscaler):
+from autoscaling.core.autoscaler import INFINITE_BOUND, AutoScaler
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.names import (CONTINUITY_KINDS, CONTROL, CONTROL_CONTINUITY,
+                                    CONTROL_RATE_CONTINUITY, DESIGN_PARAMETER, FINAL_BOUNDARY, INITIAL_BOUNDARY, PATH,
+                                    STATE, STATE_CONTINUITY, TIME, parse_name)
+
+
+def autoscale(prob, autoscaler, setup=True):
     """
     Scale the given problem using the scaling data encapsulated by the given autoscaler helper object.
 
     Parameters
     ----------
     prob : Problem
-        Dymos problem to be scaled. Should be single-phase and dynamically-constrained.
+        Dymos problem to be scaled. Should be dynamically-constrained. The linkage constraints
+        between the phases of any trajectory are scaled from the scaling of the linked variables.
     autoscaler : AutoScaler
         Autoscaling helper object.
+    setup : bool
+        If True, the problem is set up again after the phase options are updated. If False, the
+        problem must already be set up; the new reference values are then pushed directly into
+        its existing design variable and constraint scaling metadata, which avoids a second
+        call to setup() and keeps any values that have already been set. Either way, the
+        continuity constraints, which Dymos has no per-row scaling options for, get their
+        per-row reference values pushed into the constraint metadata.
     """
     if autoscaler is None:
         return
     assert(isinstance(autoscaler, AutoScaler))
-    _set_refs(prob.model, autoscaler)
-    prob.setup()
+    with stage('autoscale'):
+        with stage('parse_names'):
+            phases = _find_phases(prob.model)
+            index = _index_by_phase(phases, autoscaler)
+        with stage('set_refs'):
+            applied = _set_refs(prob.model, index)
+        if setup:
+            with stage('setup'):
+                prob.setup()
+            # Push the per-row continuity refs into the new metadata, as when
+            # scaling in place, so that both paths scale them the same...
+            with stage('apply_in_place'):
+                _apply_in_place(prob, {nm: pair for nm, pair in applied.items()
+                                       if parse_name(nm).kind in CONTINUITY_KINDS})
+        else:
+            with stage('apply_in_place'):
+                _apply_in_place(prob, applied)
+
+
+@lru_cache(maxsize=None)
+def _system_types():
+    import dymos as dm
+    import openmdao.api as om
+    return dm.Phase, om.Group, dm.Trajectory
+
+
+def _find_phases(sys, phases=None):
+    Phase, Group, _ = _system_types()
+    if phases is None:
+        phases = []
+    if isinstance(sys, Phase):
+        phases.append(sys)
+    elif isinstance(sys, Group):
+        for subsys in sys._loc_subsys_map:
+            _find_phases(getattr(sys, subsys), phases)
+    return phases
 
 
-def _set_refs(sys, sc):
-    if isinstance(sys, dm.Phase):
-        _set_phase_refs(sys, sc)
-    elif isinstance(sys, om.Group):
+def _set_refs(sys, index, applied=None):
+    Phase, Group, Trajectory = _system_types()
+    if applied is None:
+        applied = {}
+    if isinstance(sys, Phase):
+        applied.update(_set_phase_refs(sys, index[sys.pathname]))
+    elif isinstance(sys, Group):
         for subsys in sys._loc_subsys_map:
-            _set_refs(getattr(sys, subsys), sc)
+            _set_refs(getattr(sys, subsys), index, applied)
+        if isinstance(sys, Trajectory):
+            applied.update(_set_linkage_refs(sys, index))
+    return applied
 
 
-def _set_phase_refs(phase, sc):
-    # Get relevant times, states, controls
-    loc_times = phase_times(phase, sc)
-    loc_states = _phase_states(phase, sc)
-    loc_controls = _phase_controls(phase, sc)
+# Maps the kind of a global name in an autoscaler's refs to the key of its group in the
+# entries of its phase (see _index_by_phase()). Objectives are not recognizable by name
+# alone, so names of any other kind are grouped as candidate objectives...
+_GROUPS = {
+    TIME: 'times',
+    STATE: 'states',
+    CONTROL: 'controls',
+    DESIGN_PARAMETER: 'design_parameters',
+    PATH: 'path_constraints',
+    INITIAL_BOUNDARY: 'initial_boundary_constraints',
+    FINAL_BOUNDARY: 'final_boundary_constraints',
+    STATE_CONTINUITY: 'state_continuity',
+    CONTROL_CONTINUITY: 'control_continuity',
+    CONTROL_RATE_CONTINUITY: 'control_rate_continuity',
+}
+_OBJECTIVES = 'objectives'
+
+# Kinds of the design variables, whose entries are keyed by local name...
+_VARIABLE_KINDS = (TIME, STATE, CONTROL, DESIGN_PARAMETER)
+
+# Maps a group of constraints to the Phase attribute holding their options...
+_CONSTRAINT_OPTIONS = (
+    ('path_constraints', '_path_constraints'),
+    ('initial_boundary_constraints', '_initial_boundary_constraints'),
+    ('final_boundary_constraints', '_final_boundary_constraints'),
+    (_OBJECTIVES, '_objectives'),
+)
+
+# Suffixes of the local names of control rate continuity constraints, and the prefix of the
+# names of the Dymos control options scaling them...
+_RATE_SUFFIXES = (
+    ('_rate2', 'rate2_continuity'),
+    ('_rate', 'rate_continuity'),
+)
+
+_TINY = np.finfo(float).tiny
+
+
+def _set_phase_refs(phase, entries):
+    """
+    Set the time, state, control, design parameter, constraint and objective scaling options of the given phase.
+
+    Dymos takes a single scaling factor for the continuity constraints of each state or control,
+    so the geometric mean of their per-row reference values is set in the phase options, where
+    the installed Dymos version has such an option (it has none for state continuity). All
+    per-row values are returned, and autoscale() applies them in full to the constraint
+    metadata, whether the problem is set up again or scaled in place.
+
+    Parameters
+    ----------
+    phase : Phase
+        Phase to be scaled.
+    entries : dict
+        Entries of the autoscaler owned by the phase (see _index_by_phase()).
+
+    Returns
+    -------
+    dict
+        Maps the global name of each design variable, constraint and objective whose scaling was
+        set to its (ref, ref0) pair.
+    """
+    names = entries['names']
+    applied = {}
+
+    # Get relevant times, states, controls, design parameters
+    loc_times = entries['times']
+    loc_states = entries['states']
+    loc_controls = entries['controls']
+    loc_params = entries['design_parameters']
 
     # Get refs, ref0s, defect_refs
-    loc_refs = _get_phase_refs(phase, sc)
-    loc_ref0s = _get_phase_ref0s(phase, sc)
-    loc_defect_refs = _get_phase_defect_refs(phase, sc)
+    loc_refs = entries['refs']
+    loc_ref0s = entries['ref0s']
+    loc_defect_refs = entries['defect_refs']
 
     # Set refs, ref0s, defect_refs
     if 't_initial' in loc_times:
         phase.user_time_options['initial_ref'] = loc_refs['t_initial']
         phase.user_time_options['initial_ref0'] = loc_ref0s['t_initial']
+        applied[names['t_initial']] = (loc_refs['t_initial'], loc_ref0s['t_initial'])
     if 't_duration' in loc_times:
         phase.user_time_options['duration_ref'] = loc_refs['t_duration']
         phase.user_time_options['duration_ref0'] = loc_ref0s['t_duration']
+        applied[names['t_duration']] = (loc_refs['t_duration'], loc_ref0s['t_duration'])
     phase.time_options.update(phase.user_time_options)
 
     for st in loc_states:
@@ -57,83 +180,409 @@ def _set_phase_refs(phase, sc):
         phase.user_state_options[st]['ref0'] = loc_ref0s[st]
         phase.user_state_options[st]['defect_ref'] = loc_defect_refs[st]
         phase.state_options[st].update(phase.user_state_options[st])
+        applied[names[st]] = (loc_refs[st], loc_ref0s[st])
+        applied[entries['defect_names'][st]] = (loc_defect_refs[st], 0.0)
 
     for ct in loc_controls:
         phase.user_control_options[ct]['ref'] = loc_refs[ct]
         phase.user_control_options[ct]['ref0'] = loc_ref0s[ct]
         phase.control_options[ct].update(phase.user_control_options[ct])
+        applied[names[ct]] = (loc_refs[ct], loc_ref0s[ct])
 
+    for dp in loc_params:
+        if dp not in phase.user_design_parameter_options:
+            continue
+        phase.user_design_parameter_options[dp]['ref'] = loc_refs[dp]
+        phase.user_design_parameter_options[dp]['ref0'] = loc_ref0s[dp]
+        phase.design_parameter_options[dp].update(phase.user_design_parameter_options[dp])
+        applied[names[dp]] = (loc_refs[dp], loc_ref0s[dp])
 
-def phase_times(phase, sc):
+    # Path and boundary constraints and objectives are keyed by the name given by the user,
+    # which may be a dotted ODE output path, or may have been renamed...
+    for group, attr in _CONSTRAINT_OPTIONS:
+        loc_names = entries[group]
+        for name, options in getattr(phase, attr, {}).items():
+            loc_nm = options.get('constraint_name') or name.rsplit('.', 1)[-1]
+            if loc_nm not in loc_names:
+                continue
+            global_nm = loc_names[loc_nm]
+            ref, ref0 = loc_refs[global_nm], loc_ref0s.get(global_nm, 0.0)
+            options['ref'] = ref
+            options['ref0'] = ref0
+            # OpenMDAO does not accept a scaler or adder along with ref or ref0...
+            for key in ('scaler', 'adder'):
+                if key in options:
+                    options[key] = None
+            applied[global_nm] = (ref, ref0)
+
+    # Continuity constraints...
+    for loc_nm, global_nm in entries['state_continuity'].items():
+        if loc_nm in phase.user_state_options:
+            _set_continuity_option(phase.user_state_options[loc_nm], phase.state_options[loc_nm],
+                                   'continuity', loc_refs[global_nm])
+        applied[global_nm] = (loc_refs[global_nm], 0.0)
+    for loc_nm, global_nm in entries['control_continuity'].items():
+        if loc_nm in phase.user_control_options:
+            _set_continuity_option(phase.user_control_options[loc_nm],
+                                   phase.control_options[loc_nm], 'continuity',
+                                   loc_refs[global_nm])
+        applied[global_nm] = (loc_refs[global_nm], 0.0)
+    for loc_nm, global_nm in entries['control_rate_continuity'].items():
+        for suffix, prefix in _RATE_SUFFIXES:
+            if loc_nm.endswith(suffix):
+                ct = loc_nm[:-len(suffix)]
+                if ct in phase.user_control_options:
+                    _set_continuity_option(phase.user_control_options[ct],
+                                           phase.control_options[ct], prefix,
+                                           loc_refs[global_nm])
+                break
+        applied[global_nm] = (loc_refs[global_nm], 0.0)
+
+    return applied
+
+
+def _set_continuity_option(user_options, options, prefix, refs):
     """
-    Gets set of local names corresponding to time information relative to phase.
-    Resulting set contains 't_initial', 't_duration', both, or neither.
+    Set the <prefix>_ref or, failing that, <prefix>_scaler option of a state or control, if declared.
     """
-    times = set()
-    for nm in sc.refs:
-        if phase.pathname in nm:
-            if 't_initial' in nm:
-                assert('t_initial' not in times)
-                times.add('t_initial')
-            elif 't_duration' in nm:
-                assert('t_duration' not in times)
-                times.add('t_duration')
-    return times
+    ref = float(np.exp(np.mean(np.log(np.maximum(np.ravel(refs), _TINY)))))
+    if prefix + '_ref' in options:
+        user_options[prefix + '_ref'] = ref
+    elif prefix + '_scaler' in options:
+        user_options[prefix + '_scaler'] = 1.0 / ref
+    else:
+        return
+    options.update(user_options)
 
 
-def _phase_states(phase, sc):
+def _set_linkage_refs(traj, index):
     """
-    Gets set of local names corresponding to phase states.
+    Set the scaling options of the linkage constraints of the given trajectory from the scaling of the linked variables.
+
+    A linkage constraint x_a - x_b = 0 between variables whose ranges (ref - ref0) are Kv_a and
+    Kv_b has the scaled jacobian row [Kv_a, -Kv_b], so its PJRN reference value is
+    sqrt(Kv_a**2 + Kv_b**2). The initial time of a phase is its t_initial and its final time
+    t_initial + t_duration, so the range of a final time combines both of theirs. Linkages of
+    variables that were not scaled (e.g. of unscaled phases, or of ODE outputs) are left as they
+    are. The ref option of a linkage is only set where the installed Dymos version declares it.
+
+    Parameters
+    ----------
+    traj : Trajectory
+        Trajectory whose linkages are to be scaled.
+    index : dict
+        Entries of the autoscaler, grouped by owning phase (see _index_by_phase()).
+
+    Returns
+    -------
+    dict
+        Maps the global name of each linkage constraint found among the responses declared on
+        the trajectory's subsystems to its (ref, ref0) pair.
     """
-    states = set()
-    for nm in sc.refs:
-        if phase.pathname in nm:
-            if sc.is_state_name(nm):
-                loc_nm = sc.local_var_name(nm)
-                assert(loc_nm not in states)
-                states.add(loc_nm)
-    return states
+    refs = {}
+    for (phase_a, phase_b), links in getattr(traj, '_linkages', {}).items():
+        for var_pair, options in links.items():
+            var_a, var_b = (var_pair, var_pair) if isinstance(var_pair, str) else var_pair
+            loc_a, loc_b = _linkage_locs(options)
+            kv_a = _linked_range(index.get(_linked_phase_path(traj, phase_a)), var_a, loc_a)
+            kv_b = _linked_range(index.get(_linked_phase_path(traj, phase_b)), var_b, loc_b)
+            if kv_a is None or kv_b is None:
+                continue
+            ref = np.sqrt(kv_a**2 + kv_b**2)
+            ref = float(ref) if ref.size == 1 else ref
+            if 'ref' in options:
+                options['ref'] = ref
+                if 'ref0' in options:
+                    options['ref0'] = 0.0
+                # OpenMDAO does not accept a scaler or adder along with ref or ref0...
+                for key in ('scaler', 'adder'):
+                    if key in options:
+                        options[key] = None
+            refs[phase_a, phase_b, var_a, var_b] = ref
 
+    applied = {}
+    if not refs:
+        return applied
+    for system in traj.system_iter(include_self=False, recurse=True):
+        for prom in system._responses:
+            nm = '{0}.{1}'.format(system.pathname, prom)
+            if 'linkages' not in nm:
+                continue
+            key = _match_linkage(nm.rsplit('.', 1)[-1], refs)
+            if key is not None:
+                applied[nm] = (refs[key], 0.0)
+    return applied
 
-def _phase_controls(phase, sc):
+
+def _linked_phase_path(traj, phase_name):
+    phase = getattr(traj, '_phases', {}).get(phase_name)
+    if phase is not None and phase.pathname:
+        return phase.pathname
+    prefix = traj.pathname + '.' if traj.pathname else ''
+    return '{0}phases.{1}'.format(prefix, phase_name)
+
+
+def _linkage_locs(options):
     """
-    Gets set of local names corresponding to phase controls.
+    Get the locations ('initial' or 'final') of the linked variables of phases a and b.
     """
-    controls = set()
-    for nm in sc.refs:
-        if phase.pathname in nm:
-            if sc.is_control_name(nm):
-                loc_nm = sc.local_var_name(nm)
-                assert(loc_nm not in controls)
-                controls.add(loc_nm)
-    return controls
+    if 'loc_a' in options or 'loc_b' in options:
+        return options.get('loc_a', 'final'), options.get('loc_b', 'initial')
+    # Older Dymos versions give a pair of codes, whose sign is '-' at the
+    # start of a phase and '+' at its end...
+    locs = options.get('locs', ('++', '--'))
+    return tuple('initial' if loc.startswith('-') else 'final' for loc in locs)
 
 
-def _get_phase_refs(phase, sc):
-    refs = {}
+def _linked_range(entries, var, loc='final'):
+    """
+    Get the range (ref - ref0) of the given linked variable of a phase at the given location, or None if it was not scaled.
+    """
+    if entries is None:
+        return None
+    loc_nm = var.rsplit(':', 1)[-1]
+    if loc_nm == 'time':
+        # The initial time is t_initial, and the final time t_initial + t_duration, so
+        # the ranges of those that are design variables are combined...
+        times = ('t_initial',) if loc == 'initial' else ('t_initial', 't_duration')
+        kvs = [_range(entries, t) for t in times if t in entries['times']]
+        if not kvs:
+            return None
+        kv = np.sqrt(sum(kv**2 for kv in kvs))
+    elif any(loc_nm in entries[group] for group in ('states', 'controls', 'design_parameters')):
+        kv = _range(entries, loc_nm)
+    else:
+        return None
+    return np.where(kv > 0, kv, 1.0)
+
+
+def _range(entries, loc_nm):
+    return np.abs(np.asarray(entries['refs'][loc_nm], dtype=float) -
+                  np.asarray(entries['ref0s'][loc_nm], dtype=float))
+
+
+def _match_linkage(name, keys):
+    """
+    Find the linkage whose phase and variable names are those parsed from the given constraint name.
+
+    How linkage constraints are named differs between Dymos versions, e.g.
+    'phase0:x_final|phase1:x_initial' or 'phase0|phase1_x', so the name is split into phase and
+    variable tokens, which must equal those of the linkage ('phase1' does not match 'phase10',
+    nor 'x' match 'x_dot').
+    """
+    side_a, sep, side_b = name.partition('|')
+    if not sep:
+        return None
+    tokens = {key: tuple(part.rsplit(':', 1)[-1] for part in key) for key in keys}
+
+    if ':' in side_a and ':' in side_b:
+        # e.g. 'phase0:x_final|phase1:x_initial'...
+        phase_a, var_a = side_a.split(':', 1)
+        phase_b, var_b = side_b.split(':', 1)
+        parsed = [(phase_a, phase_b, _strip_linkage_loc(var_a), _strip_linkage_loc(var_b))]
+    else:
+        # e.g. 'phase0|phase1_x', where both names may hold underscores, so
+        # try each known phase name as the prefix...
+        parsed = [(side_a, key[1], side_b[len(key[1]) + 1:], side_b[len(key[1]) + 1:])
+                  for key in tokens.values() if side_b.startswith(key[1] + '_')]
+
+    for key, key_tokens in tokens.items():
+        if key_tokens in parsed:
+            return key
+    return None
+
+
+def _strip_linkage_loc(var):
+    for loc in ('_initial', '_final'):
+        if var.endswith(loc):
+            return var[:-len(loc)]
+    return var
+
+
+def _index_by_phase(phases, sc):
+    """
+    Group the entries of the given autoscaler by owning phase in a single pass over its dicts.
+
+    A global name is owned by the phase path parsed from it (see parse_name()) or, failing
+    that, by the phase whose pathname is its longest dotted prefix, so 'traj.phase1' owns
+    'traj.phase1.states:x' but not 'traj.phase10.states:x'.
+
+    Parameters
+    ----------
+    phases : list of Phase
+        Phases of the model being scaled.
+    sc : AutoScaler
+        Autoscaling helper object.
+
+    Returns
+    -------
+    dict
+        Maps each phase pathname to a dict holding the local 'times', 'states', 'controls' and
+        'design_parameters' name sets, the 'path_constraints', 'initial_boundary_constraints',
+        'final_boundary_constraints', 'state_continuity', 'control_continuity',
+        'control_rate_continuity' and 'objectives' dicts mapping local names to global ones,
+        the 'refs', 'ref0s' and 'defect_refs' dicts of that phase (keyed by local name for
+        variables and defects, and by global name for constraints and objectives, whose local
+        names may clash with those of variables), and the 'names' and 'defect_names' dicts
+        mapping local variable names back to global names.
+    """
+    index = {}
+    for phase in phases:
+        index[phase.pathname] = {'times': set(), 'states': set(), 'controls': set(),
+                                 'design_parameters': set(), 'path_constraints': {},
+                                 'initial_boundary_constraints': {},
+                                 'final_boundary_constraints': {}, 'state_continuity': {},
+                                 'control_continuity': {}, 'control_rate_continuity': {},
+                                 _OBJECTIVES: {},
+                                 'refs': {}, 'ref0s': {}, 'defect_refs': {},
+                                 'names': {}, 'defect_names': {}}
+
     for nm in sc.refs:
-        if phase.pathname in nm:
-            loc_nm = sc.local_var_name(nm)
-            assert(loc_nm not in refs)
-            refs[loc_nm] = sc.refs[nm]
-    return refs
-
-
-def _get_phase_ref0s(phase, sc):
-    ref0s = {}
-    for nm in sc.ref0s:
-        if phase.pathname in nm:
-            loc_nm = sc.local_var_name(nm)
-            assert(loc_nm not in ref0s)
-            ref0s[loc_nm] = sc.ref0s[nm]
-    return ref0s
-
-
-def _get_phase_defect_refs(phase, sc):
-    defect_refs = {}
-    for nm in sc.defect_refs:
-        if phase.pathname in nm:
-            loc_nm = sc.local_var_name(nm)
-            assert(loc_nm not in defect_refs)
-            defect_refs[loc_nm] = sc.defect_refs[nm]
-    return defect_refs
+        rec = parse_name(nm)
+        owner = _owning_phase(rec, index)
+        if owner is None:
+            continue
+        loc_nm = rec.local
+        group = owner[_GROUPS.get(rec.kind, _OBJECTIVES)]
+        if rec.kind not in _VARIABLE_KINDS:
+            group.setdefault(loc_nm, nm)
+            owner['refs'][nm] = sc.refs[nm]
+            continue
+        assert(loc_nm not in group)
+        group.add(loc_nm)
+        assert(loc_nm not in owner['refs'])
+        owner['refs'][loc_nm] = sc.refs[nm]
+        owner['names'][loc_nm] = nm
+
+    for key, refs in (('ref0s', sc.ref0s), ('defect_refs', sc.defect_refs)):
+        for nm in refs:
+            rec = parse_name(nm)
+            owner = _owning_phase(rec, index)
+            if owner is None:
+                continue
+            loc_nm = rec.local
+            if key == 'ref0s' and rec.kind not in _VARIABLE_KINDS:
+                owner[key][nm] = refs[nm]
+                continue
+            assert(loc_nm not in owner[key])
+            owner[key][loc_nm] = refs[nm]
+            if key == 'defect_refs':
+                owner['defect_names'][loc_nm] = nm
+
+    return index
+
+
+def _owning_phase(rec, index):
+    # The parsed phase path is usually the owning phase itself; otherwise
+    # fall back to the longest dotted prefix of the name that is a phase...
+    owner = index.get(rec.phase)
+    if owner is not None:
+        return owner
+    prefix = rec.name
+    while '.' in prefix:
+        prefix = prefix.rsplit('.', 1)[0]
+        if prefix in index:
+            return index[prefix]
+    return index.get('')
+
+
+def _apply_in_place(prob, applied):
+    """
+    Push the given reference values into the scaling metadata of an already set-up problem.
+
+    Both the metadata declared on the model's systems (which the driver rereads during
+    final_setup()) and the driver's own copies (if it has already been set up) are updated.
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem that has already been set up.
+    applied : dict
+        Maps the global name of a design variable or constraint to its new (ref, ref0) pair.
+    """
+    rescaled = set()
+
+    for system in prob.model.system_iter(include_self=True, recurse=True):
+        prom2abs = system._var_allprocs_prom2abs_list['output']
+        for metadata in (system._design_vars, system._responses):
+            for prom, meta in metadata.items():
+                names = [prom]
+                if system.pathname:
+                    names.append('{0}.{1}'.format(system.pathname, prom))
+                if prom in prom2abs:
+                    names.append(prom2abs[prom][0])
+                for nm in names:
+                    if nm in applied:
+                        _rescale_meta(meta, applied[nm], rescaled)
+                        break
+
+    driver = prob.driver
+    for attr in ('_designvars', '_cons', '_responses'):
+        metadata = getattr(driver, attr, None) or {}
+        for nm, meta in metadata.items():
+            if nm in applied:
+                _rescale_meta(meta, applied[nm], rescaled)
+            elif meta.get('name') in applied:
+                _rescale_meta(meta, applied[meta['name']], rescaled)
+
+    if rescaled and hasattr(driver, '_has_scaling'):
+        driver._has_scaling = True
+    if hasattr(driver, '_total_jac'):
+        driver._total_jac = None
+
+
+def _rescale_meta(meta, ref_pair, rescaled):
+    # The same metadata dict may be shared between a system and the driver,
+    # so make sure it is only ever rescaled once...
+    if id(meta) in rescaled:
+        return
+    rescaled.add(id(meta))
+
+    ref, ref0 = ref_pair
+    ref = np.asarray(ref, dtype=float)
+    ref0 = np.asarray(ref0, dtype=float)
+
+    # Same convention as OpenMDAO: scaled = (physical + adder) * scaler...
+    adder = -ref0
+    scaler = 1.0 / (ref + adder)
+
+    old_scaler = 1.0 if meta.get('scaler') is None else meta['scaler']
+    old_adder = 0.0 if meta.get('adder') is None else meta['adder']
+
+    # Bounds are stored scaled, so unscale them with the old factors and
+    # rescale them with the new ones. Missing bounds are stored as
+    # +/-INF_BOUND (scaled or not, depending on the OpenMDAO version), and
+    # must stay that way...
+    for key in ('lower', 'upper', 'equals'):
+        if meta.get(key) is not None:
+            old = np.asarray(meta[key], dtype=float)
+            physical = old / old_scaler - old_adder
+            missing = (np.abs(old) >= INFINITE_BOUND) | (np.abs(physical) >= INFINITE_BOUND)
+            bound = np.where(missing, old, (physical + adder) * scaler)
+            meta[key] = bound if bound.ndim else bound[()]
+
+    # With units, OpenMDAO folds the conversion to them, user = (model + offset) * factor, into
+    # the total scaler and adder, so recover it from the old factors and fold it into the new...
+    if 'total_scaler' in meta:
+        # No total scaler means neither scaling nor a unit conversion...
+        factor, offset = 1.0, 0.0
+        if meta['total_scaler'] is not None:
+            factor = meta['total_scaler'] / old_scaler
+            total_adder = 0.0 if meta.get('total_adder') is None else meta['total_adder']
+            offset = total_adder - old_adder / factor
+        meta['total_scaler'] = scaler * factor
+        meta['total_adder'] = offset + adder / factor
+
+    meta['scaler'] = scaler
+    meta['adder'] = adder
+    if 'ref' in meta:
+        meta['ref'] = ref
+        meta['ref0'] = ref0
+
+
+def phase_times(phase, sc):
+    """
+    Gets set of local names corresponding to time information relative to phase.
+    Resulting set contains 't_initial', 't_duration', both, or neither.
+    """
+    return _index_by_phase([phase], sc)[phase.pathname]['times']
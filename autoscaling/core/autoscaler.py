@@ -4,6 +4,21 @@ from __future__ import print_function
 
 from abc import ABC
 
+import numpy as np
+
+from autoscaling.core.cache import ScaleFactorCache
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.names import (CONTINUITY_KINDS, CONTROL, DEFECT, DESIGN_PARAMETER,
+                                    FINAL_BOUNDARY, INITIAL_BOUNDARY, PATH,
+                                    SCALED_CONSTRAINT_KINDS, STATE, TIME, parse_name)
+from autoscaling.core.refstore import RefStore
+
+# Bounds at least this large in magnitude are treated as missing (OpenMDAO's convention)...
+INFINITE_BOUND = 1e20
+
+# Ways in which scalers may derive the refs and ref0s of states and controls...
+VARIABLE_SCALINGS = ('bounds', 'jacobian')
+
 
 class AutoScaler(ABC):
     """
@@ -11,14 +26,22 @@ class AutoScaler(ABC):
 
     Attributes
     ----------
-    refs : dict
+    refs : RefStore
         Maps a variable's global name to its ref value.
-    ref0s : dict
+    ref0s : RefStore
         Maps a variable's global name to its ref0 value.
-    defect_refs : dict
+    defect_refs : RefStore
         Maps a variable's defect's global name to its defect_ref value.
+    from_cache : bool
+        True if the reference values were loaded from a ScaleFactorCache rather than computed.
+    algorithm_version : int
+        Class attribute that is part of the ScaleFactorCache key. Subclasses bump it whenever
+        the reference values they compute for identical arguments change, so that values
+        cached by earlier versions are not reused.
     """
 
+    algorithm_version = 1
+
     def __init__(self, *argv, **kwargs):
         """
         Instantiate attributes to defaults; initialize.
@@ -29,12 +52,65 @@ class AutoScaler(ABC):
             Additional non-keyword arguments to be passed for initialization (see initialize() method).
         **kwargs : dict
             Additional keyword arguments to be passed for initialization (see initialize() method).
+            The optional keyword argument cache (a ScaleFactorCache or a directory name) is not
+            passed on; if given, refs, ref0s and defect_refs are loaded from the cache when it
+            holds an entry for the same scaler type and argument content, and are stored in it
+            otherwise. Only these three dicts are restored on a cache hit.
+        """
+        cache = kwargs.pop('cache', None)
+
+        self.refs = RefStore()
+        self.ref0s = RefStore()
+        self.defect_refs = RefStore()
+        self.from_cache = False
+
+        if cache is None:
+            with stage('initialize'):
+                self.initialize(*argv, **kwargs)
+            return
+
+        if not isinstance(cache, ScaleFactorCache):
+            cache = ScaleFactorCache(cache)
+        with stage('cache_load'):
+            key = cache.key(type(self), *argv, **kwargs)
+            cached = cache.load(key)
+        if cached is not None:
+            self.refs, self.ref0s, self.defect_refs = (RefStore(refs) for refs in cached)
+            self.from_cache = True
+        else:
+            with stage('initialize'):
+                self.initialize(*argv, **kwargs)
+            with stage('cache_store'):
+                cache.store(key, self.refs, self.ref0s, self.defect_refs)
+
+    @classmethod
+    def from_refs(cls, refs, ref0s, defect_refs):
         """
-        self.refs = {}
-        self.ref0s = {}
-        self.defect_refs = {}
+        Create an instance holding the given, already computed, reference values.
 
-        self.initialize(*argv, **kwargs)
+        initialize() is not called. Dicts are copied into compact RefStores; RefStores are used
+        as they are.
+
+        Parameters
+        ----------
+        refs : dict or RefStore
+            Maps a variable's global name to its ref value.
+        ref0s : dict or RefStore
+            Maps a variable's global name to its ref0 value.
+        defect_refs : dict or RefStore
+            Maps a variable's defect's global name to its defect_ref value.
+
+        Returns
+        -------
+        AutoScaler
+            Instance of this class holding the given reference values.
+        """
+        sc = cls.__new__(cls)
+        sc.refs, sc.ref0s, sc.defect_refs = (
+            values if isinstance(values, RefStore) else RefStore(values)
+            for values in (refs, ref0s, defect_refs))
+        sc.from_cache = False
+        return sc
 
     def list_all_refs(self):
         """
@@ -116,6 +192,40 @@ class AutoScaler(ABC):
         for key in self.defect_refs:
             print(key)
 
+    @staticmethod
+    def is_boundary_constraint_name(global_name):
+        """
+        Return True if the named global variable is an initial or final boundary constraint.
+
+        Parameters
+        ----------
+        global_name : str
+            Global variable name.
+
+        Returns
+        -------
+        bool
+            True if the named global variable is an initial or final boundary constraint.
+        """
+        return parse_name(global_name).kind in (INITIAL_BOUNDARY, FINAL_BOUNDARY)
+
+    @staticmethod
+    def is_continuity_constraint_name(global_name):
+        """
+        Return True if the named global variable is a state, control or control rate continuity constraint.
+
+        Parameters
+        ----------
+        global_name : str
+            Global variable name.
+
+        Returns
+        -------
+        bool
+            True if the named global variable is a continuity constraint.
+        """
+        return parse_name(global_name).kind in CONTINUITY_KINDS
+
     @staticmethod
     def is_control_name(global_name):
         """
@@ -131,7 +241,7 @@ class AutoScaler(ABC):
         bool
             True if the named global variable is a (dynamic) control.
         """
-        return '.controls:' in global_name
+        return parse_name(global_name).kind == CONTROL
 
     @staticmethod
     def is_defect_name(global_name):
@@ -148,7 +258,24 @@ class AutoScaler(ABC):
         bool
             True if the named global variable is a collocation defect constraint.
         """
-        return '.defects:' in global_name
+        return parse_name(global_name).kind == DEFECT
+
+    @staticmethod
+    def is_design_parameter_name(global_name):
+        """
+        Return True if the named global variable is a design parameter.
+
+        Parameters
+        ----------
+        global_name : str
+            Global variable name.
+
+        Returns
+        -------
+        bool
+            True if the named global variable is a design parameter.
+        """
+        return parse_name(global_name).kind == DESIGN_PARAMETER
 
     @staticmethod
     def is_path_constraint_name(global_name):
@@ -165,7 +292,7 @@ class AutoScaler(ABC):
         bool
             True if the named global variable is a path constraint.
         """
-        return '.path:' in global_name
+        return parse_name(global_name).kind == PATH
 
     @staticmethod
     def is_state_name(global_name):
@@ -182,7 +309,52 @@ class AutoScaler(ABC):
         bool
             True if the named global variable is a state.
         """
-        return '.states:' in global_name
+        return parse_name(global_name).kind == STATE
+
+    @staticmethod
+    def is_time_name(global_name):
+        """
+        Return True if the named global variable is the initial time or duration of a phase.
+
+        Parameters
+        ----------
+        global_name : str
+            Global variable name.
+
+        Returns
+        -------
+        bool
+            True if the named global variable is t_initial or t_duration.
+        """
+        return parse_name(global_name).kind == TIME
+
+    @staticmethod
+    def _parse_objective_names_from(jac, objectives=None):
+        """
+        Parse global objective names from given jacobian information.
+
+        Objectives cannot be told apart from other responses by name, so they must be given
+        (e.g. from the driver, see objective_names()). Those that are not "of" names of the
+        jacobian, that are constraints the scalers know of, or that are also design variables
+        are left out (an objective that is itself a design variable, such as t_duration, keeps
+        the scaling of the design variable).
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information.
+        objectives : iterable of str or None
+            Global names of the objectives. If None, there are none.
+        """
+        if objectives is None:
+            return set()
+        ofs = set()
+        wrts = set()
+        for of, wrt in jac:
+            ofs.add(of)
+            wrts.add(wrt)
+        return {of for of in (set(objectives) & ofs) - wrts
+                if parse_name(of).kind not in SCALED_CONSTRAINT_KINDS}
 
     @staticmethod
     def local_defect_name(global_name):
@@ -199,7 +371,7 @@ class AutoScaler(ABC):
         str
             Local name of the named defect.
         """
-        return global_name.split(':')[-1]
+        return parse_name(global_name).local
 
     @staticmethod
     def local_var_name(global_name):
@@ -216,4 +388,76 @@ class AutoScaler(ABC):
         str
             Local name of the named non-defect variable.
         """
-        return global_name.split(':')[-1].split('.')[-1]
+        return parse_name(global_name).local
+
+
+def jacobian_variable_refs(col_sq_sums, num_cols, vnames, lbs, ubs, prefer_bounds=False):
+    """
+    Compute the ref0s and refs of the given variables from the column norms of the constraint jacobian.
+
+    The range ref - ref0 of variable v is the inverse of the root mean square norm of the columns
+    of the constraint jacobian with respect to v, so that its scaled columns have unit norm on
+    average. The ref0 of v is its lower bound, or zero if it has none. Only where the columns of
+    v are all zero does its range fall back to its bounds, or to one if they are not both finite.
+    With prefer_bounds, the roles are swapped: the range is ub - lb wherever both bounds are
+    finite and distinct, and the column norms are only used for the other variables.
+
+    Parameters
+    ----------
+    col_sq_sums : ndarray
+        Sum of the squared entries of the constraint jacobian with respect to each variable (e.g.
+        the column sums of the matrix returned by squared_row_norm_matrix()).
+    num_cols : ndarray
+        Number of jacobian columns (i.e. size) of each variable.
+    vnames : list of str
+        Global names of the variables.
+    lbs : dict
+        Maps a global variable name to its lower bound.
+    ubs : dict
+        Maps a global variable name to its upper bound.
+    prefer_bounds : bool
+        If True, use the bounds wherever they are usable, and the column norms elsewhere.
+
+    Returns
+    -------
+    ndarray
+        The ref0 of each variable.
+    ndarray
+        The ref of each variable.
+    """
+    lb = np.array([lbs[v] for v in vnames], dtype=float)
+    ub = np.array([ubs[v] for v in vnames], dtype=float)
+    lb_finite = np.abs(lb) < INFINITE_BOUND
+    bounded = bounded_variables(vnames, lbs, ubs)
+    ranges = np.where(bounded, ub - lb, 1.0)
+    nonzero = col_sq_sums > 0
+    if prefer_bounds:
+        nonzero &= ~bounded
+    ranges[nonzero] = np.sqrt(num_cols[nonzero] / col_sq_sums[nonzero])
+
+    ref0 = np.where(lb_finite, lb, 0.0)
+    return ref0, ref0 + ranges
+
+
+def bounded_variables(vnames, lbs, ubs):
+    """
+    Find the variables whose bounds are both finite and distinct, and so give a usable range.
+
+    Parameters
+    ----------
+    vnames : list of str
+        Global names of the variables.
+    lbs : dict
+        Maps a global variable name to its lower bound.
+    ubs : dict
+        Maps a global variable name to its upper bound.
+
+    Returns
+    -------
+    ndarray
+        Boolean array, True for each variable whose bounds are both less than INFINITE_BOUND in
+        magnitude and whose upper bound exceeds its lower bound.
+    """
+    lb = np.array([lbs[v] for v in vnames], dtype=float)
+    ub = np.array([ubs[v] for v in vnames], dtype=float)
+    return (np.abs(lb) < INFINITE_BOUND) & (np.abs(ub) < INFINITE_BOUND) & (ub > lb)
@@ -0,0 +1,149 @@
+"""Define the ScalingBatch class, which computes PJRN scale factors for many structurally identical problem variants at once."""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from autoscaling.autoscalers.pjrnscaler import PJRNScaler
+from autoscaling.core.autoscaler import VARIABLE_SCALINGS
+from autoscaling.core.instrumentation import stage
+from autoscaling.core.refstore import RefStore
+
+
+class ScalingBatch(object):
+    """
+    PJRN reference values of N problem variants sharing one structure, computed as stacked arrays.
+
+    The variants must have the same jacobian keys and block shapes (e.g. the same problem with
+    different parameter values or bounds). Names are parsed and the squared row norms computed
+    once per distinct jacobian, exactly as by PJRNScaler, and the reference values of all variants
+    sharing a jacobian are then obtained from a single stacked matrix product. Each variant's
+    scaler holds RefStore views into the stacked arrays, so nothing is copied per variant, and
+    its values are those of PJRNScaler(jac, lb, ub, variable_scaling=variable_scaling,
+    objectives=objectives, scale_times_and_parameters=scale_times_and_parameters).
+
+    Attributes
+    ----------
+    num_variants : int
+        Number of variants.
+    refs_data : ndarray
+        N x (rows + variables) array; row n holds the defect, path, boundary and continuity
+        constraint and objective reference values of variant n followed by its variable refs.
+    ref0s_data : ndarray
+        N x (variables + non-defect rows) array; row n holds the variable ref0s of variant n
+        followed by the ref0s (zero) of its path, boundary and continuity constraints and
+        objectives.
+    variable_scaling : str
+        How the refs and ref0s of the variables are derived (see PJRNScaler.initialize()).
+    """
+
+    def __init__(self, jacs, lbs, ubs, variable_scaling='bounds', objectives=None,
+                 scale_times_and_parameters=False):
+        """
+        Compute the reference values of every variant.
+
+        Parameters
+        ----------
+        jacs : dict or list of dict
+            Jacobian information of each variant, or a single jacobian shared by all of them.
+        lbs : dict or list of dict
+            Lower variable bounds of each variant, or a single dict shared by all of them.
+        ubs : dict or list of dict
+            Upper variable bounds of each variant, or a single dict shared by all of them.
+        variable_scaling : str
+            How the refs and ref0s of the variables are derived ('bounds' or 'jacobian'; see
+            PJRNScaler.initialize()).
+        objectives : iterable of str or None
+            Global names of the objectives whose rows are scaled (see PJRNScaler.initialize()).
+        scale_times_and_parameters : bool
+            If True, the phase times and design parameters are scaled too (see
+            PJRNScaler.initialize()).
+        """
+        assert(variable_scaling in VARIABLE_SCALINGS), \
+            'variable_scaling must be one of {0}.'.format(VARIABLE_SCALINGS)
+        num_variants = max([1] + [len(arg) for arg in (jacs, lbs, ubs)
+                                  if not isinstance(arg, Mapping)])
+        jacs, lbs, ubs = (_per_variant(arg, num_variants) for arg in (jacs, lbs, ubs))
+        self.num_variants = num_variants
+        self.variable_scaling = variable_scaling
+        objectives = None if objectives is None else list(objectives)
+
+        # Parse the names and compute the row norms of each distinct jacobian
+        # only once, sharing PJRNScaler's code path...
+        scalers = {}
+        for jac in jacs:
+            if id(jac) not in scalers:
+                assert(jac is jacs[0] or jac.keys() == jacs[0].keys())
+                sc = PJRNScaler.__new__(PJRNScaler)
+                sc.variable_scaling = variable_scaling
+                sc._prepare(jac, objectives, scale_times_and_parameters)
+                scalers[id(jac)] = sc
+        first = scalers[id(jacs[0])]
+        num_rows = first.row_sq_norms.shape[0]
+        num_vars = len(first._vnames)
+        self._refs_slices, self._ref0s_slices, self._defect_slices = first._layout()
+
+        with stage('update_bounds'):
+            self.refs_data = np.empty((num_variants, num_rows + num_vars))
+            self.ref0s_data = np.zeros((num_variants, len(self._ref0s_slices)))
+            for key, sc in scalers.items():
+                variants = [n for n, jac in enumerate(jacs) if id(jac) == key]
+                for n in variants:
+                    self.ref0s_data[n, :num_vars], self.refs_data[n, num_rows:] = \
+                        sc._variable_refs(lbs[n], ubs[n])
+                Kv_inv = self.refs_data[variants, num_rows:] - self.ref0s_data[variants, :num_vars]
+                self.refs_data[variants, :num_rows] = sc._row_refs(Kv_inv)
+
+    def __len__(self):
+        return self.num_variants
+
+    def __getitem__(self, n):
+        """
+        Get the autoscaler of the given variant.
+
+        Parameters
+        ----------
+        n : int
+            Variant index.
+
+        Returns
+        -------
+        PJRNScaler
+            Autoscaler whose reference values are views into the stacked arrays.
+        """
+        return PJRNScaler.from_refs(RefStore.from_array(self.refs_data[n], self._refs_slices),
+                                    RefStore.from_array(self.ref0s_data[n], self._ref0s_slices),
+                                    RefStore.from_array(self.refs_data[n], self._defect_slices))
+
+    def __iter__(self):
+        for n in range(self.num_variants):
+            yield self[n]
+
+    def apply(self, probs, setup=False):
+        """
+        Scale each given problem with the reference values of the corresponding variant.
+
+        By default the problems are rescaled in place, so the cost per variant stays close to
+        that of updating its scaling metadata, rather than that of a full setup().
+
+        Parameters
+        ----------
+        probs : list of Problem
+            One Dymos problem per variant, in variant order.
+        setup : bool
+            Passed on to autoscale(). If False, the problems must already be set up and are
+            rescaled in place. If True, each of them is set up again.
+        """
+        from autoscaling.core.autoscale import autoscale
+
+        assert(len(probs) == self.num_variants)
+        for prob, sc in zip(probs, self):
+            autoscale(prob, sc, setup=setup)
+
+
+def _per_variant(arg, num_variants):
+    if isinstance(arg, Mapping):
+        return [arg] * num_variants
+    arg = list(arg)
+    assert(len(arg) == num_variants), 'Every per-variant argument needs the same length.'
+    return arg
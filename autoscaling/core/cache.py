@@ -0,0 +1,274 @@
+"""Define the ScaleFactorCache class, a content-addressed on-disk cache of computed reference values."""
+
+import glob
+import hashlib
+import os
+import tempfile
+from collections.abc import Mapping
+
+import numpy as np
+
+from autoscaling.utils.rownorms import is_sparse
+
+# Bump whenever the on-disk format, or the meaning of any cached value, changes. Changes to the
+# values computed by a single scaler class bump its algorithm_version instead...
+_CACHE_VERSION = b'2'
+
+
+class ScaleFactorCache(object):
+    """
+    Content-addressed, size-bounded on-disk cache of AutoScaler reference values.
+
+    Entries are keyed by a hash of the scaler class, its algorithm_version and the full content
+    of its initialization arguments (jacobian blocks, bounds, options), so a cached entry can
+    only be reused for an identical problem scaled by the same algorithm. When the total size of
+    the cache exceeds max_bytes, the least recently used entries are evicted.
+
+    Attributes
+    ----------
+    directory : str
+        Directory holding the cache entries.
+    max_bytes : int
+        Maximum total size of the cache entries, in bytes.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        """
+        Open (and create, if necessary) the cache directory.
+
+        Parameters
+        ----------
+        directory : str
+            Directory holding the cache entries.
+        max_bytes : int
+            Maximum total size of the cache entries, in bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, scaler_class, *argv, **kwargs):
+        """
+        Compute the cache key of the given scaler class and initialization arguments.
+
+        Parameters
+        ----------
+        scaler_class : type
+            AutoScaler subclass.
+        *argv : tuple
+            Non-keyword initialization arguments.
+        **kwargs : dict
+            Keyword initialization arguments.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest identifying the scaler type, its algorithm version and the
+            argument content.
+        """
+        h = hashlib.sha256(_CACHE_VERSION)
+        _hash_update(h, '{0}.{1}'.format(scaler_class.__module__, scaler_class.__name__))
+        _hash_update(h, getattr(scaler_class, 'algorithm_version', None))
+        _hash_update(h, argv)
+        _hash_update(h, kwargs)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key):
+        """
+        Load the reference values stored under the given key.
+
+        Parameters
+        ----------
+        key : str
+            Cache key (see key()).
+
+        Returns
+        -------
+        tuple of dict or None
+            The refs, ref0s and defect_refs dicts, or None on a cache miss.
+        """
+        path = self._path(key)
+        try:
+            loaded = load_refs(path)
+        except (IOError, OSError, KeyError, ValueError):
+            return None
+
+        # Mark as recently used...
+        os.utime(path, None)
+        return loaded
+
+    def store(self, key, refs, ref0s, defect_refs):
+        """
+        Store the given reference values under the given key, evicting old entries if needed.
+
+        Parameters
+        ----------
+        key : str
+            Cache key (see key()).
+        refs : dict
+            Maps a global name to its ref value.
+        ref0s : dict
+            Maps a global name to its ref0 value.
+        defect_refs : dict
+            Maps a global defect name to its defect_ref value.
+        """
+        save_refs(self._path(key), refs, ref0s, defect_refs)
+        self._evict()
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            os.remove(path)
+
+    def _evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def save_refs(path, refs, ref0s, defect_refs, compress=False):
+    """
+    Write the given reference values to a single .npz file.
+
+    Each of the three dicts is packed into one names array, one sizes array and one flat values
+    array, so the file holds a handful of arrays no matter how many names there are, and loading
+    it needs no pickling. The file is written to a temporary file first and then moved into
+    place, so concurrent readers never see a partially written file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to write.
+    refs : dict
+        Maps a global name to its ref value.
+    ref0s : dict
+        Maps a global name to its ref0 value.
+    defect_refs : dict
+        Maps a global defect name to its defect_ref value.
+    compress : bool
+        If True, the arrays are stored compressed.
+    """
+    arrays = {}
+    for kind, values in (('refs', refs), ('ref0s', ref0s), ('defect_refs', defect_refs)):
+        arrays.update(_pack(values, kind))
+
+    save = np.savez_compressed if compress else np.savez
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            save(file, **arrays)
+        # mkstemp() creates files readable by their owner only...
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_refs(path):
+    """
+    Read reference values written by save_refs().
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to read.
+
+    Returns
+    -------
+    tuple of dict
+        The refs, ref0s and defect_refs dicts.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return tuple(_unpack(data, kind) for kind in ('refs', 'ref0s', 'defect_refs'))
+
+
+def _pack(values, kind):
+    names = list(values)
+    arrays = [np.asarray(values[nm], dtype=float) for nm in names]
+    sizes = np.array([a.size for a in arrays], dtype=np.int64)
+    return {kind + '/names': np.array(names, dtype=str),
+            kind + '/sizes': sizes,
+            kind + '/scalar': np.array([a.ndim == 0 for a in arrays], dtype=bool),
+            kind + '/values': np.concatenate([a.ravel() for a in arrays]) if arrays
+            else np.zeros(0)}
+
+
+def _unpack(data, kind):
+    names = data[kind + '/names']
+    sizes = data[kind + '/sizes']
+    scalar = data[kind + '/scalar']
+    values = data[kind + '/values']
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+
+    unpacked = {}
+    for i, nm in enumerate(names):
+        val = values[offsets[i]:offsets[i + 1]]
+        unpacked[str(nm)] = float(val[0]) if scalar[i] else val
+    return unpacked
+
+
+def _hash_update(h, obj):
+    """
+    Feed the content of the given (possibly nested) argument into the given hash object.
+    """
+    if obj is None:
+        h.update(b'n')
+    elif isinstance(obj, (bool, np.bool_)):
+        h.update(b'?' + repr(bool(obj)).encode('utf-8'))
+    elif isinstance(obj, str):
+        h.update(b'u' + repr(str(obj)).encode('utf-8'))
+    elif isinstance(obj, (int, float, np.integer, np.floating)):
+        # Hash numbers by value, so that e.g. a bound of np.float64(1.0) and one of 1.0 match...
+        h.update(b'f' + float(obj).hex().encode('utf-8'))
+    elif isinstance(obj, bytes):
+        h.update(b'b' + obj)
+    elif isinstance(obj, Mapping):
+        # Hash entries in a canonical order so that dict ordering does not matter...
+        h.update(b'm%d' % len(obj))
+        for key in sorted(obj, key=repr):
+            _hash_update(h, key)
+            _hash_update(h, obj[key])
+    elif isinstance(obj, (set, frozenset)):
+        h.update(b'S%d' % len(obj))
+        for item in sorted(obj, key=repr):
+            _hash_update(h, item)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'l%d' % len(obj))
+        for item in obj:
+            _hash_update(h, item)
+    elif is_sparse(obj):
+        coo = obj.tocoo(copy=True)
+        coo.sum_duplicates()
+        h.update(b'c' + repr(coo.shape).encode('utf-8'))
+        _hash_update(h, coo.data)
+        _hash_update(h, coo.row.astype(np.int64))
+        _hash_update(h, coo.col.astype(np.int64))
+    elif isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        h.update(b'a' + arr.dtype.str.encode('utf-8') + repr(arr.shape).encode('utf-8'))
+        h.update(arr.data if arr.dtype != object else repr(arr.tolist()).encode('utf-8'))
+    else:
+        raise TypeError('Cannot compute a cache key for an argument of type '
+                        '{0}.'.format(type(obj).__name__))
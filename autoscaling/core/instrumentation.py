@@ -0,0 +1,273 @@
+"""Define stage-level timing and memory instrumentation of autoscale() and the autoscalers.
+
+Code paths worth measuring are wrapped in stage() blocks, e.g.
+
+    with stage('row_norms'):
+        ...
+
+Stages are free when no instrument() block is active. Inside one, every stage records its wall
+time, its number of calls and (optionally) the peak of traced memory allocated during it, e.g.
+
+    with instrument() as report:
+        sc = PJRNScaler(jac, lbs, ubs)
+        autoscale(prob, sc)
+    print(report)
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Stack of the recorders of the instrument() blocks currently active...
+_recorders = []
+
+
+class StageStats(object):
+    """
+    Accumulated measurements of one instrumented stage.
+
+    Attributes
+    ----------
+    calls : int
+        Number of times the stage was entered.
+    wall_time : float
+        Total wall time spent in the stage, in seconds (including nested stages).
+    peak_memory : int or None
+        Largest peak of traced memory allocated during any single call of the stage, in bytes,
+        relative to the traced memory at its start. None if memory was not traced.
+    """
+
+    def __init__(self):
+        """
+        Initialize all measurements to zero.
+        """
+        self.calls = 0
+        self.wall_time = 0.0
+        self.peak_memory = None
+
+    def to_dict(self):
+        """
+        Get the measurements as a JSON-serializable dict.
+
+        Returns
+        -------
+        dict
+            The calls, wall_time and peak_memory measurements.
+        """
+        return {'calls': self.calls, 'wall_time': self.wall_time,
+                'peak_memory': self.peak_memory}
+
+
+class ScalingReport(object):
+    """
+    Structured report of the stages measured by an instrument() block.
+
+    Attributes
+    ----------
+    stages : dict
+        Maps a stage name to its StageStats, in order of first entry.
+    counters : dict
+        Maps a counter name to its total (see count()).
+    trace_memory : bool
+        True if peaks of traced memory were recorded.
+    """
+
+    def __init__(self, trace_memory=True):
+        """
+        Start an empty report.
+
+        Parameters
+        ----------
+        trace_memory : bool
+            True if peaks of traced memory are recorded.
+        """
+        self.stages = {}
+        self.counters = {}
+        self.trace_memory = trace_memory
+
+    def to_dict(self):
+        """
+        Get the report as a JSON-serializable dict.
+
+        Returns
+        -------
+        dict
+            Holds the 'stages' dict (stage name to measurements) and the 'counters' dict.
+        """
+        return {'stages': {nm: stats.to_dict() for nm, stats in self.stages.items()},
+                'counters': dict(self.counters)}
+
+    def to_json(self, **kwargs):
+        """
+        Get the report as a JSON string.
+
+        Parameters
+        ----------
+        **kwargs : dict
+            Keyword arguments passed to json.dumps().
+
+        Returns
+        -------
+        str
+            The report (see to_dict()) as JSON.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __str__(self):
+        lines = ['{0:<20} {1:>7} {2:>12} {3:>12}'.format('stage', 'calls', 'time [s]',
+                                                         'peak [MB]')]
+        for nm, stats in self.stages.items():
+            peak = '-' if stats.peak_memory is None else '{0:.3f}'.format(stats.peak_memory / 1e6)
+            lines.append('{0:<20} {1:>7d} {2:>12.6f} {3:>12}'.format(nm, stats.calls,
+                                                                      stats.wall_time, peak))
+        for nm, total in self.counters.items():
+            lines.append('{0:<20} {1:>7}'.format(nm, total))
+        return '\n'.join(lines)
+
+
+class _Recorder(object):
+    """
+    Records the stages entered while its instrument() block is active.
+    """
+
+    def __init__(self, report, callback):
+        self.report = report
+        self.callback = callback
+        # Per open stage: [traced memory at start, highest traced peak seen so far]...
+        self.frames = []
+
+    def enter(self, name):
+        if name not in self.report.stages:
+            self.report.stages[name] = StageStats()
+        if self.report.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.frames:
+                # The peak is about to be reset, so fold it into the enclosing stage...
+                self.frames[-1][1] = max(self.frames[-1][1], peak)
+            _reset_peak()
+            self.frames.append([current, current])
+
+    def exit(self, name, elapsed):
+        stats = self.report.stages[name]
+        stats.calls += 1
+        stats.wall_time += elapsed
+
+        peak = None
+        if self.report.trace_memory:
+            start, seen = self.frames.pop()
+            abs_peak = max(seen, tracemalloc.get_traced_memory()[1])
+            if self.frames:
+                self.frames[-1][1] = max(self.frames[-1][1], abs_peak)
+            peak = abs_peak - start
+            stats.peak_memory = peak if stats.peak_memory is None else max(stats.peak_memory,
+                                                                           peak)
+
+        if self.callback is not None:
+            self.callback(name, elapsed, peak)
+
+
+def _reset_peak():
+    # tracemalloc.reset_peak() is new in Python 3.9; without it, stage peaks
+    # are measured from the start of tracing and may be overestimated...
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+@contextmanager
+def instrument(callback=None, trace_memory=True):
+    """
+    Record every stage entered within the block into a ScalingReport.
+
+    Blocks may be nested; every active block records the stages entered within it.
+
+    Parameters
+    ----------
+    callback : callable or None
+        If given, called as callback(name, wall_time, peak_memory) whenever a stage is exited,
+        with the measurements of that single call (peak_memory is None if memory is not traced).
+    trace_memory : bool
+        If True, trace memory allocations (see tracemalloc) to record peaks. Tracing slows
+        allocation-heavy code down, so set to False to measure wall times alone.
+
+    Yields
+    ------
+    ScalingReport
+        Report filled in as stages are exited.
+    """
+    report = ScalingReport(trace_memory=trace_memory)
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    recorder = _Recorder(report, callback)
+    _recorders.append(recorder)
+    try:
+        yield report
+    finally:
+        _recorders.remove(recorder)
+        if started:
+            tracemalloc.stop()
+
+
+@contextmanager
+def _stage(name):
+    recorders = list(_recorders)
+    for recorder in recorders:
+        recorder.enter(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        for recorder in reversed(recorders):
+            recorder.exit(name, elapsed)
+
+
+class _NullStage(object):
+    """
+    Reusable do-nothing stage, used while nothing is being recorded.
+    """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """
+    Get a context manager measuring the named stage in every active instrument() block.
+
+    Parameters
+    ----------
+    name : str
+        Stage name. Measurements of stages with the same name are accumulated.
+
+    Returns
+    -------
+    context manager
+        The measuring context manager, or a shared no-op one if no block is active.
+    """
+    if not _recorders:
+        return _NULL_STAGE
+    return _stage(name)
+
+
+def count(name, increment=1):
+    """
+    Add to the named counter of every active instrument() block.
+
+    Parameters
+    ----------
+    name : str
+        Counter name.
+    increment : int
+        Amount added to the counter.
+    """
+    for recorder in _recorders:
+        counters = recorder.report.counters
+        counters[name] = counters.get(name, 0) + increment
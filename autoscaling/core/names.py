@@ -0,0 +1,229 @@
+"""Define the parser of Dymos global variable names into structured records, and the KeyIndex class.
+
+A global name such as 'traj.phases.phase0.indep_states.states:x' is parsed once into a record
+holding the name itself, the path of the phase owning it ('traj.phases.phase0'), its kind
+('state') and its local name ('x'). Records are cached, and their strings interned, so
+classifying a name again is a single dict lookup.
+"""
+
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+# Kinds of names...
+STATE = 'state'
+CONTROL = 'control'
+DEFECT = 'defect'
+PATH = 'path'
+TIME = 'time'
+TIMESERIES = 'timeseries'
+STATE_CONTINUITY = 'state_continuity'
+CONTROL_CONTINUITY = 'control_continuity'
+CONTROL_RATE_CONTINUITY = 'control_rate_continuity'
+DESIGN_PARAMETER = 'design_parameter'
+INPUT_PARAMETER = 'input_parameter'
+INITIAL_BOUNDARY = 'initial_boundary'
+FINAL_BOUNDARY = 'final_boundary'
+OTHER = 'other'
+
+# Kinds of the design variables and constraints whose scaling the PJRN-style scalers compute...
+SCALED_VARIABLE_KINDS = (STATE, CONTROL, TIME, DESIGN_PARAMETER)
+CONTINUITY_KINDS = (STATE_CONTINUITY, CONTROL_CONTINUITY, CONTROL_RATE_CONTINUITY)
+SCALED_CONSTRAINT_KINDS = (DEFECT, PATH, INITIAL_BOUNDARY, FINAL_BOUNDARY) + CONTINUITY_KINDS
+
+# Maps the promoted variable prefix (the part of a name before ':') to its kind...
+_PREFIX_KINDS = {
+    'states': STATE,
+    'controls': CONTROL,
+    'defects': DEFECT,
+    'path': PATH,
+    'defect_states': STATE_CONTINUITY,
+    'defect_controls': CONTROL_CONTINUITY,
+    'defect_control_rates': CONTROL_RATE_CONTINUITY,
+    'design_parameters': DESIGN_PARAMETER,
+    'input_parameters': INPUT_PARAMETER,
+    'initial_value': INITIAL_BOUNDARY,
+    'final_value': FINAL_BOUNDARY,
+    'initial_value_in': INITIAL_BOUNDARY,
+    'final_value_in': FINAL_BOUNDARY,
+}
+
+# Maps a Dymos container subsystem name to the kind it implies (None if the
+# kind is given by the variable name instead)...
+_CONTAINERS = {
+    'indep_states': None,
+    'control_group': None,
+    'indep_controls': None,
+    'control_interp_comp': None,
+    'collocation_constraint': None,
+    'path_constraints': None,
+    'continuity_comp': None,
+    'time_extents': None,
+    'time': None,
+    'design_params': None,
+    'input_params': None,
+    'timeseries': TIMESERIES,
+    'initial_boundary_constraints': INITIAL_BOUNDARY,
+    'final_boundary_constraints': FINAL_BOUNDARY,
+}
+
+_TIME_NAMES = ('t_initial', 't_duration')
+
+NameRecord = namedtuple('NameRecord', ['name', 'phase', 'kind', 'local'])
+NameRecord.__doc__ = """
+Structured, interned record of a parsed global variable name.
+
+Attributes
+----------
+name : str
+    Global name.
+phase : str
+    Path of the phase owning the variable: the component path with any Dymos container
+    subsystem names stripped from its end.
+kind : str
+    Kind of the variable (e.g. STATE, CONTROL, DEFECT, PATH, TIME, ...).
+local : str
+    Local name of the variable within its phase (e.g. 'x' for a state or its defect).
+"""
+
+
+@lru_cache(maxsize=2**16)
+def parse_name(global_name):
+    """
+    Parse the given global variable name into a NameRecord.
+
+    Parameters
+    ----------
+    global_name : str
+        Global variable name.
+
+    Returns
+    -------
+    NameRecord
+        Parsed record. Results are cached.
+    """
+    if ':' in global_name:
+        path, local = global_name.rsplit(':', 1)
+        path = path.split('.')
+        kind = _PREFIX_KINDS.get(path.pop(), OTHER)
+    else:
+        path = global_name.split('.')
+        local = path.pop()
+        kind = TIME if local in _TIME_NAMES else OTHER
+    local = local.rsplit('.', 1)[-1]
+
+    while path and path[-1] in _CONTAINERS:
+        container_kind = _CONTAINERS[path.pop()]
+        if container_kind is not None:
+            kind = container_kind
+
+    return NameRecord(sys.intern(global_name), sys.intern('.'.join(path)), kind,
+                      sys.intern(local))
+
+
+class KeyIndex(object):
+    """
+    Index of parsed global names, for O(1) classification and matching by phase, kind and local name.
+
+    Attributes
+    ----------
+    records : dict
+        Maps a global name to its NameRecord.
+    """
+
+    def __init__(self, names=()):
+        """
+        Parse and index the given names.
+
+        Parameters
+        ----------
+        names : iterable of str
+            Global variable names.
+        """
+        self.records = {}
+        self._by_kind = {}
+        self._by_local = {}
+        for nm in names:
+            self.add(nm)
+
+    @classmethod
+    def from_jac(cls, jac):
+        """
+        Index every name appearing in the keys of the given jacobian.
+
+        Parameters
+        ----------
+        jac : dict
+            Jacobian information, keyed by (of, wrt) global name pairs.
+
+        Returns
+        -------
+        KeyIndex
+            The index.
+        """
+        index = cls()
+        for of, wrt in jac:
+            index.add(of)
+            index.add(wrt)
+        return index
+
+    def add(self, global_name):
+        """
+        Parse and index the given name, if not already indexed.
+
+        Parameters
+        ----------
+        global_name : str
+            Global variable name.
+
+        Returns
+        -------
+        NameRecord
+            Record of the name.
+        """
+        rec = self.records.get(global_name)
+        if rec is None:
+            rec = self.records[global_name] = parse_name(global_name)
+            self._by_kind.setdefault(rec.kind, []).append(rec.name)
+            self._by_local.setdefault((rec.phase, rec.kind, rec.local), rec.name)
+            self._by_local.setdefault((None, rec.kind, rec.local), rec.name)
+        return rec
+
+    def names(self, *kinds):
+        """
+        Get the indexed names of the given kinds, in order of indexing.
+
+        Parameters
+        ----------
+        *kinds : str
+            Kinds of names.
+
+        Returns
+        -------
+        list of str
+            The names.
+        """
+        names = []
+        for kind in kinds:
+            names.extend(self._by_kind.get(kind, ()))
+        return names
+
+    def find(self, kind, local, phase=None):
+        """
+        Find the name of the given kind and local name, in the given phase if not None.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of name.
+        local : str
+            Local name.
+        phase : str or None
+            Phase path. If None, the first indexed name of any phase matches.
+
+        Returns
+        -------
+        str or None
+            The global name, or None if there is none.
+        """
+        return self._by_local.get((phase, kind, local))
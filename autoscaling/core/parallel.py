@@ -0,0 +1,136 @@
+"""Define parallel_scale(), which computes scale factors for each phase of a trajectory in a separate process."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from autoscaling.core.names import parse_name
+from autoscaling.utils.archive import BlockMap, block_layout, write_blocks
+
+
+def parallel_scale(scaler_class, jac, lbs, ubs, max_workers=None, **kwargs):
+    """
+    Compute scale factors phase by phase in a process pool and merge them into one autoscaler.
+
+    The jacobian blocks are copied once into a shared memory buffer that every worker maps,
+    rather than being pickled to each worker. Each worker runs scaler_class on the blocks of the
+    constraints owned by one phase (with respect to every variable, so cross-phase blocks are
+    accounted for exactly as in the serial computation), and keeps only the entries for names
+    owned by that phase. For scalers whose per-name values depend only on those blocks and on the
+    bounds, such as IsoScaler and PJRNScaler, the merged result is identical to
+    scaler_class(jac, lbs, ubs).
+
+    Parameters
+    ----------
+    scaler_class : type
+        AutoScaler subclass taking (jac, lbs, ubs, **kwargs) initialization arguments.
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) global name pairs.
+    lbs : dict
+        Maps a global variable name to its lower bound.
+    ubs : dict
+        Maps a global variable name to its upper bound.
+    max_workers : int or None
+        Maximum number of worker processes. Defaults to the number of CPUs.
+    **kwargs : dict
+        Additional keyword arguments passed to scaler_class.
+
+    Returns
+    -------
+    AutoScaler
+        Instance of scaler_class holding the merged reference values.
+    """
+    groups = split_by_phase(jac)
+
+    if len(groups) <= 1 or max_workers == 1:
+        results = [_scale_phase(jac, keys, owned, scaler_class, lbs, ubs, kwargs)
+                   for keys, owned in groups.values()]
+        return _merge(scaler_class, results)
+
+    from multiprocessing import shared_memory
+
+    layout, nbytes = block_layout(jac)
+    shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+    try:
+        write_blocks(shm.buf, jac, layout)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for keys, owned in groups.values():
+                sub_layout = [entry for entry in layout if (entry['of'], entry['wrt']) in keys]
+                futures.append(pool.submit(_scale_shared_phase, shm.name, sub_layout, owned,
+                                           scaler_class, lbs, ubs, kwargs))
+            results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return _merge(scaler_class, results)
+
+
+def split_by_phase(jac):
+    """
+    Group the blocks of the given jacobian by the phase that owns their constraint.
+
+    Phases are identified from the names alone: the owner of a name is the phase path parsed
+    from it (e.g. 'traj.phases.phase0' for a defect or a state of phase0, see parse_name()), so
+    no OpenMDAO or Dymos objects are needed.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) global name pairs.
+
+    Returns
+    -------
+    dict
+        Maps each owning phase path to a (keys, owned) tuple, where keys is the set of (of, wrt)
+        jacobian keys whose constraint belongs to that phase and owned is the set of constraint
+        and variable names belonging to that phase.
+    """
+    groups = {}
+    owners = {}
+    for of, wrt in jac:
+        for nm in (of, wrt):
+            if nm not in owners:
+                owners[nm] = parse_name(nm).phase
+        keys, owned = groups.setdefault(owners[of], (set(), set()))
+        keys.add((of, wrt))
+        owned.add(of)
+    for nm, owner in owners.items():
+        if owner in groups:
+            groups[owner][1].add(nm)
+    return groups
+
+
+def _scale_phase(jac, keys, owned, scaler_class, lbs, ubs, kwargs):
+    sub_jac = {key: jac[key] for key in jac if key in keys}
+    sc = scaler_class(sub_jac, lbs, ubs, **kwargs)
+    return tuple({nm: val for nm, val in refs.items() if nm in owned}
+                 for refs in (sc.refs, sc.ref0s, sc.defect_refs))
+
+
+def _scale_shared_phase(shm_name, layout, owned, scaler_class, lbs, ubs, kwargs):
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        jac = BlockMap(shm.buf, layout)
+        results = _scale_phase(jac, set(jac), owned, scaler_class, lbs, ubs, kwargs)
+        # Make sure nothing returned still points into the shared buffer...
+        results = tuple({nm: np.array(val) if isinstance(val, np.ndarray) else val
+                         for nm, val in refs.items()} for refs in results)
+        del jac
+    finally:
+        shm.close()
+    return results
+
+
+def _merge(scaler_class, results):
+    refs = {}
+    ref0s = {}
+    defect_refs = {}
+    for phase_refs, phase_ref0s, phase_defect_refs in results:
+        refs.update(phase_refs)
+        ref0s.update(phase_ref0s)
+        defect_refs.update(phase_defect_refs)
+    return scaler_class.from_refs(refs, ref0s, defect_refs)
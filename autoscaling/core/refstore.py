@@ -0,0 +1,146 @@
+"""Define the RefStore class, a compact array-backed mapping of global names to reference values."""
+
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+
+
+class RefStore(MutableMapping):
+    """
+    Dict-like mapping of global names to scalar or array reference values, backed by one float64 array.
+
+    All values live contiguously in a single array, and a single index maps each name to the
+    start and shape of its value in that array, so there are no per-value Python objects. Array
+    values are returned as views into the backing array rather than copies, so they can be
+    handed to Dymos options as they are; scalar values are returned as floats.
+
+    Assigning to an existing name with a value of the same size writes into the backing array
+    in place, so, just as with an ndarray, views read earlier see the new values. Copy them to
+    keep the old ones.
+    """
+
+    __slots__ = ('_data', '_index', '_size')
+
+    def __init__(self, items=()):
+        """
+        Store the given items, allocating the backing array only once.
+
+        Parameters
+        ----------
+        items : Mapping or iterable of (str, array_like) pairs
+            Initial names and reference values.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        items = [(nm, np.asarray(val, dtype=float)) for nm, val in items]
+
+        self._data = np.empty(sum(val.size for _, val in items))
+        self._index = {}
+        self._size = 0
+        for nm, val in items:
+            self[nm] = val
+
+    @classmethod
+    def from_array(cls, data, slices):
+        """
+        Wrap an existing float64 array, without copying it.
+
+        Parameters
+        ----------
+        data : ndarray
+            One-dimensional float64 array holding the values.
+        slices : dict
+            Maps each name to the slice of data holding its (one-dimensional) value, or to the
+            int index of its scalar value.
+
+        Returns
+        -------
+        RefStore
+            Store whose values are views into data.
+        """
+        assert(isinstance(data, np.ndarray) and data.dtype == np.float64 and data.ndim == 1)
+        store = cls.__new__(cls)
+        store._data = data
+        store._index = {}
+        for nm, sl in slices.items():
+            if isinstance(sl, slice):
+                start, stop, step = sl.indices(data.size)
+                assert(step == 1)
+                store._index[nm] = (start, (stop - start,))
+            else:
+                store._index[nm] = (int(sl), ())
+        store._size = data.size
+        return store
+
+    def __getitem__(self, name):
+        start, shape = self._index[name]
+        if not shape:
+            return float(self._data[start])
+        size = int(np.prod(shape))
+        return self._data[start:start + size].reshape(shape)
+
+    def __setitem__(self, name, value):
+        value = np.asarray(value, dtype=float)
+        entry = self._index.get(name)
+        if entry is not None and int(np.prod(entry[1])) == value.size:
+            start = entry[0]
+        else:
+            start = self._allocate(value.size)
+        self._data[start:start + value.size] = value.ravel()
+        self._index[name] = (start, value.shape)
+
+    def __delitem__(self, name):
+        # The space is not reclaimed until the store is copied...
+        del self._index[name]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, dict(self.items()))
+
+    def __getstate__(self):
+        # Only pickle the values that are still in use...
+        return dict((nm, self[nm]) for nm in self._index)
+
+    def __setstate__(self, state):
+        RefStore.__init__(self, state)
+
+    def _allocate(self, size):
+        start = self._size
+        if start + size > self._data.size:
+            # Grow geometrically so that repeated insertion is amortized O(1)...
+            data = np.empty(max(start + size, 2 * self._data.size, 16))
+            data[:start] = self._data[:start]
+            self._data = data
+        self._size = start + size
+        return start
+
+    def copy(self):
+        """
+        Get a compacted copy of this store, which shares no memory with it.
+
+        Returns
+        -------
+        RefStore
+            The copy.
+        """
+        return RefStore((nm, self[nm]) for nm in self._index)
+
+    @property
+    def nbytes(self):
+        """
+        Get the number of bytes held by the backing array.
+
+        Returns
+        -------
+        int
+            Size of the backing array, in bytes.
+        """
+        return self._data.nbytes
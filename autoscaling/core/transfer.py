@@ -0,0 +1,235 @@
+"""Define transfer_refs(), which carries per-node scale factors over to a refined Dymos grid."""
+
+import numpy as np
+
+from autoscaling.core.names import (CONTROL_CONTINUITY, CONTROL_RATE_CONTINUITY, DEFECT, PATH,
+                                    STATE_CONTINUITY, parse_name)
+
+# Pseudo node subset of the interior segment boundaries, on which continuity constraints live...
+SEGMENT_BOUNDARIES = 'segment_boundaries'
+
+# Power of the length of its segment(s) that a per-node reference value scales with. Dymos
+# multiplies collocation defects by dt/dstau, and control rates are divided by it...
+SEGMENT_LENGTH_POWERS = {
+    DEFECT: 1,
+    CONTROL_RATE_CONTINUITY: -1,
+}
+
+# Maps the kind of a per-node constraint to the grid_data node subset it lives on...
+NODE_SUBSETS = {
+    DEFECT: 'col',
+    PATH: 'all',
+    STATE_CONTINUITY: SEGMENT_BOUNDARIES,
+    CONTROL_CONTINUITY: SEGMENT_BOUNDARIES,
+    CONTROL_RATE_CONTINUITY: SEGMENT_BOUNDARIES,
+}
+
+_TINY = np.finfo(float).tiny
+
+
+def phase_grids(prob):
+    """
+    Get the grid data of every phase of the given problem.
+
+    Parameters
+    ----------
+    prob : Problem
+        Dymos problem that has been set up.
+
+    Returns
+    -------
+    dict
+        Maps each phase pathname to the GridData of its transcription.
+    """
+    from autoscaling.core.autoscale import _find_phases
+
+    return {phase.pathname: phase.options['transcription'].grid_data
+            for phase in _find_phases(prob.model)}
+
+
+def node_taus(grid_data, subset):
+    """
+    Get the phase-normalized times (in [-1, 1]) of the nodes of the given subset.
+
+    Parameters
+    ----------
+    grid_data : GridData
+        Dymos grid data of a phase.
+    subset : str
+        Node subset (e.g. 'col' or 'all'), or SEGMENT_BOUNDARIES for the boundaries between
+        consecutive segments.
+
+    Returns
+    -------
+    ndarray
+        Phase tau of each node of the subset.
+    """
+    if subset == SEGMENT_BOUNDARIES:
+        return np.asarray(grid_data.segment_ends, dtype=float)[1:-1]
+    return np.asarray(grid_data.node_ptau)[grid_data.subset_node_indices[subset]]
+
+
+def node_segment_lengths(grid_data, subset):
+    """
+    Get the length (in phase tau) of the segment of each node of the given subset.
+
+    Parameters
+    ----------
+    grid_data : GridData
+        Dymos grid data of a phase.
+    subset : str
+        Node subset (e.g. 'col' or 'all'), or SEGMENT_BOUNDARIES, whose nodes get the geometric
+        mean of the lengths of the two segments they join.
+
+    Returns
+    -------
+    ndarray
+        Segment length of each node of the subset.
+    """
+    lengths = np.diff(np.asarray(grid_data.segment_ends, dtype=float))
+    if subset == SEGMENT_BOUNDARIES:
+        return np.sqrt(lengths[:-1] * lengths[1:])
+    seg_indices = np.asarray(grid_data.subset_segment_indices[subset])
+    return np.repeat(lengths, seg_indices[:, 1] - seg_indices[:, 0])
+
+
+def segment_length_power(rec):
+    """
+    Get the power of its segment length that the reference values of the named constraint scale with.
+
+    Parameters
+    ----------
+    rec : NameRecord
+        Parsed global name of a per-node constraint (see parse_name()).
+
+    Returns
+    -------
+    int
+        Power of the segment length (e.g. 1 for collocation defects, -2 for the continuity of
+        second control rates).
+    """
+    power = SEGMENT_LENGTH_POWERS.get(rec.kind, 0)
+    if rec.kind == CONTROL_RATE_CONTINUITY and rec.local.endswith('_rate2'):
+        power = -2
+    return power
+
+
+def transfer_refs(sc, old_grids, new_grids, tolerance=2.0, estimate=None):
+    """
+    Interpolate the per-node defect_refs and path and continuity constraint refs of an autoscaler onto new grids.
+
+    Reference values are interpolated linearly in log space over phase-normalized time, so that
+    they stay positive and scale-free. Continuity constraint values are interpolated over the
+    interior segment boundaries. Collocation defects and control rate continuity constraints
+    scale with a power of the length of their segments (see segment_length_power()), so they
+    are divided by it on the old grid and multiplied by it on the new one. Variable refs and ref0s do not depend on the grid and are
+    carried over unchanged. Values whose size does not match their old grid (e.g. continuity
+    constraints of a transcription that has none at some boundaries) cannot be transferred;
+    they are dropped, and the result is flagged for recomputation.
+
+    How far off the transferred values may be is estimated by interpolating each reference
+    value from every other node of its old grid onto the remaining nodes. Optionally, they are
+    also compared with a cheap estimate computed on the new grid (e.g. a SketchPJRNScaler with a
+    few probes). If either error factor exceeds tolerance, the result is flagged and the
+    reference values should be recomputed in full.
+
+    Parameters
+    ----------
+    sc : AutoScaler
+        Autoscaler computed on the old grids.
+    old_grids : dict
+        Maps each phase pathname to its old GridData (see phase_grids()).
+    new_grids : dict
+        Maps each phase pathname to its new GridData.
+    tolerance : float
+        Largest acceptable error factor (ratio of a transferred value to the exact one, or its
+        inverse).
+    estimate : AutoScaler or None
+        If given, an estimate of the reference values on the new grids to check against.
+
+    Returns
+    -------
+    AutoScaler
+        Instance of the class of sc holding the transferred values, with attributes
+        transfer_errors (maps each transferred name to its estimated error factor),
+        transfer_error (the largest one) and needs_recompute (True if it exceeds tolerance).
+    """
+    refs = dict(sc.refs)
+    ref0s = dict(sc.ref0s)
+    defect_refs = dict(sc.defect_refs)
+    errors = {}
+
+    for values in (refs, defect_refs):
+        for nm in list(values):
+            rec = parse_name(nm)
+            subset = NODE_SUBSETS.get(rec.kind)
+            if subset is None or np.ndim(values[nm]) == 0:
+                continue
+            assert(rec.phase in old_grids and rec.phase in new_grids), \
+                'No grid data given for phase {0!r}.'.format(rec.phase)
+            old_taus = node_taus(old_grids[rec.phase], subset)
+            new_taus = node_taus(new_grids[rec.phase], subset)
+
+            if old_taus.size == 0 or np.size(values[nm]) % old_taus.size != 0:
+                del values[nm]
+                ref0s.pop(nm, None)
+                errors[nm] = np.inf
+                continue
+
+            power = segment_length_power(rec)
+            old_lengths = node_segment_lengths(old_grids[rec.phase], subset)**power
+            new_lengths = node_segment_lengths(new_grids[rec.phase], subset)**power
+            values[nm], errors[nm] = _interpolate(values[nm], old_taus, new_taus,
+                                                  old_lengths, new_lengths)
+            if values is refs and np.ndim(ref0s.get(nm, 0)):
+                ref0s[nm] = np.zeros_like(values[nm])
+
+    if estimate is not None:
+        for values, estimated in ((refs, estimate.refs), (defect_refs, estimate.defect_refs)):
+            for nm in errors:
+                if nm in values and nm in estimated:
+                    errors[nm] = max(errors[nm], _error_factor(values[nm], estimated[nm]))
+
+    transferred = type(sc).from_refs(refs, ref0s, defect_refs)
+    transferred.transfer_errors = errors
+    transferred.transfer_error = max(errors.values()) if errors else 1.0
+    transferred.needs_recompute = transferred.transfer_error > tolerance
+    return transferred
+
+
+def _interpolate(values, old_taus, new_taus, old_factors, new_factors):
+    """
+    Interpolate per-node values (one row per node) divided by old_factors in log space, multiply them by new_factors, and estimate the error factor.
+    """
+    values = np.asarray(values, dtype=float)
+    num_old = old_taus.size
+    assert(values.size % num_old == 0), \
+        'Reference values do not match the {0} nodes of the old grid.'.format(num_old)
+    logs = np.log(np.maximum(values.reshape(num_old, -1), _TINY))
+    logs -= np.log(old_factors)[:, np.newaxis]
+
+    order = np.argsort(old_taus, kind='stable')
+    old_taus = old_taus[order]
+    logs = logs[order]
+
+    new_logs = np.column_stack([np.interp(new_taus, old_taus, col) for col in logs.T])
+
+    # Leave every other node out, and see how well it is predicted from the rest...
+    error = 1.0
+    if num_old >= 3:
+        kept = np.arange(0, num_old, 2)
+        left_out = np.arange(1, num_old, 2)
+        predicted = np.column_stack([np.interp(old_taus[left_out], old_taus[kept], col[kept])
+                                     for col in logs.T])
+        error = float(np.exp(np.max(np.abs(predicted - logs[left_out]))))
+
+    new_logs += np.log(new_factors)[:, np.newaxis]
+    return np.exp(new_logs).ravel(), error
+
+
+def _error_factor(values, estimated):
+    values = np.maximum(np.asarray(values, dtype=float), _TINY)
+    estimated = np.maximum(np.asarray(estimated, dtype=float), _TINY)
+    if values.shape != estimated.shape:
+        return np.inf
+    return float(np.exp(np.max(np.abs(np.log(values / estimated)))))
@@ -0,0 +1,265 @@
+"""Define a memory-mappable binary archive format for total jacobian and bounds information.
+
+An archive is a single file laid out as
+
+    magic (8 bytes) | header length (uint64, little-endian) | JSON header | padding | raw data
+
+The JSON header holds the bounds dicts and a name index that gives the format, shape and byte
+offsets (relative to the start of the raw data) of every jacobian block. Dense blocks are stored
+as C-ordered float64 arrays; sparse blocks are stored as COO triples (float64 data and int64 row
+and column indices). Since the raw data is opened with a memory map, a block is only paged in
+when a scaler actually touches it, and nothing is ever unpickled.
+"""
+
+import json
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+from autoscaling.utils.rownorms import is_sparse
+
+MAGIC = b'ASARCHV1'
+ALIGNMENT = 64
+
+_FLOAT = np.dtype('<f8')
+_INDEX = np.dtype('<i8')
+
+
+def _aligned(nbytes):
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
+
+
+def block_layout(jac):
+    """
+    Compute where each block of the given jacobian goes in a flat byte buffer.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or
+        scipy.sparse.
+
+    Returns
+    -------
+    list of dict
+        One JSON-serializable entry per block, in the iteration order of jac.
+    int
+        Total number of bytes needed to hold all blocks.
+    """
+    layout = []
+    offset = 0
+    for of, wrt in jac:
+        block = jac[of, wrt]
+        entry = {'of': of, 'wrt': wrt}
+        if is_sparse(block):
+            coo = block.tocoo(copy=True)
+            coo.sum_duplicates()
+            nnz = coo.nnz
+            entry['format'] = 'coo'
+            entry['shape'] = list(coo.shape)
+            entry['nnz'] = nnz
+            entry['data'] = offset
+            offset = _aligned(offset + nnz * _FLOAT.itemsize)
+            entry['row'] = offset
+            offset = _aligned(offset + nnz * _INDEX.itemsize)
+            entry['col'] = offset
+            offset = _aligned(offset + nnz * _INDEX.itemsize)
+        else:
+            shape = np.shape(block)
+            entry['format'] = 'dense'
+            entry['shape'] = list(shape)
+            entry['data'] = offset
+            offset = _aligned(offset + int(np.prod(shape)) * _FLOAT.itemsize)
+        layout.append(entry)
+    return layout, offset
+
+
+def write_blocks(buffer, jac, layout):
+    """
+    Copy the blocks of the given jacobian into a flat byte buffer according to the given layout.
+
+    Parameters
+    ----------
+    buffer : buffer
+        Writable buffer (e.g. a bytearray, memmap or shared memory buffer) of at least the size
+        returned by block_layout().
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs.
+    layout : list of dict
+        Layout returned by block_layout() for jac.
+    """
+    buffer = np.frombuffer(buffer, dtype=np.uint8)
+    for entry in layout:
+        block = jac[entry['of'], entry['wrt']]
+        if entry['format'] == 'coo':
+            coo = block.tocoo(copy=True)
+            coo.sum_duplicates()
+            nnz = entry['nnz']
+            _view(buffer, entry['data'], _FLOAT, (nnz,))[:] = coo.data
+            _view(buffer, entry['row'], _INDEX, (nnz,))[:] = coo.row
+            _view(buffer, entry['col'], _INDEX, (nnz,))[:] = coo.col
+        else:
+            _view(buffer, entry['data'], _FLOAT, tuple(entry['shape']))[...] = block
+
+
+def _view(buffer, offset, dtype, shape):
+    count = int(np.prod(shape))
+    return buffer[offset:offset + count * dtype.itemsize].view(dtype).reshape(shape)
+
+
+class BlockMap(Mapping):
+    """
+    Read-only, dict-like view of jacobian blocks laid out in a flat byte buffer.
+
+    Blocks are materialized as array views on access, so nothing is copied and, for memory
+    mapped buffers, nothing is read until a block is actually used.
+
+    Attributes
+    ----------
+    layout : list of dict
+        Layout of the blocks in the buffer (see block_layout()).
+    """
+
+    def __init__(self, buffer, layout):
+        """
+        Wrap the given buffer.
+
+        Parameters
+        ----------
+        buffer : buffer
+            Buffer holding the blocks.
+        layout : list of dict
+            Layout of the blocks in the buffer (see block_layout()).
+        """
+        self._buffer = np.frombuffer(buffer, dtype=np.uint8)
+        self._entries = {(entry['of'], entry['wrt']): entry for entry in layout}
+        self.layout = layout
+
+    def __getitem__(self, key):
+        entry = self._entries[key]
+        shape = tuple(entry['shape'])
+        if entry['format'] == 'coo':
+            import scipy.sparse
+            nnz = entry['nnz']
+            data = _view(self._buffer, entry['data'], _FLOAT, (nnz,))
+            row = _view(self._buffer, entry['row'], _INDEX, (nnz,))
+            col = _view(self._buffer, entry['col'], _INDEX, (nnz,))
+            return scipy.sparse.coo_matrix((data, (row, col)), shape=shape, copy=False)
+        return _view(self._buffer, entry['data'], _FLOAT, shape)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ScalingArchive(object):
+    """
+    Total jacobian and bounds information loaded from an archive file.
+
+    Attributes
+    ----------
+    jac : BlockMap
+        Total jacobian information, keyed by (of, wrt) name pairs.
+    lbs : dict
+        Maps a global variable name to its lower bound.
+    ubs : dict
+        Maps a global variable name to its upper bound.
+    """
+
+    def __init__(self, jac, lbs, ubs):
+        """
+        Store the loaded information.
+
+        Parameters
+        ----------
+        jac : BlockMap
+            Total jacobian information.
+        lbs : dict
+            Maps a global variable name to its lower bound.
+        ubs : dict
+            Maps a global variable name to its upper bound.
+        """
+        self.jac = jac
+        self.lbs = lbs
+        self.ubs = ubs
+
+    def __iter__(self):
+        # Allow jac, lbs, ubs = load_archive(path)...
+        return iter((self.jac, self.lbs, self.ubs))
+
+
+def save_archive(path, jac, lbs=None, ubs=None):
+    """
+    Write total jacobian and bounds information to an archive file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the archive file to write.
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or
+        scipy.sparse.
+    lbs : dict or None
+        Maps a global variable name to its lower bound.
+    ubs : dict or None
+        Maps a global variable name to its upper bound.
+    """
+    layout, nbytes = block_layout(jac)
+    header = {'blocks': layout,
+              'lbs': {nm: float(val) for nm, val in (lbs or {}).items()},
+              'ubs': {nm: float(val) for nm, val in (ubs or {}).items()}}
+    header = json.dumps(header).encode('utf-8')
+    data_offset = _aligned(len(MAGIC) + 8 + len(header))
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<Q', len(header)))
+        file.write(header)
+        file.truncate(data_offset + nbytes)
+
+    # Write the blocks straight into the file through a memory map rather
+    # than assembling a second copy of the whole jacobian in memory...
+    if nbytes > 0:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r+', offset=data_offset, shape=(nbytes,))
+        write_blocks(buffer, jac, layout)
+        buffer.flush()
+        del buffer
+
+
+def load_archive(path, mmap=True):
+    """
+    Open an archive file written by save_archive().
+
+    Parameters
+    ----------
+    path : str
+        Path of the archive file.
+    mmap : bool
+        If True, memory map the raw data so blocks are paged in only when used. Otherwise the
+        raw data is read into memory up front.
+
+    Returns
+    -------
+    ScalingArchive
+        The jacobian and bounds information. Unpacks as jac, lbs, ubs.
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError('{0} is not an autoscaling archive.'.format(path))
+        header_len, = struct.unpack('<Q', file.read(8))
+        header = json.loads(file.read(header_len).decode('utf-8'))
+        data_offset = _aligned(len(MAGIC) + 8 + header_len)
+
+        if not header['blocks']:
+            buffer = bytearray()
+        elif mmap:
+            buffer = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset)
+        else:
+            file.seek(data_offset)
+            buffer = bytearray(file.read())
+
+    return ScalingArchive(BlockMap(buffer, header['blocks']), header['lbs'], header['ubs'])
@@ -0,0 +1,351 @@
+"""Define vectorized routines for computing the row norms of total jacobian blocks."""
+
+import sys
+
+import numpy as np
+
+
+def _sparse_module():
+    # A block can only be a scipy.sparse matrix if scipy.sparse has already
+    # been imported by whoever built it, so there is no need to pay for
+    # importing it here...
+    return sys.modules.get('scipy.sparse')
+
+
+def is_sparse(block):
+    """
+    Return True if the given jacobian block is a scipy.sparse matrix or array.
+
+    Parameters
+    ----------
+    block : array_like or sparse matrix
+        Jacobian sub-block.
+
+    Returns
+    -------
+    bool
+        True if the given jacobian block is a scipy.sparse matrix or array.
+    """
+    sp = _sparse_module()
+    return sp is not None and sp.issparse(block)
+
+
+def squared_row_sums(block):
+    """
+    Compute the sum of the squares of the entries in each row of the given jacobian block.
+
+    Sparse blocks (CSR, CSC, COO or anything convertible to COO) are handled
+    using only their stored entries, so the cost scales with the number of
+    nonzeros rather than with rows x columns.
+
+    Parameters
+    ----------
+    block : array_like or sparse matrix
+        Two-dimensional jacobian sub-block, e.g. jac[of, wrt].
+
+    Returns
+    -------
+    ndarray
+        One-dimensional array holding the squared norm of each row of the block.
+    """
+    if is_sparse(block):
+        return _sparse_squared_row_sums(block)
+    block = np.asarray(block, dtype=float)
+    return np.einsum('ij,ij->i', block, block)
+
+
+def _sparse_squared_row_sums(block):
+    rows, data = _sparse_rows_and_data(block)
+    return np.bincount(rows, weights=data * data, minlength=block.shape[0])
+
+
+def _sparse_rows_and_data(block):
+    """
+    Get the row index and value of every stored entry of a sparse block, duplicates combined.
+    """
+    nrows = block.shape[0]
+    fmt = block.format
+    if fmt in ('csr', 'csc', 'coo') and not block.has_canonical_format:
+        # Duplicate entries are implicitly summed, so they must be combined
+        # before any nonlinear function of the entries is taken. A CSR block is
+        # returned as is by tocsr(), so copy it to leave the caller's block alone...
+        block = block.tocsr(copy=True)
+        block.sum_duplicates()
+        fmt = 'csr'
+
+    if fmt == 'csr':
+        rows = np.repeat(np.arange(nrows), np.diff(block.indptr))
+    elif fmt == 'csc':
+        rows = block.indices
+    else:
+        if fmt != 'coo':
+            block = block.tocoo()
+        rows = block.row
+    return rows, np.asarray(block.data, dtype=float)
+
+
+def row_max_abs(block):
+    """
+    Compute the largest absolute value of the entries in each row of the given jacobian block.
+
+    Parameters
+    ----------
+    block : array_like or sparse matrix
+        Two-dimensional jacobian sub-block, e.g. jac[of, wrt].
+
+    Returns
+    -------
+    ndarray
+        One-dimensional array holding the infinity norm of each row of the block.
+    """
+    if is_sparse(block):
+        rows, data = _sparse_rows_and_data(block)
+        norms = np.zeros(block.shape[0])
+        np.maximum.at(norms, rows, np.abs(data))
+        return norms
+    block = np.abs(np.asarray(block, dtype=float))
+    if block.shape[1] == 0:
+        return np.zeros(block.shape[0])
+    return block.max(axis=1)
+
+
+def row_nonzero_counts(block, threshold=0.0):
+    """
+    Count the nonzero entries in each row of the given jacobian block.
+
+    Parameters
+    ----------
+    block : array_like or sparse matrix
+        Two-dimensional jacobian sub-block, e.g. jac[of, wrt].
+    threshold : float or array_like
+        Entries whose magnitude does not exceed the threshold (a scalar or one per row) are
+        treated as zero, e.g. to leave out round-off.
+
+    Returns
+    -------
+    ndarray
+        One-dimensional float array holding the number of nonzero entries in each row of the
+        block. Explicitly stored zeros of sparse blocks are not counted.
+    """
+    if is_sparse(block):
+        rows, data = _sparse_rows_and_data(block)
+        kept = _kept_entries(rows, data, threshold, block.shape[0])
+        return np.bincount(rows, weights=kept.astype(float), minlength=block.shape[0])
+    block = np.abs(np.asarray(block, dtype=float))
+    return np.count_nonzero(block > _row_thresholds(threshold), axis=1).astype(float)
+
+
+def row_log_abs_sums(block, threshold=0.0):
+    """
+    Compute the sum of log|a| over the nonzero entries a in each row of the given jacobian block.
+
+    Parameters
+    ----------
+    block : array_like or sparse matrix
+        Two-dimensional jacobian sub-block, e.g. jac[of, wrt].
+    threshold : float or array_like
+        Entries whose magnitude does not exceed the threshold (a scalar or one per row) are
+        treated as zero, e.g. to leave out round-off.
+
+    Returns
+    -------
+    ndarray
+        One-dimensional array holding the sum of the natural logarithms of the absolute values
+        of the nonzero entries in each row of the block.
+    """
+    if is_sparse(block):
+        rows, data = _sparse_rows_and_data(block)
+        kept = _kept_entries(rows, data, threshold, block.shape[0])
+        return np.bincount(rows[kept], weights=np.log(np.abs(data[kept])),
+                           minlength=block.shape[0])
+    block = np.abs(np.asarray(block, dtype=float))
+    kept = block > _row_thresholds(threshold)
+    logs = np.zeros_like(block)
+    np.log(block, out=logs, where=kept)
+    return logs.sum(axis=1)
+
+
+def _row_thresholds(threshold):
+    # A scalar, or one threshold per row broadcast along the columns...
+    return np.reshape(np.asarray(threshold, dtype=float), (-1, 1))
+
+
+def _kept_entries(rows, data, threshold, nrows):
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (nrows,))
+    return np.abs(data) > threshold[rows]
+
+
+def weighted_row_norms(jac, of, wrts, weights):
+    """
+    Compute the weighted (projected) norm of each row of the jacobian of the given constraint.
+
+    The norm of row i is given by sqrt(sum_v ||row_i(jac[of, v])||^2 * weights[v]^2),
+    which is the PJRN reference value of the i-th entry of the constraint.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or scipy.sparse.
+    of : str
+        Global name of the constraint whose rows are to be normed.
+    wrts : iterable of str
+        Global names of the variables whose sub-blocks make up each row.
+    weights : dict
+        Maps each global variable name in wrts to its weight (e.g. the inverse of its scale factor).
+
+    Returns
+    -------
+    ndarray
+        One-dimensional array holding the weighted norm of each row of the constraint.
+    """
+    # Accumulate in a fixed order so that the result does not depend on
+    # the iteration order of wrts (e.g. when it is a set)...
+    norms = None
+    for wrt in sorted(wrts):
+        sq = squared_row_sums(jac[of, wrt]) * weights[wrt]**2
+        if norms is None:
+            norms = sq
+        else:
+            norms += sq
+    return np.sqrt(norms)
+
+
+def column_counts(jac, ofs, wrts):
+    """
+    Get the number of jacobian columns of each of the given variables.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs.
+    ofs : list of str
+        Global names of the constraints (only the first is looked at).
+    wrts : list of str
+        Global names of the variables.
+
+    Returns
+    -------
+    ndarray
+        Float array holding the number of columns of each jac[of, wrt] block, or zeros if there
+        are no constraints.
+    """
+    return np.array([jac[ofs[0], wrt].shape[1] if ofs else 0 for wrt in wrts], dtype=float)
+
+
+def squared_row_norm_matrix(jac, ofs, wrts):
+    """
+    Stack the squared row norms of every jac[of, wrt] block into a single rows x variables matrix.
+
+    Entry (i, j) of the result is ||row_i(jac[of, wrts[j]])||^2, where row i belongs to the
+    constraint of whose rows occupy slices[of]. The weighted row norms of all constraints are then
+    given by sqrt(matrix.dot(weights**2)) for any vector of variable weights.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or scipy.sparse.
+    ofs : list of str
+        Global names of the constraints, in the order in which their rows are to be stacked.
+    wrts : list of str
+        Global names of the variables, in column order.
+
+    Returns
+    -------
+    ndarray
+        Matrix of squared row norms.
+    dict
+        Maps each constraint name to the slice of the matrix rows belonging to it.
+    """
+    return _row_matrix(jac, ofs, wrts, squared_row_sums)
+
+
+def row_max_abs_matrix(jac, ofs, wrts):
+    """
+    Stack the row infinity norms of every jac[of, wrt] block into a single rows x variables matrix.
+
+    Entry (i, j) of the result is max_k |jac[of, wrts[j]][i, k]|, laid out as in
+    squared_row_norm_matrix().
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or scipy.sparse.
+    ofs : list of str
+        Global names of the constraints, in the order in which their rows are to be stacked.
+    wrts : list of str
+        Global names of the variables, in column order.
+
+    Returns
+    -------
+    ndarray
+        Matrix of row infinity norms.
+    dict
+        Maps each constraint name to the slice of the matrix rows belonging to it.
+    """
+    return _row_matrix(jac, ofs, wrts, row_max_abs)
+
+
+def row_log_stats_matrices(jac, ofs, wrts, rtol=0.0):
+    """
+    Stack the per-row nonzero counts and log|a| sums of every jac[of, wrt] block into two matrices.
+
+    Entry (i, j) of the first result is the number of nonzero entries in row i of
+    jac[of, wrts[j]], and entry (i, j) of the second is the sum of their log|a|. Together they
+    are sufficient statistics for least-squares problems in log|a|. Both are laid out as in
+    squared_row_norm_matrix(). Entries no larger than rtol times the largest magnitude in their
+    row (over all of wrts) are treated as zero, since round-off (e.g. 1e-20 where the exact
+    derivative vanishes) would otherwise dominate the logs.
+
+    Parameters
+    ----------
+    jac : dict
+        Total jacobian information, keyed by (of, wrt) name pairs. Blocks may be dense or scipy.sparse.
+    ofs : list of str
+        Global names of the constraints, in the order in which their rows are to be stacked.
+    wrts : list of str
+        Global names of the variables, in column order.
+    rtol : float
+        Magnitude, relative to the largest one in the row, up to which entries are dropped.
+
+    Returns
+    -------
+    ndarray
+        Matrix of nonzero counts.
+    ndarray
+        Matrix of log|a| sums.
+    dict
+        Maps each constraint name to the slice of the matrix rows belonging to it.
+    """
+    if rtol <= 0.0:
+        counts, slices = _row_matrix(jac, ofs, wrts, row_nonzero_counts)
+        log_sums, _ = _row_matrix(jac, ofs, wrts, row_log_abs_sums)
+        return counts, log_sums, slices
+
+    row_max, slices = _row_matrix(jac, ofs, wrts, row_max_abs)
+    thresholds = rtol * row_max.max(axis=1, initial=0.0)
+    counts = np.empty_like(row_max)
+    log_sums = np.empty_like(row_max)
+    for of in ofs:
+        rows = slices[of]
+        for j, wrt in enumerate(wrts):
+            counts[rows, j] = row_nonzero_counts(jac[of, wrt], thresholds[rows])
+            log_sums[rows, j] = row_log_abs_sums(jac[of, wrt], thresholds[rows])
+    return counts, log_sums, slices
+
+
+def _row_matrix(jac, ofs, wrts, row_func):
+    """
+    Stack row_func(jac[of, wrt]) into a rows x variables matrix, with the row slice of each of.
+    """
+    columns = [[row_func(jac[of, wrt]) for wrt in wrts] for of in ofs]
+    sizes = [rows[0].size if rows else 0 for rows in columns]
+
+    matrix = np.empty((sum(sizes), len(wrts)))
+    slices = {}
+    start = 0
+    for of, rows, size in zip(ofs, columns, sizes):
+        slices[of] = slice(start, start + size)
+        for j, col in enumerate(rows):
+            matrix[start:start + size, j] = col
+        start += size
+    return matrix, slices
@@ -1,7 +1,14 @@
-import openmdao.api as om
+import os
+import pickle
+
+import numpy as np
+
+from autoscaling.core.autoscaler import INFINITE_BOUND
+from autoscaling.core.names import SCALED_CONSTRAINT_KINDS, SCALED_VARIABLE_KINDS, parse_name
 
 
 def print_subsystems(sys):
+    import openmdao.api as om
     if isinstance(sys, om.Group):
         for subsys in sys._loc_subsys_map:
             print_subsystems(getattr(sys, subsys))
@@ -13,6 +20,181 @@ def save_tji_keys(prob, filename):
     prob.run_model()
     tji = prob.compute_totals()
     keys = {(of, wrt) for of, wrt in tji}
-    import pickle
     with open(filename, 'wb') as file:
         pickle.dump(keys, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def capture_scaling_info(prob, run_model=True):
+    """
+    Capture the total jacobian and bounds information needed by the autoscalers in a single pass.
+
+    Only the of/wrt pairs the scalers use are computed (see scaling_names()): collocation defect,
+    path, boundary and (state, control and control rate) continuity constraints and the
+    objectives with respect to states, (dynamic) controls, times and design parameters. Bounds are read straight from the driver's design variable
+    metadata, so every design variable gets a bound (-inf or inf where it has none).
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem that has already been set up.
+    run_model : bool
+        If True, run the model before computing totals so that they are evaluated at the
+        current point. Set to False if the model has already been run there.
+
+    Returns
+    -------
+    dict
+        Total jacobian information, keyed by (of, wrt) global name pairs.
+    dict
+        Maps a global design variable name to its (unscaled) lower bound.
+    dict
+        Maps a global design variable name to its (unscaled) upper bound.
+    """
+    if run_model:
+        prob.run_model()
+    else:
+        prob.final_setup()
+
+    of, wrt = scaling_names(prob)
+    jac = prob.compute_totals(of=of, wrt=wrt, return_format='flat_dict')
+    lbs, ubs = design_var_bounds(prob)
+
+    return jac, lbs, ubs
+
+
+def scaling_names(prob):
+    """
+    Get the names of the constraints, objectives and design variables the autoscalers work with.
+
+    An objective that is itself one of the design variables (e.g. t_duration) is left out of the
+    "of" names, as it keeps the scaling of the design variable.
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem whose driver has been set up (see Problem.final_setup()).
+
+    Returns
+    -------
+    list of str
+        Global names of the collocation defect, path, boundary and continuity constraints,
+        followed by those of the objectives.
+    list of str
+        Global names of the state, (dynamic) control, time and design parameter design variables.
+    """
+    driver = prob.driver
+    of = [nm for nm in driver._cons if parse_name(nm).kind in SCALED_CONSTRAINT_KINDS]
+    of.extend(objective_names(prob))
+    wrt = [nm for nm in driver._designvars if parse_name(nm).kind in SCALED_VARIABLE_KINDS]
+    return of, wrt
+
+
+def objective_names(prob):
+    """
+    Get the global names of the objectives the autoscalers scale, from the driver.
+
+    Objectives cannot be told apart from other responses by name, so they are passed to the
+    scalers explicitly, e.g. PJRNScaler(jac, lbs, ubs, objectives=objective_names(prob)). An
+    objective that is itself one of the design variables (e.g. t_duration) is left out.
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem whose driver has been set up (see Problem.final_setup()).
+
+    Returns
+    -------
+    list of str
+        Global names of the objectives that are not design variables.
+    """
+    driver = prob.driver
+    return [nm for nm in driver._objs if nm not in driver._designvars]
+
+
+def design_var_bounds(prob):
+    """
+    Read the (unscaled) lower and upper bounds of every design variable from the driver metadata.
+
+    Array bounds are reduced to the widest scalar range. OpenMDAO stores a missing bound as
+    +/-INF_BOUND, so bounds at least INFINITE_BOUND in magnitude are reported as -inf or inf,
+    and the scalers derive the range of such variables from the jacobian instead.
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem whose driver has been set up (see Problem.final_setup()).
+
+    Returns
+    -------
+    dict
+        Maps a global design variable name to its lower bound (-inf if it has none).
+    dict
+        Maps a global design variable name to its upper bound (inf if it has none).
+    """
+    lbs = {}
+    ubs = {}
+    for nm, meta in prob.driver._designvars.items():
+        lbs[nm] = _missing_as_inf(float(np.min(_unscaled(meta['lower'], meta))))
+        ubs[nm] = _missing_as_inf(float(np.max(_unscaled(meta['upper'], meta))))
+    return lbs, ubs
+
+
+def meta_indices(meta, full_size):
+    """
+    Get the flat indices of a variable selected by design variable or constraint metadata.
+
+    Parameters
+    ----------
+    meta : dict
+        Design variable or constraint metadata, as held by the driver.
+    full_size : int
+        Size of the full variable.
+
+    Returns
+    -------
+    ndarray
+        Flat int indices into the full variable.
+    """
+    indices = meta.get('indices')
+    if indices is None:
+        return np.arange(full_size)
+    if hasattr(indices, 'flat') and callable(indices.flat):
+        indices = indices.flat()
+    return np.asarray(indices, dtype=int).ravel()
+
+
+def save_scaling_info(prob, directory='.', run_model=True):
+    """
+    Capture scaling information (see capture_scaling_info()) and pickle it the way the examples expect.
+
+    The files written are total_jac_info.pickle, lower_bounds_info.pickle and
+    upper_bounds_info.pickle.
+
+    Parameters
+    ----------
+    prob : Problem
+        Problem that has already been set up.
+    directory : str
+        Directory in which to write the pickle files.
+    run_model : bool
+        If True, run the model before computing totals.
+    """
+    jac, lbs, ubs = capture_scaling_info(prob, run_model=run_model)
+    for filename, obj in (('total_jac_info.pickle', jac),
+                          ('lower_bounds_info.pickle', lbs),
+                          ('upper_bounds_info.pickle', ubs)):
+        with open(os.path.join(directory, filename), 'wb') as file:
+            pickle.dump(obj, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _unscaled(val, meta):
+    # Driver metadata holds bounds scaled as (val + adder) * scaler...
+    scaler = 1.0 if meta.get('scaler') is None else meta['scaler']
+    adder = 0.0 if meta.get('adder') is None else meta['adder']
+    return np.asarray(val) / scaler - adder
+
+
+def _missing_as_inf(bound):
+    if abs(bound) >= INFINITE_BOUND:
+        return float(np.copysign(np.inf, bound))
+    return bound
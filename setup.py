@@ -7,5 +7,9 @@ setup(name='autoscaling',
       author='Harvey Weyandt',
       author_email='harvey.weyandt@nasa.gov',
       license='MIT',
-      packages=['autoscaling'],
+      packages=['autoscaling', 'autoscaling.autoscalers', 'autoscaling.core',
+                'autoscaling.utils'],
+      install_requires=['numpy'],
+      extras_require={'sparse': ['scipy']},
+      entry_points={'console_scripts': ['autoscaling = autoscaling.cli:main']},
       zip_safe=False)